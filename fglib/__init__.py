@@ -5,6 +5,14 @@ to simulate message passing on factor graphs.
 
 Modules:
     inference: Module for inference algorithms.
+    aio: Module for asynchronous inference.
+    messages: Module for message-passing helpers.
+    pairwise: Module for vectorized message passing on pairwise factor graphs.
+    gabp: Module for Gaussian belief propagation on flat arrays.
+    junction: Module for junction trees.
+    elimination: Module for elimination orders of factor graphs.
+    streaming: Module for streaming inference.
+    sampling: Module for sampling.
     graphs: Module for factor graphs.
     nodes: Module for nodes of factor graphs.
     edges: Module for edges of factor graphs.
@@ -13,5 +21,7 @@ Modules:
 
 """
 
-__all__ = ["inference", "graphs", "nodes", "edges", "rv", "utils"]
+__all__ = ["inference", "aio", "messages", "pairwise", "gabp", "junction",
+           "elimination", "streaming", "sampling", "graphs", "nodes", "edges",
+           "rv", "utils"]
 __version__ = "0.2.4"
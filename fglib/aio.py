@@ -0,0 +1,191 @@
+"""Module for asynchronous inference.
+
+This module contains inference algorithms for factor graphs with nodes,
+whose message passing methods return awaitables, e.g. input-output nodes
+with coroutine callbacks for remote or hardware-backed factors. The
+messages are computed concurrently by tasks of the asyncio event loop.
+
+Functions:
+    async_belief_propagation: Belief propagation with coroutine callbacks
+    async_loopy_belief_propagation: Loopy belief propagation with coroutine
+        callbacks
+
+"""
+
+import asyncio
+import inspect
+from random import choice
+
+import numpy as np
+
+from . import inference, messages
+
+
+async def async_belief_propagation(graph, query_node=None, all_marginals=False,
+                                   factors=False, concurrency=None,
+                                   timeout=None):
+    """Belief propagation with coroutine callbacks.
+
+    Perform exact inference on tree structured graphs like
+    inference.belief_propagation, but await the message passing methods of
+    nodes, which return awaitables (e.g. input-output nodes with coroutine
+    callbacks). Each message is scheduled as a task, which starts as soon as
+    all messages it depends on are set. Hence, all messages, which are ready
+    at the same time (e.g. all messages from the leaves in the forward
+    phase), are computed concurrently.
+
+    Args:
+        graph: A tree structured factor graph.
+        query_node: Root node of the sweep. In the case of None, a random
+            variable node is picked.
+        all_marginals: Boolean flag if the beliefs of all variable nodes
+            should be returned as a dictionary keyed by node.
+        factors: Boolean flag if the beliefs of all factor nodes should be
+            included in the dictionary.
+        concurrency: Optional maximum number of concurrently computed
+            messages.
+        timeout: Optional timeout in seconds for the complete sweep.
+
+    Returns:
+        The belief of the query node or a dictionary of beliefs (see
+        inference.belief_propagation).
+
+    Raises:
+        TimeoutError: An error occurred, if the sweep did not finish in time
+            (asyncio.TimeoutError before Python 3.11). All pending messages
+            are cancelled.
+
+    """
+    if query_node is None:  # pick random node
+        query_node = choice(graph.get_vnodes())
+
+    backward_path = await asyncio.wait_for(
+        _tree_schedule(graph, query_node, 'spa', concurrency), timeout)
+    return messages.beliefs(query_node, backward_path, all_marginals,
+                            factors)
+
+
+async def async_loopy_belief_propagation(model, iterations, query_node=(),
+                                         tolerance=None, damping=0.,
+                                         concurrency=None, timeout=None):
+    """Loopy belief propagation with coroutine callbacks.
+
+    Perform approximative inference on arbitrary structured graphs with the
+    synchronous schedule of inference.loopy_belief_propagation. All messages
+    of an iteration only depend on the messages of the previous iteration, so
+    that they are computed concurrently.
+
+    Args:
+        model: A factor graph.
+        iterations: Maximum number of iterations.
+        query_node: Variable nodes, whose beliefs are recorded after each
+            iteration.
+        tolerance: Optional tolerance for the maximum change of all messages.
+            In the case of None, all iterations are performed.
+        damping: Weight of the previous message between 0 (no damping) and 1
+            (exclusive).
+        concurrency: Optional maximum number of concurrently computed
+            messages.
+        timeout: Optional timeout in seconds for all iterations.
+
+    Returns:
+        A tuple with a dictionary of the beliefs of the query nodes for each
+        iteration and a convergence report.
+
+    Raises:
+        TimeoutError: An error occurred, if the iterations did not finish in
+            time (asyncio.TimeoutError before Python 3.11).
+        ValueError: An error occurred for a damping outside of [0, 1).
+
+    """
+    messages.check_damping(damping)
+    return await asyncio.wait_for(
+        _synchronous_schedule(model, 'spa', iterations, query_node,
+                              tolerance, damping, concurrency),
+        timeout)
+
+
+async def _message(snode, method, tnode, limit):
+    """Return a message, which is awaited if necessary."""
+    if limit is not None:
+        async with limit:
+            return await _message(snode, method, tnode, None)
+
+    msg = getattr(snode, method)(tnode)
+    if inspect.isawaitable(msg):
+        msg = await msg
+    return msg
+
+
+async def _send(graph, snode, tnode, method, dependencies, limit):
+    """Set a message after all messages it depends on are set."""
+    if dependencies:
+        await asyncio.gather(*dependencies)
+    msg = await _message(snode, method, tnode, limit)
+    graph[snode][tnode]['object'].set_message(snode, tnode, msg)
+
+
+async def _tree_schedule(graph, query_node, method, concurrency):
+    """Two-pass schedule for tree structured graphs with concurrent tasks.
+
+    A task is created for each message in the order of the two phases, so
+    that the tasks of all messages it depends on already exist.
+    Return the edges of the backward phase.
+
+    """
+    backward_path = graph.schedule(query_node)
+    limit = asyncio.Semaphore(concurrency) if concurrency else None
+
+    tasks = {}
+    edges = [(u, v) for (v, u) in reversed(backward_path)] \
+        + list(backward_path)
+    for (u, v) in edges:  # Edge direction: u -> v
+        dependencies = [tasks[(w, u)] for w in u.neighbors(v)]
+        tasks[(u, v)] = asyncio.ensure_future(
+            _send(graph, u, v, method, dependencies, limit))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    graph.mark_swept(method, query_node)
+    return backward_path
+
+
+async def _synchronous_schedule(model, method, iterations, query_node,
+                                tolerance, damping, concurrency):
+    """Synchronous flooding schedule with concurrent messages.
+
+    Return the belief of all query_nodes and a convergence report.
+
+    """
+    b = {n: [] for n in query_node}
+    messages.initialize(model)
+    edges = [(u, v) for u in model.nodes() for v in u.neighbors()]
+    limit = asyncio.Semaphore(concurrency) if concurrency else None
+
+    residual = np.inf
+    converged = False
+    i = 0
+    for i in range(1, iterations + 1):
+        old = [model[u][v]['object'].get_message(u, v) for (u, v) in edges]
+        new = await asyncio.gather(*[_message(u, method, v, limit)
+                                     for (u, v) in edges])
+        new = [msg.normalize() for msg in new]
+        residual = messages.swap(model, edges, old, new,
+                                 damping if i > 1 else 0.)
+
+        # Beliefs of query nodes
+        for n in query_node:
+            b[n].append(n.belief())
+
+        # Messages of the first iteration are compared with unit elements
+        if tolerance is not None and i > 1 and residual < tolerance:
+            converged = True
+            break
+
+    return b, inference.ConvergenceReport(i, residual, converged)
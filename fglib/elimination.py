@@ -0,0 +1,170 @@
+"""Module for elimination orders of factor graphs.
+
+This module contains functions to determine elimination orders of the
+variables of factor graphs by greedy heuristics. Elimination orders are used
+to triangulate factor graphs for exact inference.
+
+Functions:
+    interaction_graph: Return the interaction graph of a factor graph.
+    cardinalities: Return the number of states of discrete variables.
+    elimination_order: Return an elimination order by a greedy heuristic.
+
+"""
+
+import heapq
+
+import networkx as nx
+import numpy as np
+
+from . import rv
+
+
+def interaction_graph(graph):
+    """Return the interaction graph of a factor graph.
+
+    The interaction graph (or moral graph) contains all variable nodes of the
+    factor graph. Two variable nodes are connected, if they share a factor.
+
+    Args:
+        graph: A factor graph.
+
+    Returns:
+        An undirected graph (of the NetworkX library) over variable nodes.
+
+    """
+    g = nx.Graph()
+    g.add_nodes_from(graph.get_vnodes())
+    for f in graph.get_fnodes():
+        scope = list(f.neighbors())
+        g.add_edges_from((u, v) for i, u in enumerate(scope)
+                         for v in scope[i + 1:])
+    return g
+
+
+def cardinalities(graph):
+    """Return the number of states of discrete variables.
+
+    The number of states is taken from the discrete factors and initial
+    messages of the factor graph. Dimensions of size one are broadcast.
+
+    Args:
+        graph: A factor graph.
+
+    Returns:
+        A dictionary with the number of states of each variable node.
+
+    """
+    card = {v: 1 for v in graph.get_vnodes()}
+    dists = [f.factor for f in graph.get_fnodes()] \
+        + [v.init for v in graph.get_vnodes()]
+    for d in dists:
+        if isinstance(d, rv.Discrete):
+            shape = d.shape[1:] if d.batched else d.shape
+            for v, k in zip(d.dim, shape):
+                card[v] = max(card.get(v, 1), k)
+    return card
+
+
+def _min_fill(g, v, card):
+    """Return the number of fill-in edges by eliminating a node."""
+    neighbors = list(g[v])
+    return sum(1 for i, u in enumerate(neighbors) for w in neighbors[i + 1:]
+               if w not in g[u])
+
+
+def _min_degree(g, v, card):
+    """Return the number of neighbors of a node."""
+    return len(g[v])
+
+
+def _min_weight(g, v, card):
+    """Return the size of the factor created by eliminating a node."""
+    return int(np.prod([card[u] for u in g[v]], dtype=float) * card[v])
+
+
+def _weighted_min_fill(g, v, card):
+    """Return the sum of the weights of fill-in edges by eliminating a node.
+
+    The weight of an edge is the product of the numbers of states of its
+    nodes.
+
+    """
+    neighbors = list(g[v])
+    return sum(card[u] * card[w] for i, u in enumerate(neighbors)
+               for w in neighbors[i + 1:] if w not in g[u])
+
+
+_HEURISTICS = {'min_fill': _min_fill,
+               'min_degree': _min_degree,
+               'min_weight': _min_weight,
+               'weighted_min_fill': _weighted_min_fill}
+_WEIGHTED = {'min_weight', 'weighted_min_fill'}
+
+
+def elimination_order(g, heuristic='min_fill', card=None, keep=()):
+    """Return an elimination order by a greedy heuristic.
+
+    In each step, the node with the lowest cost is eliminated, i.e. its
+    neighbors are connected (fill-in edges) and the node is removed. Ties are
+    broken by the order of the nodes in the graph. Only the costs of nodes
+    near an eliminated node are updated.
+
+    Args:
+        g: An interaction graph. The graph is not modified.
+        heuristic: Name of the heuristic, i.e. 'min_fill' (number of fill-in
+            edges), 'min_degree' (number of neighbors), 'min_weight' (size
+            of the created factor) or 'weighted_min_fill' (sum of the sizes
+            of fill-in edges).
+        card: Dictionary with the number of states of each node. Required for
+            the cost-aware heuristics 'min_weight' and 'weighted_min_fill'.
+        keep: Nodes, which are not eliminated (e.g. query nodes).
+
+    Returns:
+        A tuple with the list of eliminated nodes and the list of cliques
+        (tuples of nodes) induced by the elimination of each node.
+
+    Raises:
+        ValueError: An error occurred for an unknown heuristic or for a
+            cost-aware heuristic without numbers of states.
+
+    """
+    try:
+        cost = _HEURISTICS[heuristic]
+    except KeyError:
+        raise ValueError('Unknown heuristic: %s' % heuristic)
+    if heuristic in _WEIGHTED and card is None:
+        raise ValueError('Heuristic %s requires numbers of states.'
+                         % heuristic)
+
+    g = g.copy()
+    position = {v: i for i, v in enumerate(g)}
+    current = {v: cost(g, v, card) for v in g if v not in keep}
+    heap = [(c, position[v], v) for v, c in current.items()]
+    heapq.heapify(heap)
+
+    order, cliques = [], []
+    while heap:
+        c, _, v = heapq.heappop(heap)
+        if v not in current or current[v] != c:
+            continue  # Outdated entry
+
+        # Eliminate node and connect its neighbors
+        neighbors = list(g[v])
+        order.append(v)
+        cliques.append(tuple([v] + neighbors))
+        g.add_edges_from((u, w) for i, u in enumerate(neighbors)
+                         for w in neighbors[i + 1:])
+        g.remove_node(v)
+        del current[v]
+
+        # Update costs of nodes within distance two
+        affected = set(neighbors)
+        for u in neighbors:
+            affected.update(g[u])
+        for u in affected.difference(keep):
+            c = cost(g, u, card)
+            if c != current[u]:
+                current[u] = c
+                heapq.heappush(heap, (c, position[u], u))
+
+    return order, cliques
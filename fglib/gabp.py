@@ -0,0 +1,358 @@
+"""Module for Gaussian belief propagation on flat arrays.
+
+This module contains an engine for Gaussian belief propagation (GaBP) on
+large sparse systems. Gaussian factors in information form over single
+variables or small blocks of scalar variables are lowered into a sparse
+precision matrix and a precision-mean vector, i.e. a pairwise Gaussian
+Markov random field. All messages are stored in flat arrays (precision and
+precision-mean per directed edge) and updated by vectorized operations.
+
+The means of converged Gaussian belief propagation are the solution of the
+linear system defined by the precision matrix and the precision-mean vector.
+The marginal variances are exact on tree structured systems and approximate
+otherwise.
+
+Classes:
+    Solution: Solution of a sparse linear system.
+    GaussianGraph: Flat-array representation of a Gaussian factor graph.
+
+Functions:
+    gaussian_belief_propagation: Gaussian belief propagation.
+    solve: Solve a sparse linear system by Gaussian belief propagation.
+
+"""
+
+import heapq
+from collections import namedtuple
+
+import numpy as np
+
+from . import inference, messages, rv
+
+
+Solution = namedtuple('Solution', ['mean', 'variance', 'report'])
+Solution.__doc__ = """Solution of a sparse linear system.
+
+Attributes:
+    mean: Numpy array with the means of all variables.
+    variance: Numpy array with the marginal variances of all variables or
+        None, if they were not requested.
+    report: Convergence report of the message passing.
+
+"""
+
+
+class GaussianGraph:
+
+    """Flat-array representation of a Gaussian factor graph.
+
+    The precision matrix J is split into its diagonal of shape (V,) and its
+    upper off-diagonal entries with one entry per edge (src < dst). Messages
+    are stored in information form in two arrays of shape (2E,): the first E
+    entries hold the messages from src to dst and the last E entries the
+    messages from dst to src.
+
+    """
+
+    def __init__(self, graph):
+        """Lower a Gaussian factor graph into flat arrays.
+
+        The precision matrices and precision-mean vectors of all factors and
+        initial messages are summed up into the sparse precision matrix and
+        the precision-mean vector of all variable nodes.
+
+        Args:
+            graph: A factor graph with Gaussian factors without batch
+                dimensions.
+
+        Raises:
+            ParameterException: An error occurred lowering a factor, which is
+                not Gaussian.
+
+        """
+        variables = graph.get_vnodes()
+        index = {v: i for i, v in enumerate(variables)}
+
+        rows, cols, values, h = [], [], [], np.zeros(len(variables))
+        dists = [f.factor for f in graph.get_fnodes()] \
+            + [v.init for v in variables]
+        for d in dists:
+            if not isinstance(d, rv.Gaussian) or d.batched:
+                raise rv.ParameterException('Factor is not Gaussian.')
+            idx = np.array([index[v] for v in d.dim], dtype=int)
+            r, c = np.meshgrid(idx, idx, indexing='ij')
+            rows.append(r.ravel())
+            cols.append(c.ravel())
+            values.append(np.asarray(d.precision, dtype=float).ravel())
+            np.add.at(h, idx, np.asarray(d.precision_mean).ravel())
+
+        self._lower(len(variables), np.concatenate(rows or [[]]),
+                    np.concatenate(cols or [[]]),
+                    np.concatenate(values or [[]]), h)
+        self.graph = graph
+        self.variables = variables
+
+    @classmethod
+    def from_system(cls, A, b):
+        """Initialize from a sparse linear system A x = b.
+
+        Args:
+            A: Symmetric positive definite matrix as Numpy array, as tuple
+                (rows, cols, values) of coordinates or as object with a tocoo
+                method (e.g. a SciPy sparse matrix). Only the diagonal and the
+                upper triangle are used.
+            b: Numpy array of the right-hand side.
+
+        """
+        if hasattr(A, 'tocoo'):
+            A = A.tocoo()
+            rows, cols, values = A.row, A.col, A.data
+        elif isinstance(A, tuple):
+            rows, cols, values = A
+        else:
+            rows, cols = np.nonzero(A)
+            values = np.asarray(A)[rows, cols]
+
+        b = np.asarray(b, dtype=float).ravel()
+        obj = cls.__new__(cls)
+        obj._lower(len(b), np.asarray(rows), np.asarray(cols),
+                   np.asarray(values, dtype=float), b)
+        obj.graph = None
+        obj.variables = None
+        return obj
+
+    def _lower(self, n, rows, cols, values, h):
+        """Set the flat arrays from the coordinates of a precision matrix."""
+        rows, cols = rows.astype(int), cols.astype(int)
+        self.diag = np.bincount(rows[rows == cols], values[rows == cols],
+                                minlength=n)
+        self.h = h
+
+        # Unique edges of the upper triangle
+        upper = rows < cols
+        keys, inverse = np.unique(rows[upper] * n + cols[upper],
+                                  return_inverse=True)
+        self.J = np.bincount(inverse, values[upper], minlength=len(keys))
+        self.src, self.dst = keys // n, keys % n
+
+        self._source = np.concatenate((self.src, self.dst))
+        self._target = np.concatenate((self.dst, self.src))
+        E = len(keys)
+        self._reverse = np.concatenate((np.arange(E, 2 * E), np.arange(E)))
+        self._coupling = np.concatenate((self.J, self.J))
+
+        # Outgoing edges per variable (compressed rows)
+        self._order = np.argsort(self._source, kind='stable')
+        self._indptr = np.searchsorted(self._source[self._order],
+                                       np.arange(n + 1))
+
+        self.reset()
+
+    def reset(self):
+        """Reset all messages to zero precision."""
+        self.P = np.zeros(len(self._source))
+        self.m = np.zeros(len(self._source))
+
+    def _incoming(self):
+        """Return the sums of incoming messages per variable."""
+        S_P = np.bincount(self._target, self.P, minlength=len(self.diag))
+        S_m = np.bincount(self._target, self.m, minlength=len(self.diag))
+        return S_P, S_m
+
+    def _compute(self, edges, S_P, S_m):
+        """Return the new messages of the given (directed) edges."""
+        s, r = self._source[edges], self._reverse[edges]
+        A = self.diag[s] + S_P[s] - self.P[r]
+        b = self.h[s] + S_m[s] - self.m[r]
+        J = self._coupling[edges]
+        return -J * J / A, -J * b / A
+
+    def iterate(self, damping=0.):
+        """Perform one synchronous iteration.
+
+        All messages are computed from the messages of the previous
+        iteration.
+
+        Args:
+            damping: Weight of the previous message between 0 (no damping)
+                and 1 (exclusive).
+
+        Returns:
+            The maximum absolute change of all messages.
+
+        Raises:
+            ValueError: An error occurred for a damping outside of [0, 1).
+
+        """
+        messages.check_damping(damping)
+        P, m = self._compute(slice(None), *self._incoming())
+        if damping:
+            P = (1 - damping) * P + damping * self.P
+            m = (1 - damping) * m + damping * self.m
+
+        residual = max(np.max(np.abs(P - self.P), initial=0.),
+                       np.max(np.abs(m - self.m), initial=0.))
+        self.P, self.m = P, m
+        return float(residual)
+
+    def propagate(self, tolerance=1e-10, max_updates=None):
+        """Perform residual updates.
+
+        The pending message with the largest change is applied first. Only
+        the messages leaving the target variable of an applied message are
+        recomputed, using running sums of the incoming messages.
+
+        Args:
+            tolerance: Tolerance for the change of all pending messages. The
+                updates stop as soon as no pending change exceeds it.
+            max_updates: Optional maximum number of applied messages.
+
+        Returns:
+            A convergence report with the number of applied messages.
+
+        """
+        S_P, S_m = self._incoming()
+        new_P, new_m = self._compute(slice(None), S_P, S_m)
+        res = np.maximum(np.abs(new_P - self.P), np.abs(new_m - self.m))
+        heap = [(-r, e) for e, r in enumerate(res.tolist())]
+        heapq.heapify(heap)
+
+        updates = 0
+        while heap and (max_updates is None or updates < max_updates):
+            r, e = heapq.heappop(heap)
+            if -r != res[e]:
+                continue  # Outdated entry
+            if -r <= tolerance:
+                break  # Also stops for zero residuals and no tolerance
+
+            # Apply message and update running sums of its target
+            j = self._target[e]
+            S_P[j] += new_P[e] - self.P[e]
+            S_m[j] += new_m[e] - self.m[e]
+            self.P[e], self.m[e] = new_P[e], new_m[e]
+            res[e] = 0.
+            updates += 1
+
+            # Recompute messages leaving the target
+            out = self._order[self._indptr[j]:self._indptr[j + 1]]
+            out = out[out != self._reverse[e]]
+            new_P[out], new_m[out] = self._compute(out, S_P, S_m)
+            res[out] = np.maximum(np.abs(new_P[out] - self.P[out]),
+                                  np.abs(new_m[out] - self.m[out]))
+            for k, rk in zip(out.tolist(), res[out].tolist()):
+                heapq.heappush(heap, (-rk, k))
+
+        residual = float(np.max(res, initial=0.))
+        return inference.ConvergenceReport(updates, residual,
+                                           residual <= tolerance)
+
+    def marginals(self):
+        """Return the means and marginal variances of all variables.
+
+        Returns:
+            A tuple with the Numpy arrays of the means and the variances.
+
+        """
+        S_P, S_m = self._incoming()
+        precision = self.diag + S_P
+        return (self.h + S_m) / precision, 1 / precision
+
+    def beliefs(self, nodes=None):
+        """Return the beliefs of variable nodes.
+
+        Args:
+            nodes: Optional variable nodes. In the case of None, the beliefs
+                of all variable nodes are returned.
+
+        Returns:
+            A dictionary with the Gaussian beliefs of the variable nodes.
+
+        """
+        if self.variables is None:
+            raise rv.ParameterException('Graph has no variable nodes.')
+        mean, var = self.marginals()
+        index = {v: i for i, v in enumerate(self.variables)}
+        nodes = self.variables if nodes is None else nodes
+        return {n: rv.Gaussian([[mean[index[n]]]], [[var[index[n]]]], n)
+                for n in nodes}
+
+
+def _run(engine, iterations, tolerance, damping, schedule):
+    """Run a schedule on an engine and return a convergence report."""
+    messages.check_damping(damping)
+    if schedule == 'residual':
+        return engine.propagate(
+            0. if tolerance is None else tolerance,
+            max_updates=iterations * len(engine.P))
+    if schedule != 'synchronous':
+        raise ValueError('Unknown schedule: %s' % schedule)
+
+    residual = np.inf
+    converged = False
+    i = 0
+    for i in range(1, iterations + 1):
+        residual = engine.iterate(damping)
+        if tolerance is not None and residual < tolerance:
+            converged = True
+            break
+    return inference.ConvergenceReport(i, residual, converged)
+
+
+def gaussian_belief_propagation(graph, iterations, query_node=None,
+                                tolerance=None, damping=0.,
+                                schedule='synchronous'):
+    """Gaussian belief propagation.
+
+    Perform inference on factor graphs with Gaussian factors. The factor
+    graph is lowered once into flat arrays.
+
+    Args:
+        graph: A Gaussian factor graph or an instance of GaussianGraph.
+        iterations: Maximum number of iterations. For the residual schedule,
+            the maximum number of applied messages is the number of
+            iterations times the number of messages.
+        query_node: Optional variable nodes. In the case of None, the beliefs
+            of all variable nodes are returned.
+        tolerance: Optional tolerance for the maximum change of all messages.
+            In the case of None, all iterations are performed.
+        damping: Weight of the previous message between 0 (no damping) and 1
+            (exclusive) for the synchronous schedule.
+        schedule: Name of the schedule, i.e. 'synchronous' or 'residual'.
+
+    Returns:
+        A tuple with a dictionary of the beliefs and a convergence report.
+
+    """
+    engine = graph if isinstance(graph, GaussianGraph) \
+        else GaussianGraph(graph)
+    report = _run(engine, iterations, tolerance, damping, schedule)
+    return engine.beliefs(query_node), report
+
+
+def solve(A, b, iterations=1000, tolerance=1e-10, damping=0.,
+          schedule='synchronous', variances=False):
+    """Solve a sparse linear system by Gaussian belief propagation.
+
+    Convergence is guaranteed for walk-summable systems, e.g. symmetric
+    diagonally dominant matrices with positive diagonal.
+
+    Args:
+        A: Symmetric positive definite matrix (see GaussianGraph.from_system).
+        b: Numpy array of the right-hand side.
+        iterations: Maximum number of iterations (see
+            gaussian_belief_propagation).
+        tolerance: Tolerance for the maximum change of all messages.
+        damping: Weight of the previous message between 0 (no damping) and 1
+            (exclusive) for the synchronous schedule.
+        schedule: Name of the schedule, i.e. 'synchronous' or 'residual'.
+        variances: Boolean flag if the marginal variances should be returned.
+
+    Returns:
+        A solution with the means, the optional variances and a convergence
+        report.
+
+    """
+    engine = GaussianGraph.from_system(A, b)
+    report = _run(engine, iterations, tolerance, damping, schedule)
+    mean, var = engine.marginals()
+    return Solution(mean, var if variances else None, report)
@@ -11,11 +11,32 @@ Functions:
 
 """
 
+import functools
+
 import networkx as nx
 
 from . import nodes, edges
 
 
+def _invalidating(method):
+    """Wrap a mutating graph method to invalidate cached schedules.
+
+    Without a valid sweep, the change stamps of nodes and messages are
+    meaningless, so that they are dropped as well.
+
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._schedules.clear()
+        self._parents.clear()
+        self._compiled.clear()
+        self._swept.clear()
+        self._changed.clear()
+        self._stamps.clear()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
 class FactorGraph(nx.Graph):
 
     """Class for factor graphs.
@@ -43,11 +64,204 @@ class FactorGraph(nx.Graph):
     The class for factor graphs is inherited from the base class
     for undirected graphs (of the NetworkX library).
 
+    Message-passing schedules are cached for each root node. All methods,
+    which add or remove nodes or edges, invalidate the cache.
+
+    For incremental inference, the factor graph keeps track of nodes with
+    changed local evidence (initial messages of variable nodes and factors of
+    factor nodes) and of the time each message was computed.
+
     """
 
     def __init__(self):
         """Initialize a factor graph."""
-        super().__init__(self, name="Factor Graph")
+        self._schedules = {}  # Cached schedules per root node
+        self._parents = {}  # Cached parents per root node
+        self._compiled = {}  # Cached compiled structures (e.g. junction tree)
+        self._clock = 0  # Logical clock for change stamps
+        self._changed = {}  # Change stamps of nodes since the last sweep
+        self._stamps = {}  # Stamps of messages since the last sweep
+        self._swept = {}  # Method and time of the last sweep per node
+        super().__init__(name="Factor Graph")
+
+    add_node = _invalidating(nx.Graph.add_node)
+    add_nodes_from = _invalidating(nx.Graph.add_nodes_from)
+    remove_node = _invalidating(nx.Graph.remove_node)
+    remove_nodes_from = _invalidating(nx.Graph.remove_nodes_from)
+    add_edge = _invalidating(nx.Graph.add_edge)
+    add_edges_from = _invalidating(nx.Graph.add_edges_from)
+    remove_edge = _invalidating(nx.Graph.remove_edge)
+    remove_edges_from = _invalidating(nx.Graph.remove_edges_from)
+    clear = _invalidating(nx.Graph.clear)
+    clear_edges = _invalidating(nx.Graph.clear_edges)
+
+    def schedule(self, root):
+        """Return the message-passing schedule for a root node.
+
+        The schedule contains the edges of a depth-first search from the root
+        node, i.e. each edge (u, v) is directed away from the root. Messages
+        towards the root are passed along the reversed schedule and messages
+        away from the root along the schedule itself. The schedule is computed
+        once for each root node and cached until the graph is modified.
+
+        Args:
+            root: Root node of the schedule.
+
+        Returns:
+            A tuple of edges in depth-first order.
+
+        """
+        try:
+            return self._schedules[root]
+        except KeyError:
+            schedule = tuple(nx.dfs_edges(self, root))
+            self._schedules[root] = schedule
+            return schedule
+
+    def parents(self, root):
+        """Return the parents of all nodes for a root node.
+
+        Args:
+            root: Root node of the schedule.
+
+        Returns:
+            A dictionary, which maps each node (except the root node) to a
+            tuple of its parent towards the root node and the position of the
+            edge in the schedule.
+
+        """
+        try:
+            return self._parents[root]
+        except KeyError:
+            parents = {v: (u, i)
+                       for i, (u, v) in enumerate(self.schedule(root))}
+            self._parents[root] = parents
+            return parents
+
+    def notify(self, node):
+        """Mark the local evidence of a node as changed.
+
+        Nodes call this method, if the initial message of a variable node,
+        its observed flag or the factor of a factor node is changed. Nodes,
+        which were removed from the graph, are ignored.
+
+        Args:
+            node: Node with changed local evidence.
+
+        """
+        if node in self:
+            self._changed[node] = self._tick()
+
+    def compiled(self, key, build, valid=None):
+        """Return a compiled structure, which is cached for the graph.
+
+        Compiled structures (e.g. junction trees) are cached until the graph
+        is modified.
+
+        Args:
+            key: Hashable key of the compiled structure.
+            build: Function, which compiles the structure from the graph.
+            valid: Optional function, which returns if a cached structure
+                is still valid for the graph.
+
+        Returns:
+            The cached or newly compiled structure.
+
+        """
+        obj = self._compiled.get(key)
+        if obj is None or (valid is not None and not valid(obj)):
+            obj = self._compiled[key] = build(self)
+        return obj
+
+    def is_swept(self, method, node):
+        """Return if the messages hold a complete sweep of a method.
+
+        Args:
+            method: Name of the message-passing method (e.g. 'spa').
+            node: Node of the connected component.
+
+        Returns:
+            True, if the last sweep of the connected component of the node
+            used the method and the graph was not modified since.
+
+        """
+        return self._swept.get(node, (None, None))[0] == method
+
+    def mark_swept(self, method, root=None):
+        """Record a complete sweep of a message-passing method.
+
+        The change stamps of the swept connected component are reset, so
+        that only changes after the sweep are considered stale.
+
+        Args:
+            method: Name of the message-passing method or None, if the
+                messages of previous sweeps were overwritten.
+            root: Node of the swept connected component. In the case of
+                None, all connected components are marked.
+
+        """
+        if root is None:
+            component = set(self.nodes())
+        else:
+            component = nx.node_connected_component(self, root)
+
+        if method is None:
+            for n in component:
+                self._swept.pop(n, None)
+            return
+
+        base = self._tick()
+        for n in component:
+            self._swept[n] = (method, base)
+            self._changed.pop(n, None)
+        self._stamps = {e: t for e, t in self._stamps.items()
+                        if e[0] not in component}
+
+    def stale(self, root):
+        """Generate the edges towards a root node with outdated messages.
+
+        Only the paths from nodes with changed local evidence to the root
+        node are visited. The edges are generated lazily in the order of the
+        forward phase, so that messages recomputed in between are taken into
+        account for the following edges.
+
+        Args:
+            root: Root node of a swept connected component.
+
+        """
+        parents = self.parents(root)
+        stamp = self._stamps.get
+        base = self._swept[root][1]
+
+        # Union of paths from changed nodes to the root node
+        visited = {}
+        for n in self._changed:
+            while n in parents and n not in visited:
+                visited[n] = parents[n]
+                n = parents[n][0]
+
+        for u, (v, _) in sorted(visited.items(), key=lambda item: item[1][1],
+                                reverse=True):
+            m = stamp((u, v), base)
+            if self._changed.get(u, 0) > m \
+                    or any(stamp((w, u), base) > m
+                           for w in u.neighbors(v)):
+                yield u, v
+
+    def stamp(self, snode, tnode):
+        """Record the time a message was computed.
+
+        Args:
+            snode: Source node of the message.
+            tnode: Target node of the message.
+
+        """
+        self._stamps[(snode, tnode)] = self._tick()
+
+    def _tick(self):
+        """Advance the logical clock and return the new time."""
+        self._clock += 1
+        return self._clock
 
     def set_node(self, node):
         """Add a single node to the factor graph.
@@ -2,56 +2,115 @@
 
 This module contains different functions to perform inference on factor graphs.
 
+Classes:
+    ConvergenceReport: Convergence report of iterative message passing.
+    EliminationPlan: Plan of variable elimination for a single query.
+    MeanFieldReport: Convergence report of the mean-field algorithm.
+
 Functions:
     belief_propagation: Belief propagation
     sum_product: Sum-product algorithm
     max_product: Max-product algorithm
     max_sum: Max-sum algorithm
+    elimination_plan: Plan of variable elimination
+    variable_elimination: Variable elimination algorithm
     loopy_belief_propagation: Loopy belief propagation
+    residual_belief_propagation: Residual belief propagation
     mean_field: Mean-field algorithm
 
 """
 
+import heapq
+import itertools
+import os
+from collections import Counter, namedtuple
 from random import choice
 
 import networkx as nx
+import numpy as np
+
+from . import elimination, messages, nodes, rv
+
+
+ConvergenceReport = namedtuple('ConvergenceReport',
+                               ['iterations', 'residual', 'converged'])
+ConvergenceReport.__doc__ = """Convergence report of iterative message passing.
+
+Attributes:
+    iterations: Number of performed iterations.
+    residual: Maximum change of all messages in the last iteration.
+    converged: Boolean flag if the residual is below the tolerance.
+
+"""
 
-from . import nodes
+MeanFieldReport = namedtuple('MeanFieldReport',
+                             ['iterations', 'residual', 'converged', 'elbo'])
+MeanFieldReport.__doc__ = """Convergence report of the mean-field algorithm.
+
+Attributes:
+    iterations: Number of performed iterations.
+    residual: Absolute change of the evidence lower bound in the last
+        iteration.
+    converged: Boolean flag if the residual is below the tolerance.
+    elbo: List with the evidence lower bound after each iteration.
+
+"""
+
+EliminationPlan = namedtuple('EliminationPlan', ['order', 'factors', 'size'])
+EliminationPlan.__doc__ = """Plan of variable elimination for a single query.
+
+Attributes:
+    order: List of variable nodes in the order of elimination.
+    factors: List of discrete factors after the reduction by the evidence
+        and the pruning of irrelevant factors.
+    size: Estimated peak number of entries of an intermediate factor (per
+        batch entry).
+
+"""
 
 
-def belief_propagation(graph, query_node=None):
+def belief_propagation(graph, query_node=None, all_marginals=False,
+                       factors=False, incremental=False):
     """Belief propagation.
 
     Perform exact inference on tree structured graphs.
     Return the belief of all query_nodes.
 
+    After the two passes, every edge holds the messages in both directions.
+    In the all-marginals mode, the beliefs of all variable nodes (and
+    optionally of all factor nodes) connected to the query node are returned
+    from a single sweep.
+
+    Args:
+        graph: A tree structured factor graph.
+        query_node: Root node of the sweep. In the case of None, a random
+            variable node is picked.
+        all_marginals: Boolean flag if the beliefs of all variable nodes
+            should be returned as a dictionary keyed by node.
+        factors: Boolean flag if the beliefs of all factor nodes (over the
+            variables of the factors) should be included in the dictionary.
+        incremental: Boolean flag if messages of a previous sweep should be
+            reused. Only the messages on the paths from nodes with changed
+            local evidence to the query node are recomputed. A complete sweep
+            is performed, if there is no previous sweep, if the graph was
+            modified or if all marginals are requested.
+
     """
 
     if query_node is None:  # pick random node
         query_node = choice(graph.get_vnodes())
 
-    # Depth First Search to determine edges
-    dfs = nx.dfs_edges(graph, query_node)
+    if incremental and not (all_marginals or factors) \
+            and graph.is_swept('spa', query_node):
+        _incremental_schedule(graph, query_node, 'spa')
+        return query_node.belief()
 
-    # Convert tuple to reversed list
-    backward_path = list(dfs)
-    forward_path = reversed(backward_path)
+    backward_path = _tree_schedule(graph, query_node, 'spa')
+    return messages.beliefs(query_node, backward_path, all_marginals, factors)
 
-    # Messages in forward phase
-    for (v, u) in forward_path:  # Edge direction: u -> v
-        msg = u.spa(v)
-        graph[u][v]['object'].set_message(u, v, msg)
 
-    # Messages in backward phase
-    for (u, v) in backward_path:  # Edge direction: u -> v
-        msg = u.spa(v)
-        graph[u][v]['object'].set_message(u, v, msg)
-
-    # Return marginal distribution
-    return query_node.belief()
-
-
-def sum_product(graph, query_node=None):
+def sum_product(graph, query_node=None, all_marginals=False, factors=False,
+                incremental=False):
     """Sum-product algorithm.
 
     Compute marginal distribution on graphs that are tree structured.
@@ -60,148 +119,923 @@ def sum_product(graph, query_node=None):
     """
 
     # Sum-Product algorithm is equivalent to Belief Propagation
-    return belief_propagation(graph, query_node)
+    return belief_propagation(graph, query_node, all_marginals, factors,
+                              incremental)
 
 
-def max_product(graph, query_node=None):
+def max_product(graph, query_node=None, k=None):
     """Max-product algorithm.
 
     Compute setting of variables with maximum probability on graphs
     that are tree structured.
     Return the setting of all query_nodes.
 
-    """
-    track = {}  # Setting of variables
+    Args:
+        graph: A tree structured factor graph.
+        query_node: Root node of the sweep. In the case of None, a random
+            variable node is picked.
+        k: Optional number of best settings (k-best decoding). In this case,
+            a list of up to k tuples with the (unnormalized) probability and
+            the setting of all variables is returned in descending order.
 
+    """
     if query_node is None:  # pick random node
         query_node = choice(graph.get_vnodes())
 
-    # Depth First Search to determine edges
-    dfs = nx.dfs_edges(graph, query_node)
-
-    # Convert tuple to reversed list
-    backward_path = list(dfs)
-    forward_path = reversed(backward_path)
+    if k is not None:
+        return [(np.exp(score), track)
+                for score, track in _k_best(graph, query_node, k)]
 
-    # Messages in forward phase
-    for (v, u) in forward_path:  # Edge direction: u -> v
-        msg = u.mpa(v)
-        graph[u][v]['object'].set_message(u, v, msg)
-
-    # Messages in backward phase
-    for (u, v) in backward_path:  # Edge direction: u -> v
-        msg = u.mpa(v)
-        graph[u][v]['object'].set_message(u, v, msg)
-
-    # Maximum argument for query node
-    track[query_node] = query_node.argmax()
-
-    # Back-tracking
-    for (u, v) in backward_path:  # Edge direction: u -> v
-        if v.type == nodes.NodeType.factor_node:
-            for k in v.record[u].keys():  # Iterate over outgoing edges
-                track[k] = v.record[u][k]
+    backward_path = _tree_schedule(graph, query_node, 'mpa')
+    track = _backtrack(query_node, backward_path)
 
     # Return maximum probability for query node and setting of variable
     return query_node.maximum(), track
 
 
-def max_sum(graph, query_node=None):
+def max_sum(graph, query_node=None, k=None):
     """Max-sum algorithm.
 
     Compute setting of variable for maximum probability on graphs
     that are tree structured.
     Return the setting of all query_nodes.
 
-    """
-    track = {}  # Setting of variables
+    Args:
+        graph: A tree structured factor graph.
+        query_node: Root node of the sweep. In the case of None, a random
+            variable node is picked.
+        k: Optional number of best settings (k-best decoding). In this case,
+            a list of up to k tuples with the (unnormalized) log-probability
+            and the setting of all variables is returned in descending order.
 
+    """
     if query_node is None:  # pick random node
         query_node = choice(graph.get_vnodes())
 
-    # Depth First Search to determine edges
-    dfs = nx.dfs_edges(graph, query_node)
+    if k is not None:
+        return _k_best(graph, query_node, k)
+
+    backward_path = _tree_schedule(graph, query_node, 'msa', logarithmic=True)
+    track = _backtrack(query_node, backward_path)
+
+    # Return maximum probability for query node and setting of variable
+    return query_node.maximum(), track
+
+
+def _backtrack(query_node, backward_path):
+    """Return the maximizing setting of all variables.
+
+    The setting of the query node is its maximum argument. The setting of
+    all other variables is looked up in the recorded tables of the factor
+    nodes along the backward phase.
+
+    """
+    track = {query_node: query_node.argmax()}
+    for (u, v) in backward_path:  # Edge direction: u -> v
+        if v.type == nodes.NodeType.factor_node:
+            track.update(v.backtrack(u, track[u]))
+    return track
+
+
+def _k_best(graph, query_node, k):
+    """K-best decoding on tree structured graphs.
+
+    The k best (log-)scores per state are passed towards the query node. Each
+    node keeps the tables, from which a combined list was selected, so that
+    all k settings are recovered by back-tracking.
+    Return a list of up to k tuples with the log-probability and the setting
+    of all variables in descending order.
+
+    """
+    if k < 1:
+        raise ValueError('Number of settings must be positive.')
+
+    msgs = {}  # k-best lists per edge
+    tables = {}  # Back-tracking tables and child nodes per node
+    for (v, u) in reversed(graph.schedule(query_node)):  # Edge: u -> v
+        if u.type == nodes.NodeType.variable_node:
+            children = [n for n in u.neighbors() if n is not v]
+            msgs[(u, v)], ptr = _k_best_variable(
+                u, [msgs[(n, u)] for n in children], k)
+        else:
+            if not isinstance(u.factor, rv.Discrete) or u.factor.batched:
+                raise rv.ParameterException('Factor is not discrete.')
+            children = list(u.neighbors(v))
+            msgs[(u, v)], ptr = _k_best_factor(
+                u.factor, v, children, [msgs[(n, u)] for n in children], k)
+        tables[u] = (children, ptr)
+
+    # Combination of all incoming lists of the query node
+    children = list(query_node.neighbors())
+    scores, ptr = _k_best_variable(
+        query_node, [msgs[(n, query_node)] for n in children], k)
+    tables[query_node] = (children, ptr)
+    best, index = _top_k(scores.ravel(), k)
+
+    results = []
+    for score, flat in zip(best, index):
+        if score == -np.inf:
+            break
+        state, rank = divmod(int(flat), k)
+
+        # Back-tracking with the state of a node (of the parent node for
+        # factor nodes) and the rank in the list of the node
+        track = {}
+        stack = [(query_node, state, rank)]
+        while stack:
+            u, state, rank = stack.pop()
+            children, ptr = tables[u]
+            if u.type == nodes.NodeType.variable_node:
+                track[u] = state
+                for n, p in zip(reversed(children), reversed(ptr)):
+                    rank, r = divmod(int(p[state, rank]), k)
+                    stack.append((n, state, r))
+            else:
+                setting = {}
+                for j in reversed(range(len(children))):
+                    p, shape = ptr[j]
+                    index = (state,) + tuple(
+                        setting[n] for n in children[j + 1:]) + (rank,)
+                    index = tuple(i if size > 1 else 0  # Broadcast axes
+                                  for i, size in zip(index, p.shape))
+                    s, rank, r = np.unravel_index(p[index], shape)
+                    setting[children[j]] = int(s)
+                    stack.append((children[j], int(s), int(r)))
+        results.append((float(score), track))
+
+    return results
+
+
+def _top_k(scores, k):
+    """Return the k largest scores along the last axis and their indices.
+
+    Missing entries are padded with minus infinity.
+
+    """
+    index = np.argsort(-scores, axis=-1, kind='stable')[..., :k]
+    top = np.take_along_axis(scores, index, axis=-1)
+    pad = [(0, 0)] * (top.ndim - 1) + [(0, k - top.shape[-1])]
+    return (np.pad(top, pad, constant_values=-np.inf),
+            np.pad(index, pad))
+
+
+def _k_best_variable(vnode, msgs, k):
+    """Return the k-best list of a variable node.
+
+    The logarithm of the initial message is combined with the incoming
+    k-best lists one after the other. For each combination, a table with the
+    flat index into (previous rank, incoming rank) is returned.
+    Observed variables only pass their initial message, so that the incoming
+    variables are set to their best setting per state.
+
+    """
+    with np.errstate(divide='ignore'):
+        init = np.log(vnode.init.pmf)
+    K = max([init.shape[0]] + [m.shape[0] for m in msgs])
+    scores = np.full((K, k), -np.inf)
+    scores[:, 0] = init
+
+    if vnode.observed:
+        return scores, [np.zeros((K, k), dtype=int) for _ in msgs]
+
+    ptr = []
+    for m in msgs:
+        scores, p = _top_k((scores[:, :, None] + m[:, None, :]).reshape(K, -1),
+                           k)
+        ptr.append(p)
+    return scores, ptr
+
+
+def _k_best_factor(factor, tnode, children, msgs, k):
+    """Return the k-best list of a factor node for a target node.
+
+    The logarithm of the factor is combined with the incoming k-best lists
+    of the child nodes one after the other and the incoming variable is
+    maximized out. For each combination, a table with the flat index into
+    (state of the incoming variable, previous rank, incoming rank) and its
+    shape are returned.
+
+    """
+    with np.errstate(divide='ignore'):
+        scores = np.log(factor.pmf)
+    axes = [factor.dim.index(n) for n in [tnode] + children]
+    scores = np.transpose(scores, axes)[..., None]
+
+    ptr = []
+    for m in msgs:
+        m = m.reshape((1, m.shape[0]) + (1,) * (scores.ndim - 2) + (k,))
+        scores = np.moveaxis(scores[..., None] + m, 1, -3)
+        shape = scores.shape[-3:]
+        scores, p = _top_k(scores.reshape(scores.shape[:-3] + (-1,)), k)
+        ptr.append((p, shape))
+    if not msgs:
+        scores = _top_k(scores, k)[0]
+    return scores, ptr
+
+
+def _tree_schedule(graph, query_node, method, logarithmic=False):
+    """Two-pass schedule for tree structured graphs.
+
+    Messages are passed towards the query node (forward phase) and away from
+    the query node (backward phase) along the cached schedule of the graph.
+    Return the edges of the backward phase.
 
-    # Convert tuple to reversed list
-    backward_path = list(dfs)
-    forward_path = reversed(backward_path)
+    """
+    backward_path = graph.schedule(query_node)
 
     # Messages in forward phase
-    for (v, u) in forward_path:  # Edge direction: u -> v
-        msg = u.msa(v)
-        graph[u][v]['object'].set_message(u, v, msg, logarithmic=True)
+    for (v, u) in reversed(backward_path):  # Edge direction: u -> v
+        msg = getattr(u, method)(v)
+        graph[u][v]['object'].set_message(u, v, msg, logarithmic)
 
     # Messages in backward phase
     for (u, v) in backward_path:  # Edge direction: u -> v
-        msg = u.msa(v)
-        graph[u][v]['object'].set_message(u, v, msg, logarithmic=True)
+        msg = getattr(u, method)(v)
+        graph[u][v]['object'].set_message(u, v, msg, logarithmic)
 
-    # Maximum argument for query node
-    track[query_node] = query_node.argmax()
+    graph.mark_swept(method, query_node)
+    return backward_path
 
-    # Back-tracking
-    for (u, v) in backward_path:  # Edge direction: u -> v
-        if v.type == nodes.NodeType.factor_node:
-            for k in v.record[u].keys():  # Iterate over outgoing edges
-                track[k] = v.record[u][k]
 
-    # Return maximum probability for query node and setting of variable
-    return query_node.maximum(), track
+def _incremental_schedule(graph, query_node, method, logarithmic=False):
+    """Incremental schedule for tree structured graphs.
+
+    Messages towards the query node are only recomputed, if they depend on
+    changed local evidence since they were computed last. All other messages
+    are reused from the edges.
+
+    """
+    for (u, v) in graph.stale(query_node):  # Edge direction: u -> v
+        msg = getattr(u, method)(v)
+        graph[u][v]['object'].set_message(u, v, msg, logarithmic)
+        graph.stamp(u, v)
+
+
+def elimination_plan(graph, query_node, evidence=None,
+                     heuristic='min_weight'):
+    """Plan of variable elimination.
+
+    Prepare the elimination of all variables except the query node without
+    performing it. The factors (and initial messages) are reduced by the
+    evidence, factors not connected to the query node are pruned and barren
+    variables, i.e. variables of a single factor besides the query node, are
+    summed out. Factors, which are constant afterwards (e.g. conditional
+    distributions of barren variables), are pruned as well.
+
+    Args:
+        graph: A factor graph with discrete factors.
+        query_node: A variable node.
+        evidence: Optional dictionary with the observed state (index) of
+            variable nodes.
+        heuristic: Name of the heuristic for the elimination order (see
+            elimination.elimination_order).
+
+    Returns:
+        An elimination plan with the estimated peak factor size.
+
+    Raises:
+        ParameterException: An error occurred for a factor, which is not
+            discrete.
 
+    """
+    evidence = evidence or {}
+    card = elimination.cardinalities(graph)
+
+    # Factors and initial messages reduced by the evidence
+    dists = []
+    for f in graph.get_fnodes():
+        if not isinstance(f.factor, rv.Discrete):
+            raise rv.ParameterException('Factor is not discrete.')
+        dists.append(f.factor)
+    dists += [v.init for v in graph.get_vnodes()
+              if isinstance(v.init, rv.Discrete)]
+    if query_node in evidence:
+        dists.append(rv.Discrete(np.eye(card[query_node])[
+            evidence[query_node]], query_node))
+    evidence = {v: s for v, s in evidence.items() if v is not query_node}
+    factors = [d for d in (_reduce(d, evidence) for d in dists)
+               if not _constant(d)]
+
+    # Factors connected to the query node
+    containing = {}
+    for i, d in enumerate(factors):
+        for v in d.dim:
+            containing.setdefault(v, []).append(i)
+    reached, stack = set(), [query_node]
+    while stack:
+        for i in containing.pop(stack.pop(), ()):
+            if i not in reached:
+                reached.add(i)
+                stack.extend(v for v in factors[i].dim if v in containing)
+    factors = [factors[i] for i in sorted(reached)]
+
+    # Barren variables
+    barren = True
+    while barren:
+        count = Counter(v for d in factors for v in d.dim)
+        barren = [v for v, c in count.items()
+                  if c == 1 and v is not query_node]
+        for i, d in enumerate(factors):
+            leaves = [v for v in d.dim if v in barren]
+            if leaves:
+                d = d.marginalize(*leaves, normalize=False)
+                factors[i] = None if _constant(d) else d
+        factors = [d for d in factors if d is not None]
+
+    # Elimination order and peak factor size
+    g = nx.Graph()
+    g.add_node(query_node)
+    for d in factors:
+        g.add_nodes_from(d.dim)
+        g.add_edges_from(itertools.combinations(d.dim, 2))
+    order, _ = elimination.elimination_order(g, heuristic, card,
+                                             keep=(query_node,))
+
+    size = card[query_node]
+    scopes = [set(d.dim) for d in factors]
+    for v in order:
+        scope = set().union(*(s for s in scopes if v in s))
+        size = max(size, _size(scope, card))
+        scopes = [s for s in scopes if v not in s] + [scope - {v}]
+
+    return EliminationPlan(order, factors, size)
+
+
+def variable_elimination(graph, query_node, evidence=None,
+                         heuristic='min_weight', plan=None):
+    """Variable elimination algorithm.
+
+    Perform exact inference for a single query node on arbitrary structured
+    graphs with discrete random variables. The variables are summed out in
+    the order of the elimination plan and the intermediate factors are
+    normalized to avoid numerical underflow.
+    Return the belief of the query node.
+
+    Args:
+        graph: A factor graph with discrete factors.
+        query_node: A variable node.
+        evidence: Optional dictionary with the observed state (index) of
+            variable nodes.
+        heuristic: Name of the heuristic for the elimination order (see
+            elimination.elimination_order).
+        plan: Optional elimination plan of the query, e.g. to check the
+            estimated peak factor size before the elimination. In this case,
+            the evidence and the heuristic are ignored.
+
+    """
+    if plan is None:
+        plan = elimination_plan(graph, query_node, evidence, heuristic)
 
-def loopy_belief_propagation(model, iterations, query_node=(), order=None):
+    factors = list(plan.factors)
+    for v in plan.order:
+        joined = [d for d in factors if v in d.dim]
+        factors = [d for d in factors if v not in d.dim]
+        dims = tuple(u for u in dict.fromkeys(
+            itertools.chain.from_iterable(d.dim for d in joined))
+            if u is not v)
+        if joined and dims:
+            factors.append(rv.Discrete.contract(joined[0], *joined[1:],
+                                                dims=dims).normalize())
+
+    if not factors:
+        card = elimination.cardinalities(graph)[query_node]
+        return rv.Discrete(np.ones(card), query_node).normalize()
+    return rv.Discrete.contract(factors[0], *factors[1:],
+                                dims=(query_node,)).normalize()
+
+
+def _reduce(factor, evidence):
+    """Return a discrete factor reduced by the observed states."""
+    if not any(v in evidence for v in factor.dim):
+        return factor
+    shape = factor.shape[1:] if factor.batched else factor.shape
+    index = [slice(None)] * factor.batched + [
+        (evidence[v] if k > 1 else 0) if v in evidence else slice(None)
+        for v, k in zip(factor.dim, shape)]
+    return rv.Discrete(factor.pmf[tuple(index)],
+                       *[v for v in factor.dim if v not in evidence],
+                       batched=factor.batched)
+
+
+def _constant(factor):
+    """Return if a discrete factor is constant (per batch entry)."""
+    pmf = factor.pmf.reshape(factor.batch_size or 1, -1)
+    return np.allclose(pmf, pmf[:, :1], rtol=1e-12, atol=0)
+
+
+def _size(scope, card):
+    """Return the number of entries of a factor over the scope."""
+    size = 1
+    for v in scope:
+        size *= card[v]
+    return size
+
+
+def loopy_belief_propagation(model, iterations, query_node=(), order=None,
+                             tolerance=None, damping=0., synchronous=False,
+                             processes=1):
     """Loopy belief propagation.
 
     Perform approximative inference on arbitrary structured graphs.
     Return the belief of all query_nodes.
 
+    All messages are initialized with unit elements. In each iteration,
+    the nodes are visited in the given order and send (normalized) messages
+    to all their neighbors. Message passing stops early, if the maximum
+    change of all messages within an iteration is below the tolerance.
+    Damping replaces each message by a convex combination of the new and the
+    previous message, which suppresses oscillations.
+
+    Args:
+        model: A factor graph.
+        iterations: Maximum number of iterations.
+        query_node: Variable nodes, whose beliefs are recorded after each
+            iteration.
+        order: Optional order of nodes. In the case of None, all factor nodes
+            are visited before all variable nodes. The synchronous schedule
+            does not accept an order.
+        tolerance: Optional tolerance for the maximum change of all messages.
+            In the case of None, all iterations are performed.
+        damping: Weight of the previous message between 0 (no damping) and 1.
+        synchronous: Boolean flag if all messages of an iteration should be
+            computed from the messages of the previous iteration (instead of
+            the given order).
+        processes: Number of worker processes for the synchronous schedule.
+            More than one process implies the synchronous schedule and
+            requires discrete messages. In the case of None, the number of
+            CPUs is used.
+
+    Returns:
+        A tuple with a dictionary of the beliefs of the query nodes for each
+        iteration and a convergence report.
+
+    Raises:
+        ValueError: An error occurred for a damping outside of [0, 1) or for
+            an order with the synchronous schedule.
+        ParameterException: An error occurred for worker processes with
+            messages, which are not discrete.
+
     """
+    messages.check_damping(damping)
+    if synchronous or processes != 1:
+        if order is not None:
+            raise ValueError('The synchronous schedule has no node order.')
+        return _synchronous_schedule(model, 'spa', iterations, query_node,
+                                     tolerance, damping, processes)
+
     if order is None:
-        fn = [n for (n, attr) in model.nodes(data=True)
-              if attr["type"] == "fn"]
-        vn = [n for (n, attr) in model.nodes(data=True)
-              if attr["type"] == "vn"]
-        order = fn + vn
-    return _schedule(model, 'spa', iterations, query_node, order)
+        order = model.get_fnodes() + model.get_vnodes()
+    return _schedule(model, 'spa', iterations, query_node, order,
+                     tolerance, damping)
 
 
-def mean_field(model, iterations, query_node=(), order=None):
+def mean_field(model, iterations, query_node=(), order=None, tolerance=None,
+               parallel=False, damping=0.):
     """Mean-field algorithm.
 
-    Perform approximative inference on arbitrary structured graphs.
+    Perform approximative inference on arbitrary structured graphs with
+    discrete factors by coordinate ascent of a fully factorized variational
+    distribution. Variables send their variational distributions to the
+    factors and factors send the exponential of their expected logarithms
+    to the variables. The evidence lower bound (ELBO) is tracked after each
+    iteration and does not decrease for the sequential updates.
     Return the belief of all query_nodes.
 
+    Args:
+        model: A factor graph with discrete factors.
+        iterations: Maximum number of iterations.
+        query_node: Variable nodes, whose variational distributions are
+            recorded after each iteration.
+        order: Order of the variable nodes for sequential updates. In the
+            case of None, all variable nodes of the graph are updated.
+        tolerance: Optional tolerance for the change of the ELBO. In the case
+            of None, all iterations are performed.
+        parallel: Boolean flag if all variables should be updated at once
+            from the distributions of the previous iteration.
+        damping: Weight of the previous distribution between 0 (no damping)
+            and 1 (exclusive) for parallel updates.
+
+    Returns:
+        A tuple with a dictionary of the beliefs of the query nodes for each
+        iteration and a mean-field report.
+
+    Raises:
+        ValueError: An error occurred for a damping outside of [0, 1) or an
+            order with other nodes than variable nodes.
+
     """
+    messages.check_damping(damping)
+    vnodes = model.get_vnodes()
     if order is None:
-        fn = [n for (n, attr) in model.nodes(data=True)
-              if attr["type"] == "fn"]
-        vn = [n for (n, attr) in model.nodes(data=True)
-              if attr["type"] == "vn"]
-        order = fn + vn
-    return _schedule(model, 'mf', iterations, query_node, order)
+        order = vnodes
+    elif any(n.type != nodes.NodeType.variable_node for n in order):
+        raise ValueError('Order must only contain variable nodes.')
+
+    # Uniform variational distributions
+    messages.initialize(model)
+    card = elimination.cardinalities(model)
+    for v in vnodes:
+        q = v.init if v.observed \
+            else (rv.Discrete(np.ones(card[v]), v) * v.init).normalize()
+        _send(model, v, q)
+
+    b = {n: [] for n in query_node}
+    elbo = []
+    residual = np.inf
+    converged = False
+    i = 0
+    for i in range(1, iterations + 1):
+        if parallel:
+            for f in model.get_fnodes():
+                for v in f.neighbors():
+                    model[f][v]['object'].set_message(f, v, f.mf(v))
+            for v in vnodes:
+                q = v.mf()
+                if damping:
+                    old = next(iter(
+                        model[v][f]['object'].get_message(v, f)
+                        for f in v.neighbors()), q)
+                    q = messages.damp(old, q, damping)
+                _send(model, v, q)
+        else:
+            for v in order:
+                for f in v.neighbors():
+                    model[f][v]['object'].set_message(f, v, f.mf(v))
+                _send(model, v, v.mf())
+
+        elbo.append(_elbo(model))
+        if i > 1:
+            residual = float(np.max(np.abs(elbo[-1] - elbo[-2])))
+
+        # Beliefs of query nodes
+        for n in query_node:
+            b[n].append(n.mf())
+
+        if tolerance is not None and residual < tolerance:
+            converged = True
+            break
+
+    return b, MeanFieldReport(i, residual, converged, elbo)
 
 
-def _schedule(model, method, iterations, query_node, order):
+def _send(model, vnode, msg):
+    """Set the message of a variable node to all neighboring factors."""
+    for f in vnode.neighbors():
+        model[vnode][f]['object'].set_message(vnode, f, msg)
+
+
+def _elbo(model):
+    """Return the evidence lower bound of the mean-field distributions.
+
+    The bound is the sum of the expected logarithms of all factors and
+    initial messages plus the entropies of all variational distributions.
+
+    """
+    q = {v: v.mf() for v in model.get_vnodes()}
+    elbo = 0.
+    for f in model.get_fnodes():
+        elbo = elbo + rv.Discrete.contract(
+            nodes._log(f.factor), *[q[v] for v in f.neighbors()]).pmf
+    for v, qv in q.items():
+        log_q = nodes._log(qv)
+        elbo = elbo + rv.Discrete.contract(nodes._log(v.init), qv).pmf \
+            - rv.Discrete.contract(log_q, qv).pmf
+    return elbo
+
+
+def residual_belief_propagation(graph, query_node=(), tolerance=1e-6,
+                                max_updates=None):
+    """Residual belief propagation.
+
+    Perform approximative inference on arbitrary structured graphs.
+    Return the belief of all query_nodes.
+
+    Instead of flooding all messages in a fixed order, pending message updates
+    are kept in a priority queue keyed by their residual, i.e. the maximum
+    absolute difference between the pending and the current (normalized)
+    message. The update with the largest residual is applied first and only
+    the messages depending on it are recomputed. Converged regions of the
+    graph are not visited again.
+
+    Args:
+        graph: A factor graph.
+        query_node: Variable nodes, whose beliefs are returned.
+        tolerance: Message passing stops, if the largest residual is below
+            the tolerance.
+        max_updates: Optional maximum number of applied message updates.
+
+    Returns:
+        A dictionary with the beliefs of the query nodes.
+
+    """
+    messages.initialize(graph)
+
+    queue = []  # Heap of (negative residual, counter, source, target)
+    pending = {}  # Pending messages and their counter per edge
+    counter = itertools.count()
+
+    def push(u, v, residual=None):
+        msg = u.spa(v).normalize()
+        if residual is None:
+            old = graph[u][v]['object'].get_message(u, v)
+            residual = messages.residual(old, msg)
+        c = next(counter)
+        pending[(u, v)] = (msg, c)
+        heapq.heappush(queue, (-residual, c, u, v))
+
+    # Initial messages are computed without residuals
+    for u in graph.nodes():
+        for v in u.neighbors():
+            push(u, v, np.inf)
+
+    updates = 0
+    while queue and (max_updates is None or updates < max_updates):
+        residual, c, u, v = heapq.heappop(queue)
+        if pending.get((u, v), (None, None))[1] != c:
+            continue  # Outdated entry
+        if -residual < tolerance:
+            break
+
+        # Apply message update
+        msg, _ = pending.pop((u, v))
+        graph[u][v]['object'].set_message(u, v, msg)
+        updates += 1
+
+        # Recompute dependent messages
+        for w in v.neighbors(u):
+            push(v, w)
+
+    return {n: n.belief() for n in query_node}
+
+
+def _schedule(model, method, iterations, query_node, order, tolerance=None,
+              damping=0.):
     """Flooding schedule.
 
     A flooding scheduler for factor graphs with cycles.
     A given number of iterations is performed in a defined node order.
-    Return the belief of all query_nodes.
+    Return the belief of all query_nodes and a convergence report.
 
     """
     b = {n: [] for n in query_node}
+    messages.initialize(model)
 
     # Iterative message passing
-    for _ in range(iterations):
+    residual = np.inf
+    converged = False
+    i = 0
+    for i in range(1, iterations + 1):
+        residual = 0.
 
         # Visit nodes in predefined order
         for n in order:
-            for neighbor in nx.all_neighbors(model, n):
-                msg = getattr(n, method)(model, neighbor)
-                model[n][neighbor]['object'].set_message(n, neighbor, msg)
+            for neighbor in n.neighbors():
+                edge = model[n][neighbor]['object']
+                old = edge.get_message(n, neighbor)
+                msg = getattr(n, method)(neighbor).normalize()
+                if damping and i > 1:
+                    msg = messages.damp(old, msg, damping)
+                residual = max(residual, messages.residual(old, msg))
+                edge.set_message(n, neighbor, msg)
 
         # Beliefs of query nodes
         for n in query_node:
-            b[n].append(n.belief(model))
+            b[n].append(n.belief())
+
+        # Messages of the first iteration are compared with unit elements
+        if tolerance is not None and i > 1 and residual < tolerance:
+            converged = True
+            break
+
+    return b, ConvergenceReport(i, residual, converged)
+
+
+def _synchronous_schedule(model, method, iterations, query_node, tolerance,
+                          damping, processes):
+    """Synchronous flooding schedule.
+
+    All messages of an iteration are computed from the messages of the
+    previous iteration (double buffering), so that the node updates of an
+    iteration are independent of each other. For more than one process, the
+    node updates are spread across a process pool, which exchanges messages
+    through two shared-memory buffers. The first iteration is performed in
+    the main process to determine the shapes of all messages.
+    Return the belief of all query_nodes and a convergence report.
+
+    """
+    b = {n: [] for n in query_node}
+    messages.initialize(model)
+    edges = [(u, v) for u in model.nodes() for v in u.neighbors()]
+
+    residual = np.inf
+    converged = False
+    pool = None
+    i = 0
+    try:
+        for i in range(1, iterations + 1):
+            if pool is None:
+                residual = _synchronous_step(model, method, edges,
+                                             damping if i > 1 else 0.)
+                if processes != 1:
+                    pool = _MessagePool(model, method, edges, processes)
+                    pool.store(0)
+            else:
+                residual = pool.step(i, damping)
+                for n in query_node:
+                    pool.load(i, n)
+
+            # Beliefs of query nodes
+            for n in query_node:
+                b[n].append(n.belief())
+
+            # Messages of the first iteration are compared with unit elements
+            if tolerance is not None and i > 1 and residual < tolerance:
+                converged = True
+                break
+
+        if pool is not None:
+            pool.load(i)
+    finally:
+        if pool is not None:
+            pool.close()
+
+    return b, ConvergenceReport(i, residual, converged)
+
+
+def _synchronous_step(model, method, edges, damping):
+    """Compute all messages from the previous messages and swap them."""
+    old = [model[u][v]['object'].get_message(u, v) for (u, v) in edges]
+    new = [getattr(u, method)(v).normalize() for (u, v) in edges]
+    return messages.swap(model, edges, old, new, damping)
+
+
+class _MessagePool:
+
+    """Process pool for synchronous message passing.
+
+    Messages are exchanged through two shared-memory buffers. In each
+    iteration, the workers read the messages of the previous iteration from
+    one buffer and write the new messages to the other one. Each worker holds
+    a copy of the factor graph, which is transferred once at start-up.
+
+    """
+
+    def __init__(self, model, method, edges, processes):
+        """Create the shared-memory buffers and start the workers."""
+        from multiprocessing import Pool, RawArray
+
+        self.model = model
+        self.edges = edges
+        self.nodes = list(model.nodes())
+        index = {n: k for k, n in enumerate(self.nodes)}
+
+        # Layout of the messages in the buffers
+        self.specs = []
+        offset = 0
+        for (u, v) in edges:
+            msg = model[u][v]['object'].get_message(u, v)
+            if not isinstance(msg, rv.Discrete):
+                raise rv.ParameterException(
+                    'Worker processes require discrete messages.')
+            log = isinstance(msg, rv.LogDiscrete)
+            shape = _message_shape(model[u][v]['object'].variable, msg)
+            self.specs.append((index[u], index[v], offset, shape, log,
+                               tuple(index[d] for d in msg.dim),
+                               len(shape) > 1, msg.dtype))
+            offset += int(np.prod(shape))
+
+        self.buffers = [RawArray('d', max(offset, 1)) for _ in range(2)]
+
+        # Incoming and outgoing edges per node
+        incoming = {k: [] for k in range(len(self.nodes))}
+        outgoing = {k: [] for k in range(len(self.nodes))}
+        for e, spec in enumerate(self.specs):
+            outgoing[spec[0]].append(e)
+            incoming[spec[1]].append(e)
+        self.incoming = {n: incoming[index[n]] for n in self.nodes}
+
+        # Nodes are split into chunks of similar numbers of messages
+        processes = processes or os.cpu_count() or 1
+        order = sorted(outgoing, key=lambda k: len(outgoing[k]))
+        n = min(4 * processes, len(order))
+        self.chunks = [[(k, incoming[k], outgoing[k]) for k in order[c::n]]
+                       for c in range(n)]
+
+        self.pool = Pool(processes, _init_worker,
+                         (model, method, self.specs, self.buffers))
+
+    def store(self, buffer):
+        """Store the messages of the main process in a buffer."""
+        values = _buffer(self.buffers[buffer])
+        for (u, v), spec in zip(self.edges, self.specs):
+            msg = self.model[u][v]['object'].get_message(u, v)
+            _, _, offset, shape, log, _, _, _ = spec
+            data = msg.log_pmf if log else msg.pmf
+            values[offset:offset + int(np.prod(shape))] = np.ravel(
+                np.broadcast_to(data, shape))
+
+    def step(self, iteration, damping):
+        """Perform one iteration and return the maximum residual."""
+        read = iteration % 2
+        residuals = self.pool.map(
+            _worker_task, [(c, read, damping) for c in self.chunks])
+        return max(residuals, default=0.)
+
+    def load(self, iteration, node=None):
+        """Load the messages of an iteration into the main process.
+
+        Args:
+            iteration: Iteration, whose messages are loaded.
+            node: Optional target node of the loaded messages. In the case of
+                None, all messages are loaded.
+
+        """
+        values = _buffer(self.buffers[1 - iteration % 2])
+        edges = range(len(self.edges)) if node is None \
+            else self.incoming[node]
+        for e in edges:
+            _load(self.model, self.nodes, self.specs[e], values)
+
+    def close(self):
+        """Stop the workers."""
+        self.pool.terminate()
+        self.pool.join()
+
+
+def _message_shape(variable, msg):
+    """Return the shape of all messages over a variable.
+
+    Messages of the first iterations may still be unit elements or unbatched,
+    so the shape is broadcast with the initial message of the variable and
+    with the shapes of all adjacent discrete factors along the variable.
+
+    """
+    shapes = [np.shape(msg.pmf), np.shape(variable.init.pmf)]
+    for f in variable.neighbors():
+        factor = f.factor
+        if isinstance(factor, rv.Discrete) and variable in factor.dim:
+            axis = factor.batched + factor.dim.index(variable)
+            shapes.append(factor.shape[:factor.batched] +
+                          factor.shape[axis:axis + 1])
+    return np.broadcast_shapes(*shapes)
+
+
+def _buffer(array):
+    """Return a Numpy view of a shared-memory buffer."""
+    return np.frombuffer(array, dtype=np.float64)
+
+
+def _load(model, nodes_, spec, values):
+    """Set the message of an edge from a buffer."""
+    u, v, offset, shape, log, dim, batched, dtype = spec
+    data = values[offset:offset + int(np.prod(shape))].reshape(shape)
+    dim = tuple(nodes_[k] for k in dim)
+    if log:
+        msg = rv.LogDiscrete(data.copy(), *dim, batched=batched, dtype=dtype)
+    else:
+        msg = rv.Discrete(data.copy(), *dim, batched=batched, dtype=dtype)
+    model[nodes_[u]][nodes_[v]]['object'].set_message(nodes_[u], nodes_[v],
+                                                      msg)
+    return msg
+
+
+_worker = {}  # State of a worker process
+
+
+def _init_worker(model, method, specs, buffers):
+    """Initialize a worker process with a copy of the factor graph."""
+    _worker.update(model=model, method=method, specs=specs,
+                   nodes=list(model.nodes()),
+                   buffers=[_buffer(b) for b in buffers])
+
+
+def _worker_task(args):
+    """Compute the outgoing messages of a chunk of nodes.
+
+    The incoming messages are read from one buffer and the new messages are
+    written to the other buffer. Return the maximum residual of the chunk.
+
+    """
+    chunk, read, damping = args
+    model, specs, nodes_ = _worker['model'], _worker['specs'], \
+        _worker['nodes']
+    src, dst = _worker['buffers'][read], _worker['buffers'][1 - read]
+
+    residual = 0.
+    for k, incoming, outgoing in chunk:
+        for e in incoming:
+            _load(model, nodes_, specs[e], src)
+
+        n = nodes_[k]
+        for e in outgoing:
+            _, v, offset, shape, log, _, _, _ = specs[e]
+            msg = getattr(n, _worker['method'])(nodes_[v]).normalize()
+            old = _load(model, nodes_, specs[e], src)
+            if damping:
+                msg = messages.damp(old, msg, damping)
+            residual = max(residual, messages.residual(old, msg))
 
-    return b
+            data = msg.log_pmf if log else msg.pmf
+            dst[offset:offset + int(np.prod(shape))] = np.ravel(
+                np.broadcast_to(data, shape))
+    return residual
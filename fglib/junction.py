@@ -0,0 +1,173 @@
+"""Module for junction trees.
+
+This module contains a junction tree engine for exact inference on factor
+graphs with cycles and discrete random variables. The factor graph is
+triangulated by a greedy elimination order, the maximal cliques are connected
+to a clique tree, and the Shafer-Shenoy algorithm is performed on the clique
+potentials.
+
+Classes:
+    JunctionTree: Class for junction trees of factor graphs.
+
+Functions:
+    junction_tree: Exact inference by the junction tree algorithm.
+
+"""
+
+import networkx as nx
+
+from . import elimination, rv
+
+
+class JunctionTree:
+
+    """Class for junction trees of factor graphs.
+
+    A junction tree is compiled once for the structure of a factor graph,
+    i.e. the cliques, the clique tree and the assignment of factors to
+    cliques. Calibration computes all messages between cliques for the
+    current factors and initial messages of the factor graph, so that
+    changed evidence does not require a new compilation.
+
+    """
+
+    def __init__(self, graph, heuristic='min_fill'):
+        """Compile the junction tree of a factor graph.
+
+        Args:
+            graph: A factor graph with discrete factors.
+            heuristic: Name of the heuristic for the elimination order (see
+                elimination.elimination_order).
+
+        """
+        self.graph = graph
+        self.order, cliques = elimination.elimination_order(
+            elimination.interaction_graph(graph), heuristic,
+            elimination.cardinalities(graph))
+
+        # Maximal cliques
+        self.cliques = []
+        for c in sorted(cliques, key=len, reverse=True):
+            if not any(set(c) <= set(k) for k in self.cliques):
+                self.cliques.append(c)
+
+        # Clique tree as maximum spanning tree with separator sizes as weights
+        containing = {}
+        for i, c in enumerate(self.cliques):
+            for v in c:
+                containing.setdefault(v, []).append(i)
+        g = nx.Graph()
+        g.add_nodes_from(range(len(self.cliques)))
+        for ids in containing.values():
+            for k, i in enumerate(ids):
+                for j in ids[k + 1:]:
+                    sep = set(self.cliques[i]) & set(self.cliques[j])
+                    g.add_edge(i, j, weight=len(sep))
+        self.tree = nx.maximum_spanning_tree(g)
+        for i, j in self.tree.edges():
+            self.tree[i][j]['separator'] = tuple(
+                v for v in self.cliques[i] if v in self.cliques[j])
+
+        # Assignment of factors and variables to the smallest clique
+        def smallest(scope):
+            ids = [i for i in containing[scope[0]]
+                   if set(scope) <= set(self.cliques[i])]
+            return min(ids, key=lambda i: len(self.cliques[i]))
+
+        self.scopes = {f: tuple(f.neighbors()) for f in graph.get_fnodes()}
+        self.assignment = {i: [] for i in range(len(self.cliques))}
+        for f, scope in self.scopes.items():
+            if scope:
+                self.assignment[smallest(scope)].append(f)
+        self.home = {v: smallest((v,)) for v in containing}
+        for v, i in self.home.items():
+            self.assignment[i].append(v)
+
+        self.messages = {}
+
+    def _potential(self, i):
+        """Return the factors and initial messages assigned to a clique."""
+        potential = []
+        for n in self.assignment[i]:
+            if n in self.scopes:
+                potential.append(n.factor)
+            elif isinstance(n.init, rv.Discrete):
+                potential.append(n.init)
+        return potential
+
+    def _contract(self, i, exclusion, dims):
+        """Contract the potential of a clique with incoming messages."""
+        factors = self._potential(i) + [
+            self.messages[(j, i)] for j in self.tree[i] if j != exclusion]
+        if not factors:
+            factors = [rv.Discrete.unity(*dims)]
+        return rv.Discrete.contract(factors[0], *factors[1:], dims=dims)
+
+    def calibrate(self):
+        """Compute all messages between cliques.
+
+        Messages are passed towards a root clique of each connected component
+        and back (Shafer-Shenoy algorithm). Messages are normalized to avoid
+        numerical underflow.
+
+        """
+        self.messages = {}
+        for root in (min(c) for c in nx.connected_components(self.tree)):
+            backward_path = list(nx.dfs_edges(self.tree, root))
+            forward_path = [(j, i) for (i, j) in reversed(backward_path)]
+            for (i, j) in forward_path + backward_path:  # Clique i -> j
+                sep = self.tree[i][j]['separator']
+                self.messages[(i, j)] = self._contract(i, j, sep).normalize()
+
+    def belief(self, node):
+        """Return the (normalized) belief of a variable node.
+
+        The potential of the smallest clique containing the variable node is
+        contracted with all incoming messages of the clique.
+
+        Args:
+            node: A variable node of the factor graph.
+
+        """
+        return self._contract(self.home[node], None, (node,)).normalize()
+
+    def clique_belief(self, i):
+        """Return the (normalized) belief of a clique.
+
+        Args:
+            i: Index of the clique.
+
+        """
+        return self._contract(i, None, self.cliques[i]).normalize()
+
+    def is_compiled_for(self, graph):
+        """Return if the junction tree matches the scopes of a factor graph."""
+        return graph is self.graph and all(
+            tuple(f.neighbors()) == scope for f, scope in self.scopes.items())
+
+
+def junction_tree(graph, query_node=None, heuristic='min_fill'):
+    """Junction tree algorithm.
+
+    Compute exact marginal distributions on arbitrary structured graphs with
+    discrete random variables. The compiled junction tree is cached for the
+    factor graph until the graph is modified.
+    Return the belief of the query node.
+
+    Args:
+        graph: A factor graph with discrete factors.
+        query_node: Optional variable node. In the case of None, a dictionary
+            with the beliefs of all variable nodes is returned.
+        heuristic: Name of the heuristic for the elimination order (see
+            elimination.elimination_order).
+
+    """
+    jt = graph.compiled(('junction_tree', heuristic),
+                        lambda g: JunctionTree(g, heuristic),
+                        lambda jt: jt.is_compiled_for(graph))
+
+    jt.calibrate()
+
+    if query_node is not None:
+        return jt.belief(query_node)
+    return {n: jt.belief(n) for n in graph.get_vnodes()}
@@ -0,0 +1,151 @@
+"""Module for message-passing helpers.
+
+This module contains helper functions, which are shared by the inference
+engines on factor graphs (inference, aio) and on flat arrays (pairwise,
+gabp), so that all engines handle their arguments and messages in the same
+way.
+
+Functions:
+    check_damping: Validate the damping of iterative message passing.
+    initialize: Initialize all messages of a factor graph.
+    damp: Damp a new message with a previous message.
+    residual: Maximum absolute difference of two messages.
+    swap: Set new messages of edges and return the residual.
+    beliefs: Beliefs after a sweep of belief propagation.
+
+"""
+
+import numpy as np
+
+from . import nodes, rv
+
+
+def check_damping(damping):
+    """Validate the damping of iterative message passing.
+
+    Args:
+        damping: Weight of the previous message between 0 (no damping) and 1
+            (exclusive).
+
+    Raises:
+        ValueError: An error occurred for a damping outside of [0, 1).
+
+    """
+    if not 0 <= damping < 1:
+        raise ValueError('Damping must be in the interval [0, 1).')
+
+
+def initialize(graph):
+    """Initialize all messages of a factor graph with unit elements.
+
+    The messages of previous sweeps are overwritten, so that the graph is
+    marked as not swept.
+
+    Args:
+        graph: A factor graph.
+
+    """
+    for (u, v, edge) in graph.edges(data='object'):
+        unity = edge.variable.init.unity(edge.variable)
+        edge.set_message(u, v, unity)
+        edge.set_message(v, u, unity)
+    graph.mark_swept(None)  # Messages of previous sweeps are stale
+
+
+def damp(old, new, damping):
+    """Return the convex combination of a new and a previous message.
+
+    Args:
+        old: Previous message.
+        new: New message of the same type.
+        damping: Weight of the previous message.
+
+    Returns:
+        A message of the type of the new message.
+
+    """
+    if isinstance(new, rv.LogDiscrete):
+        log_pmf = np.logaddexp(np.log1p(-damping) + new.log_pmf,
+                               np.log(damping) + old.log_pmf)
+        return rv.LogDiscrete(log_pmf, *new.dim, batched=new.batched,
+                              dtype=new.dtype)
+    if isinstance(new, rv.Discrete):
+        pmf = (1 - damping) * new.pmf + damping * old.pmf
+        return rv.Discrete(pmf, *new.dim, batched=new.batched,
+                           dtype=new.dtype)
+
+    W = (1 - damping) * new.precision + damping * old.precision
+    Wm = (1 - damping) * new.precision_mean + damping * old.precision_mean
+    msg = rv.Gaussian.inf_form(W, Wm, *new.dim,
+                               batched=new.batched or old.batched,
+                               dtype=new.dtype)
+    return msg.to_sqrt() if isinstance(new, rv.SqrtGaussian) else msg
+
+
+def residual(old, new):
+    """Return the maximum absolute difference of two messages.
+
+    Discrete messages are compared by their probability mass functions and
+    Gaussian messages by their information form.
+
+    """
+    if isinstance(new, rv.Discrete):
+        diff = new.pmf - old.pmf
+    else:
+        diff = np.concatenate((np.ravel(new.precision - old.precision),
+                               np.ravel(new.precision_mean -
+                                        old.precision_mean)))
+    return float(np.max(np.abs(diff)))
+
+
+def swap(graph, edges, old, new, damping):
+    """Set the new messages of all edges and return the residual.
+
+    Args:
+        graph: A factor graph.
+        edges: List of directed edges (source node, target node).
+        old: List of the previous messages of the edges.
+        new: List of the new messages of the edges.
+        damping: Weight of the previous messages.
+
+    Returns:
+        The maximum absolute change of all messages.
+
+    """
+    if damping:
+        new = [damp(o, m, damping) for (o, m) in zip(old, new)]
+
+    for (u, v), msg in zip(edges, new):
+        graph[u][v]['object'].set_message(u, v, msg)
+
+    return max((residual(o, m) for (o, m) in zip(old, new)), default=0.)
+
+
+def beliefs(query_node, backward_path, all_marginals=False, factors=False):
+    """Return the beliefs after a sweep of belief propagation.
+
+    Args:
+        query_node: Root node of the sweep.
+        backward_path: Edges of the backward phase of the sweep.
+        all_marginals: Boolean flag if the beliefs of all variable nodes
+            should be returned as a dictionary keyed by node.
+        factors: Boolean flag if the beliefs of all factor nodes should be
+            included in the dictionary.
+
+    Returns:
+        The belief of the query node or a dictionary of beliefs.
+
+    """
+    if not (all_marginals or factors):
+        # Return marginal distribution
+        return query_node.belief()
+
+    # Return marginal distributions of all nodes reached by the sweep
+    b = {}
+    for n in (query_node,) + tuple(v for (_, v) in backward_path):
+        if n.type == nodes.NodeType.variable_node:
+            if all_marginals:
+                b[n] = n.belief()
+        elif factors:
+            b[n] = n.belief()
+    return b
@@ -19,6 +19,21 @@ from types import MethodType
 import networkx as nx
 import numpy as np
 
+from . import rv
+
+_TINY = np.finfo(np.float64).tiny
+
+
+def _log(dist):
+    """Return the logarithm of a discrete distribution.
+
+    Zeros are clipped to the smallest normal number, so that expectations of
+    the logarithm remain finite.
+
+    """
+    return rv.Discrete(np.log(np.maximum(dist.pmf, _TINY)), *dist.dim,
+                       batched=dist.batched)
+
 
 class NodeType(Enum):
 
@@ -53,6 +68,11 @@ class Node(ABC):
     def graph(self, graph):
         self.__graph = graph
 
+    def _notify(self):
+        """Notify the factor graph about changed local evidence."""
+        if self.graph is not None:
+            self.graph.notify(self)
+
     def neighbors(self, exclusion=None):
         """Get all neighbors with a given exclusion.
 
@@ -118,6 +138,16 @@ class VNode(Node):
     @init.setter
     def init(self, init):
         self.__init = init
+        self._notify()
+
+    @property
+    def observed(self):
+        return self.__observed
+
+    @observed.setter
+    def observed(self, observed):
+        self.__observed = observed
+        self._notify()
 
     def belief(self, normalize=True):
         """Return belief of the variable node.
@@ -153,14 +183,14 @@ class VNode(Node):
 
         """
         b = self.belief(normalize)
-        return np.amax(b.pmf)
+        return np.amax(b.pmf, axis=tuple(range(b.batched, np.ndim(b.pmf))))
 
     def argmax(self):
         """Return the argument for maximum probability of the variable node."""
         # In case of multiple occurrences of the maximum values,
         # the indices corresponding to the first occurrence are returned.
         b = self.belief()
-        return b.argmax(self)
+        return b.argmax()[0]
 
     def spa(self, tnode):
         """Return message of the sum-product algorithm."""
@@ -194,12 +224,25 @@ class VNode(Node):
 
             return msg
 
-    def mf(self, tnode):
-        """Return message of the mean-field algorithm."""
+    def mf(self, tnode=None):
+        """Return message of the mean-field algorithm.
+
+        The message is the variational distribution of the variable node,
+        i.e. the normalized product of the initial message with all incoming
+        messages. It is the same for all target nodes.
+
+        """
         if self.observed:
             return self.init
         else:
-            return self.belief(self.graph)
+            # Initial message
+            msg = self.init
+
+            # Product over all incoming messages
+            for n in self.neighbors():
+                msg *= self.graph[n][self]['object'].get_message(n, self)
+
+            return msg.normalize()
 
 
 class IOVNode(VNode):
@@ -212,9 +255,9 @@ class IOVNode(VNode):
 
     """
 
-    def __init__(self, label, init=None, observed=False, callback=None):
+    def __init__(self, label, rv_type, observed=False, callback=None):
         """Create an input-output variable node."""
-        super().__init__(label, init, observed)
+        super().__init__(label, rv_type, observed)
         if callback is not None:
             self.set_callback(callback)
 
@@ -257,9 +300,39 @@ class FNode(Node):
     @factor.setter
     def factor(self, factor):
         self.__factor = factor
+        self.__paths = {}  # Contraction paths per target node
+        self._notify()
+
+    def belief(self, normalize=True):
+        """Return belief of the factor node.
+
+        The belief is the product of the local factor with all incoming
+        messages over the variables of the factor.
+
+        Args:
+            normalize: Boolean flag if belief should be normalized.
+
+        """
+        msgs = tuple(self.graph[n][self]['object'].get_message(n, self)
+                     for n in self.neighbors())
+
+        if isinstance(self.factor, rv.Discrete):
+            belief = self.factor.contract(*msgs, dims=self.factor.dim)
+        else:
+            belief = self.factor
+            for msg in msgs:
+                belief *= msg
+
+        if normalize:
+            belief = belief.normalize()
+
+        return belief
 
     def spa(self, tnode):
         """Return message of the sum-product algorithm."""
+        if isinstance(self.factor, rv.Discrete):
+            return self._contract(tnode)
+
         # Initialize with local factor
         msg = self.factor
 
@@ -273,10 +346,27 @@ class FNode(Node):
 
         return msg
 
+    def _contract(self, tnode):
+        """Return message of the sum-product algorithm by contraction.
+
+        The product of the local factor with all incoming messages is summed
+        over all incoming variables by a single Einstein summation.
+        The contraction path is cached for each target node.
+
+        """
+        msgs = tuple(self.graph[n][self]['object'].get_message(n, self)
+                     for n in self.neighbors(tnode))
+
+        key = (tnode,) + tuple((m.dim, m.shape) for m in msgs)
+        path = self.__paths.get(key)
+        if path is None:
+            path = self.factor.contraction_path(*msgs, dims=(tnode,))
+            self.__paths[key] = path
+
+        return self.factor.contract(*msgs, dims=(tnode,), path=path)
+
     def mpa(self, tnode):
         """Return message of the max-product algorithm."""
-        self.record[tnode] = {}
-
         # Initialize with local factor
         msg = self.factor
 
@@ -284,17 +374,10 @@ class FNode(Node):
         for n in self.neighbors(tnode):
             msg *= self.graph[n][self]['object'].get_message(n, self)
 
-        # Maximization over incoming variables
-        for n in self.neighbors(tnode):
-            self.record[tnode][n] = msg.argmax(n)  # Record for back-tracking
-            msg = msg.maximize(n, normalize=False)
-
-        return msg
+        return self._maximize(msg, tnode)
 
     def msa(self, tnode):
         """Return message of the max-sum algorithm."""
-        self.record[tnode] = {}
-
         # Initialize with (logarithmized) local factor
         msg = self.factor.log()
 
@@ -302,27 +385,72 @@ class FNode(Node):
         for n in self.neighbors(tnode):
             msg += self.graph[n][self]['object'].get_message(n, self)
 
-        # Maximization over incoming variables
-        for n in self.neighbors(tnode):
-            self.record[tnode][n] = msg.argmax(n)  # Record for back-tracking
-            msg = msg.maximize(n, normalize=False)
+        return self._maximize(msg, tnode)
+
+    def _maximize(self, msg, tnode):
+        """Return the maximum over all incoming variables.
+
+        The maximum and its argument are computed by a single reduction.
+        For back-tracking, the incoming variables, their numbers of states
+        and the table with the flat index of the maximizing setting per state
+        of the target node are recorded.
 
+        """
+        dims = tuple(d for d in msg.dim if d is not tnode)
+        shape = tuple(msg.shape[a] for a in msg.axes(*dims))
+        msg, table = msg.maximize_argmax(*dims, normalize=False)
+        self.record[tnode] = (dims, shape, table)
         return msg
 
+    def backtrack(self, tnode, state):
+        """Return the setting of the incoming variables for a target state.
+
+        Args:
+            tnode: Target node of a previous max-product or max-sum message.
+            state: State of the target node. For batched factors, an array
+                with one state per batch.
+
+        Returns:
+            A dictionary with the maximizing state of each incoming variable.
+
+        """
+        dims, shape, table = self.record[tnode]
+        if not dims:  # No incoming variables
+            return {}
+        if table.ndim > 1:  # Batched, broadcast against the states
+            index = np.take_along_axis(table, np.reshape(state, (-1, 1)),
+                                       axis=1)[:, 0]
+        else:
+            index = np.take(table, state)
+        return dict(zip(dims, np.unravel_index(index, shape)))
+
     def mf(self, tnode):
-        """Return message of the mean-field algorithm."""
-        # Initialize with local factor
-        msg = self.factor
+        """Return message of the mean-field algorithm.
 
-#         # Product over incoming messages
-#         for n in self.neighbors(graph, self, tnode):
-#             msg *= graph[n][self]['object'].get_message(n, self)
-#
-#         # Integration/Summation over incoming variables
-#         for n in self.neighbors(graph, self, tnode):
-#             msg = msg.int(n)
+        The message is the exponential of the expected logarithm of the
+        local factor under the variational distributions of all other
+        variables, which are the incoming messages. The expectation is
+        computed by a single Einstein summation.
 
-        return msg
+        Raises:
+            ParameterException: An error occurred for a factor, which is not
+                discrete.
+
+        """
+        if not isinstance(self.factor, rv.Discrete):
+            raise rv.ParameterException('Mean-field messages require '
+                                        'discrete factors.')
+
+        msgs = tuple(self.graph[n][self]['object'].get_message(n, self)
+                     for n in self.neighbors(tnode))
+        expected = rv.Discrete.contract(_log(self.factor), *msgs,
+                                        dims=(tnode,))
+
+        # Shift by the maximum (per batch) before exponentiation
+        pmf = expected.pmf
+        axes = tuple(range(expected.batched, pmf.ndim))
+        pmf = np.exp(pmf - np.amax(pmf, axis=axes, keepdims=True))
+        return rv.Discrete(pmf, tnode, batched=expected.batched)
 
 
 class IOFNode(FNode):
@@ -337,7 +465,7 @@ class IOFNode(FNode):
 
     def __init__(self, label, factor, callback=None):
         """Create an input-output factor node."""
-        super().__init__(self, label, factor)
+        super().__init__(label, factor)
         if callback is not None:
             self.set_callback(callback)
 
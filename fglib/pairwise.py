@@ -0,0 +1,282 @@
+"""Module for vectorized message passing on pairwise factor graphs.
+
+This module contains a flat-array engine for loopy belief propagation on
+factor graphs with discrete factors over at most two variables (pairwise
+Markov random fields). The factor graph is lowered into contiguous arrays,
+i.e. a message tensor, edge index arrays and stacked pairwise tables, and each
+iteration is performed by a few vectorized gathers, Einstein summations and
+scatter-adds.
+
+Classes:
+    PairwiseGraph: Flat-array representation of a pairwise factor graph.
+
+Functions:
+    loopy_belief_propagation: Vectorized loopy belief propagation.
+
+"""
+
+import numpy as np
+
+from . import inference, messages, rv
+
+_TINY = np.finfo(np.float64).tiny
+
+
+def _log(p):
+    """Return the logarithm with zeros clipped to the smallest normal."""
+    return np.log(np.maximum(p, _TINY))
+
+
+class PairwiseGraph:
+
+    """Flat-array representation of a pairwise factor graph.
+
+    Variables are padded to the largest number of states. Pairwise factors
+    are stacked into a tensor of shape (F, K, K) and factors over a single
+    variable are folded into unary tables of shape (V, K). The messages from
+    pairwise factors to variables are stored as normalized logarithms in a
+    tensor of shape (2F, K): the first F rows hold the messages to the second
+    variable of each factor and the last F rows the messages to the first
+    variable. Messages from variables to factors are derived from the sum of
+    all incoming messages minus the message in reverse direction.
+
+    """
+
+    def __init__(self, graph):
+        """Lower a factor graph into flat arrays.
+
+        Args:
+            graph: A factor graph with discrete factors over one or two
+                variables and without batch dimensions.
+
+        Raises:
+            ParameterException: An error occurred lowering a factor graph,
+                which is not pairwise.
+
+        """
+        self.graph = graph
+        self.variables = graph.get_vnodes()
+        self.index = {v: i for i, v in enumerate(self.variables)}
+
+        pairwise, unary = [], []
+        for f in graph.get_fnodes():
+            factor = f.factor
+            if not isinstance(factor, rv.Discrete) or factor.batched \
+                    or len(factor.dim) not in (1, 2):
+                raise rv.ParameterException('Factor graph is not pairwise.')
+            (pairwise if len(factor.dim) == 2 else unary).append(f)
+        self.pairwise, self.unary = pairwise, unary
+
+        # Number of states per variable
+        card = np.ones(len(self.variables), dtype=int)
+        for f in pairwise + unary:
+            for v, k in zip(f.factor.dim, f.factor.shape):
+                card[self.index[v]] = max(card[self.index[v]], k)
+        self.card = card
+        self.K = K = int(card.max()) if len(card) else 1
+        V, F = len(self.variables), len(pairwise)
+
+        # Unary tables (logarithms) of factors and initial messages
+        self._factor_log = np.zeros((V, K))
+        self._factor_log[np.arange(K) >= card[:, None]] = np.log(_TINY)
+        self._init_log = np.zeros((V, K))
+        for f in unary:
+            v, = f.factor.dim
+            i = self.index[v]
+            pmf = np.broadcast_to(f.factor.normalize().pmf, (card[i],))
+            self._factor_log[i, :card[i]] += _log(pmf)
+        for i, v in enumerate(self.variables):
+            if isinstance(v.init, rv.Discrete) and not v.init.batched:
+                pmf = np.broadcast_to(v.init.pmf, (card[i],))
+                self._init_log[i, :card[i]] = _log(pmf / np.sum(pmf))
+        self._observed = np.array([bool(v.observed) for v in self.variables],
+                                  dtype=bool)
+
+        # Stacked pairwise tables and edge index arrays
+        self.tables = np.zeros((F, K, K))
+        self.src = np.empty(F, dtype=int)
+        self.dst = np.empty(F, dtype=int)
+        for j, f in enumerate(pairwise):
+            a, b = f.factor.dim
+            self.src[j], self.dst[j] = self.index[a], self.index[b]
+            shape = (card[self.src[j]], card[self.dst[j]])
+            self.tables[j, :shape[0], :shape[1]] = np.broadcast_to(
+                f.factor.pmf, shape)
+
+        self._source = np.concatenate((self.src, self.dst))
+        self._target = np.concatenate((self.dst, self.src))
+        self._reverse = np.concatenate((np.arange(F, 2 * F), np.arange(F)))
+
+        self.reset()
+
+    def reset(self):
+        """Reset all messages to uniform messages."""
+        states = self.card[self._target][:, None]
+        self.messages = np.where(np.arange(self.K) < states, -np.log(states),
+                                 np.log(_TINY))
+
+    def _incoming(self, messages):
+        """Return the sums of incoming messages (logarithms) per variable."""
+        S = np.zeros(self._factor_log.shape)
+        np.add.at(S, self._target, messages)
+        return S
+
+    def iterate(self, damping=0.):
+        """Perform one synchronous iteration.
+
+        All messages are computed from the messages of the previous
+        iteration.
+
+        Args:
+            damping: Weight of the previous message between 0 (no damping)
+                and 1 (exclusive).
+
+        Returns:
+            The maximum absolute change of all (normalized) messages.
+
+        Raises:
+            ValueError: An error occurred for a damping outside of [0, 1).
+
+        """
+        messages.check_damping(damping)
+        L = self.messages
+        F = len(self.pairwise)
+
+        # Messages from variables to factors
+        S = self._incoming(L)
+        log_in = (self._init_log + self._factor_log + S)[self._source] \
+            - L[self._reverse]
+        observed = self._observed[self._source]
+        log_in[observed] = self._init_log[self._source[observed]]
+        p_in = np.exp(log_in - np.amax(log_in, axis=1, keepdims=True))
+
+        # Messages from factors to variables
+        new = np.empty_like(p_in)
+        new[:F] = np.einsum('fst,fs->ft', self.tables, p_in[:F])
+        new[F:] = np.einsum('fst,ft->fs', self.tables, p_in[F:])
+        new /= np.sum(new, axis=1, keepdims=True)
+
+        old = np.exp(L)
+        if damping:
+            new = (1 - damping) * new + damping * old
+
+        self.messages = _log(new)
+        return float(np.max(np.abs(new - old))) if len(new) else 0.
+
+    def belief(self, node):
+        """Return the (normalized) belief of a variable node.
+
+        Args:
+            node: A variable node of the factor graph.
+
+        """
+        return self.beliefs([node])[node]
+
+    def beliefs(self, nodes=None):
+        """Return the (normalized) beliefs of variable nodes.
+
+        Args:
+            nodes: Optional variable nodes. In the case of None, the beliefs
+                of all variable nodes are returned.
+
+        Returns:
+            A dictionary with the beliefs of the variable nodes.
+
+        """
+        nodes = self.variables if nodes is None else list(nodes)
+        idx = np.array([self.index[n] for n in nodes], dtype=int)
+
+        log_b = (self._factor_log + self._incoming(self.messages))[idx]
+        b = np.exp(log_b - np.amax(log_b, axis=1, keepdims=True))
+        b /= np.sum(b, axis=1, keepdims=True)
+
+        return {n: rv.Discrete(b[k, :self.card[i]], n)
+                for k, (n, i) in enumerate(zip(nodes, idx))}
+
+    def store(self):
+        """Store all messages in the edges of the factor graph.
+
+        Afterwards, the beliefs of variable and factor nodes can be computed
+        by the nodes themselves.
+
+        """
+        L = self.messages
+        F = len(self.pairwise)
+        S = self._incoming(L)
+        log_var = self._init_log + self._factor_log + S
+
+        def discrete(log_pmf, i):
+            pmf = np.exp(log_pmf[:self.card[i]] - np.amax(log_pmf))
+            return rv.Discrete(pmf / np.sum(pmf), self.variables[i])
+
+        for r in range(2 * F):
+            f, s, t = self.pairwise[r % F], self._source[r], self._target[r]
+            u, v = self.variables[s], self.variables[t]
+            log_in = self._init_log[s] if self._observed[s] \
+                else log_var[s] - L[self._reverse[r]]
+            self.graph[f][v]['object'].set_message(f, v, discrete(L[r], t))
+            self.graph[u][f]['object'].set_message(u, f, discrete(log_in, s))
+
+        for f in self.unary:
+            v, = f.factor.dim
+            i = self.index[v]
+            factor = f.factor.normalize()
+            log_in = self._init_log[i] if self._observed[i] \
+                else log_var[i, :self.card[i]] - _log(
+                    np.broadcast_to(factor.pmf, (self.card[i],)))
+            self.graph[f][v]['object'].set_message(f, v, factor)
+            self.graph[v][f]['object'].set_message(v, f, discrete(log_in, i))
+
+        self.graph.mark_swept(None)  # Messages of previous sweeps are stale
+
+
+def loopy_belief_propagation(graph, iterations, query_node=(), tolerance=None,
+                             damping=0.):
+    """Vectorized loopy belief propagation.
+
+    Perform approximative inference on pairwise factor graphs with a
+    synchronous schedule. The factor graph is lowered once into flat arrays
+    and all messages are stored in the edges of the factor graph at the end.
+
+    Args:
+        graph: A pairwise factor graph or an instance of PairwiseGraph.
+        iterations: Maximum number of iterations.
+        query_node: Variable nodes, whose beliefs are recorded after each
+            iteration.
+        tolerance: Optional tolerance for the maximum change of all messages.
+            In the case of None, all iterations are performed.
+        damping: Weight of the previous message between 0 (no damping) and 1
+            (exclusive). Like the synchronous schedule of
+            inference.loopy_belief_propagation, the first iteration is not
+            damped.
+
+    Returns:
+        A tuple with a dictionary of the beliefs of the query nodes for each
+        iteration and a convergence report.
+
+    Raises:
+        ValueError: An error occurred for a damping outside of [0, 1).
+
+    """
+    messages.check_damping(damping)
+    engine = graph if isinstance(graph, PairwiseGraph) \
+        else PairwiseGraph(graph)
+
+    b = {n: [] for n in query_node}
+    residual = np.inf
+    converged = False
+    i = 0
+    for i in range(1, iterations + 1):
+        residual = engine.iterate(damping if i > 1 else 0.)
+
+        # Beliefs of query nodes
+        if query_node:
+            for n, belief in engine.beliefs(query_node).items():
+                b[n].append(belief)
+
+        if tolerance is not None and residual < tolerance:
+            converged = True
+            break
+
+    engine.store()
+    return b, inference.ConvergenceReport(i, residual, converged)
@@ -6,7 +6,15 @@ Classes:
     ParameterException: Exception for invalid parameters.
     RandomVariable: Abstract class for random variables.
     Discrete: Class for discrete random variables.
+    LogDiscrete: Class for discrete random variables in the logarithmic domain.
+    SparseDiscrete: Class for sparse discrete random variables.
     Gaussian: Class for Gaussian random variables.
+    SqrtGaussian: Class for Gaussian random variables in square-root
+        information form.
+
+Functions:
+    get_default_dtype: Return the default floating-point data type.
+    set_default_dtype: Set the default floating-point data type.
 
 """
 
@@ -14,6 +22,68 @@ from abc import ABC, abstractmethod, abstractproperty, abstractclassmethod
 
 import numpy as np
 
+_default_dtype = np.dtype(np.float64)
+
+
+def get_default_dtype():
+    """Return the default floating-point data type of random variables."""
+    return _default_dtype
+
+
+def set_default_dtype(dtype):
+    """Set the default floating-point data type of random variables.
+
+    The default data type is used for all random variables, which are
+    initialized without an explicit data type and without floating-point
+    Numpy arrays (including unit elements).
+    Data types with less precision than single precision (e.g. float16) are
+    only used for storage, while reductions are accumulated in single
+    precision.
+
+    Args:
+        dtype: A floating-point Numpy data type (e.g. numpy.float32).
+
+    Raises:
+        ParameterException: An error occurred setting an invalid data type.
+
+    """
+    global _default_dtype
+    _default_dtype = _floating(dtype)
+
+
+def _floating(dtype, *arrays):
+    """Return the given floating-point data type or the inferred one.
+
+    In the case of None, the data type of the given floating-point Numpy
+    arrays is used. Otherwise, the default data type is used.
+
+    """
+    if dtype is None:
+        dtypes = [a.dtype for a in arrays if isinstance(a, np.ndarray)
+                  and np.issubdtype(a.dtype, np.floating)]
+        return np.result_type(*dtypes) if dtypes else _default_dtype
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise ParameterException('Invalid data type.')
+    return dtype
+
+
+def _result_type(*dists):
+    """Return the data type of a result of discrete random variables.
+
+    Operands with a single entry per batch (e.g. unit elements) do not
+    promote the data type of the other operands, similar to Numpy scalars.
+
+    """
+    dtypes = [d.dtype for d in dists
+              if np.prod(d.shape[d.batched:], dtype=int) > 1]
+    return np.result_type(*(dtypes or [d.dtype for d in dists]))
+
+
+def _accumulator(dtype):
+    """Return the data type for accumulations of the given data type."""
+    return np.promote_types(dtype, np.float32)
+
 
 class ParameterException(Exception):
 
@@ -98,7 +168,7 @@ class Discrete(RandomVariable):
 
     """
 
-    def __init__(self, raw_pmf, *args):
+    def __init__(self, raw_pmf, *args, batched=False, dtype=None):
         """Initialize a discrete random variable.
 
         Create a new discrete random variable with the given probability
@@ -110,20 +180,29 @@ class Discrete(RandomVariable):
             *args: Instances of the class VNode representing the variables of
                 the probability mass function. The number of the positional
                 arguments must match the number of dimensions of the Numpy
-                array.
+                array (without the batch dimension).
+            batched: Boolean flag if the first dimension of the Numpy array is
+                a batch dimension. The batch dimension is not associated with
+                a variable and each entry along it represents an independent
+                probability mass function.
+            dtype: An optional floating-point Numpy data type. In the case of
+                None, the data type of floating-point Numpy arrays or else
+                the default data type is used.
 
         Raises:
             ParameterException: An error occurred initializing with invalid
                 parameters.
 
         """
-        pmf = np.asarray(raw_pmf, dtype=np.float64)
+        pmf = np.asarray(raw_pmf, dtype=_floating(dtype, raw_pmf))
 
         # Set probability mass function
         self._pmf = pmf
+        self._batched = bool(batched)
+        self._log = None  # Cached logarithm
 
         # Set variable nodes for dimensions
-        if np.ndim(pmf) != len(args):
+        if np.ndim(pmf) != len(args) + self._batched:
             raise ParameterException('Dimension mismatch.')
         else:
             self._dim = args
@@ -144,12 +223,32 @@ class Discrete(RandomVariable):
 
         """
         n = len(args)
-        return cls(np.ones((1,) * n), *args)
+        return cls(np.ones((1,) * n), *args, dtype=_default_dtype)
 
     @property
     def pmf(self):
         return self._pmf
 
+    @property
+    def log_pmf(self):
+        return self.log().pmf
+
+    @property
+    def shape(self):
+        return self._pmf.shape
+
+    @property
+    def dtype(self):
+        return self._pmf.dtype
+
+    @property
+    def batched(self):
+        return self._batched
+
+    @property
+    def batch_size(self):
+        return self.shape[0] if self.batched else None
+
     @property
     def dim(self):
         return self._dim
@@ -168,15 +267,7 @@ class Discrete(RandomVariable):
             A new discrete random variable representing the summation.
 
         """
-        # Verify dimensions of summand and summand.
-        if len(self.dim) < len(other.dim):
-            self._expand(other.dim, other.pmf.shape)
-        elif len(self.dim) > len(other.dim):
-            other._expand(self.dim, self.pmf.shape)
-
-        pmf = self.pmf + other.pmf
-
-        return Discrete(pmf, *self.dim)
+        return self.add(other)
 
     def __sub__(self, other):
         """Subtract other from self and return the result.
@@ -188,15 +279,7 @@ class Discrete(RandomVariable):
             A new discrete random variable representing the subtraction.
 
         """
-        # Verify dimensions of minuend and subtrahend.
-        if len(self.dim) < len(other.dim):
-            self._expand(other.dim, other.pmf.shape)
-        elif len(self.dim) > len(other.dim):
-            other._expand(self.dim, self.pmf.shape)
-
-        pmf = self.pmf - other.pmf
-
-        return Discrete(pmf, *self.dim)
+        return self.subtract(other)
 
     def __mul__(self, other):
         """Multiply other with self and return the result.
@@ -208,15 +291,7 @@ class Discrete(RandomVariable):
             A new discrete random variable representing the multiplication.
 
         """
-        # Verify dimensions of multiplicand and multiplier.
-        if len(self.dim) < len(other.dim):
-            self._expand(other.dim, other.pmf.shape)
-        elif len(self.dim) > len(other.dim):
-            other._expand(self.dim, self.pmf.shape)
-
-        pmf = self.pmf * other.pmf
-
-        return Discrete(pmf, *self.dim)
+        return self.multiply(other)
 
     def __iadd__(self, other):
         """Method for augmented addition.
@@ -262,35 +337,159 @@ class Discrete(RandomVariable):
 
         """
         return np.allclose(self.pmf, other.pmf) \
-            and self.dim == other.dim
+            and self.dim == other.dim \
+            and self.batched == other.batched
+
+    def axes(self, *dims):
+        """Return the axes of the Numpy array for the given variables.
+
+        Args:
+            *dims: Instances of the class VNode.
+
+        Returns:
+            A tuple of the axes in the order of the dimensions, shifted by
+            the batch dimension.
+
+        """
+        return tuple(idx + self.batched for idx, d in enumerate(self.dim)
+                     if d in dims)
+
+    def _align(self, other, log=False):
+        """Align dimensions of self and other.
+
+        The union of the dimensions is computed once. It starts with the
+        dimensions of the operand with more dimensions, followed by the
+        missing dimensions of the other operand. Both probability mass
+        functions are returned as read-only views over the union, where
+        missing dimensions are broadcast with a stride of zero. The result
+        has a batch dimension if any of the operands is batched.
+
+        Args:
+            other: Discrete random variable.
+            log: Boolean flag if the logarithms of the probability mass
+                functions should be aligned.
+
+        Returns:
+            A tuple with the union of dimensions, the batch flag of the
+            result and the two views.
+
+        """
+        if len(other.dim) > len(self.dim):
+            dims = other.dim + tuple(d for d in self.dim
+                                     if d not in other.dim)
+        else:
+            dims = self.dim + tuple(d for d in other.dim
+                                    if d not in self.dim)
+
+        batched = self.batched or other.batched
+        if log:
+            a, b = self.log_pmf, other.log_pmf
+        else:
+            a, b = self.pmf, other.pmf
+        a = _broadcast(a, self.dim, dims, self.batched, batched)
+        b = _broadcast(b, other.dim, dims, other.batched, batched)
+        shape = np.broadcast(a, b).shape
+
+        return (dims, batched,
+                np.broadcast_to(a, shape), np.broadcast_to(b, shape))
+
+    def add(self, other, out=None):
+        """Add other to self and return the result.
+
+        Args:
+            other: Summand for the discrete random variable.
+            out: An optional Numpy array over the union of dimensions,
+                in which the result is stored.
+
+        Returns:
+            A new discrete random variable representing the summation.
+
+        """
+        self._invalidate(out, other)
+        if isinstance(other, LogDiscrete):
+            return self.to_log().add(other, out=out)
+
+        dtype = _result_type(self, other) if out is None else None
+        dims, batched, a, b = self._align(other)
+        pmf = np.add(a, b, out=out, dtype=dtype)
+        return Discrete(pmf, *dims, batched=batched, dtype=pmf.dtype)
+
+    def subtract(self, other, out=None):
+        """Subtract other from self and return the result.
+
+        Args:
+            other: Subtrahend for the discrete random variable.
+            out: An optional Numpy array over the union of dimensions,
+                in which the result is stored.
+
+        Returns:
+            A new discrete random variable representing the subtraction.
+
+        """
+        self._invalidate(out, other)
+        if isinstance(other, LogDiscrete):
+            return self.to_log().subtract(other, out=out)
 
-    def _expand(self, dims, states):
-        """Expand dimensions.
+        dtype = _result_type(self, other) if out is None else None
+        dims, batched, a, b = self._align(other)
+        pmf = np.subtract(a, b, out=out, dtype=dtype)
+        return Discrete(pmf, *dims, batched=batched, dtype=pmf.dtype)
 
-        Expand the discrete random variable along the given new dimensions.
+    def multiply(self, other, out=None):
+        """Multiply other with self and return the result.
 
         Args:
-            dims: List of discrete random variables.
+            other: Multiplier for the discrete random variable.
+            out: An optional Numpy array over the union of dimensions,
+                in which the result is stored. The array may be the
+                probability mass function of self for an in-place product.
+
+        Returns:
+            A new discrete random variable representing the multiplication.
 
         """
-        reps = [1, ] * len(dims)
+        self._invalidate(out, other)
+        if isinstance(other, LogDiscrete):
+            return self.to_log().multiply(other, out=out)
+
+        if isinstance(other, SparseDiscrete) \
+                and not isinstance(self, SparseDiscrete):
+            if set(self.dim) <= set(other.dim):
+                return other.multiply(self, out=out)
+            other = other.todense()
+
+        dtype = _result_type(self, other) if out is None else None
+        dims, batched, a, b = self._align(other)
+        pmf = np.multiply(a, b, out=out, dtype=dtype)
+        return Discrete(pmf, *dims, batched=batched, dtype=pmf.dtype)
 
-        # Extract missing dimensions
-        diff = [i for i, d in enumerate(dims) if d not in self.dim]
+    @property
+    def _stored(self):
+        """Return the Numpy array of the stored values."""
+        return self._pmf
+
+    def _invalidate(self, out, other):
+        """Clear cached logarithms before a result is stored in place.
+
+        The cached logarithm of self and of the other operand is cleared,
+        if its stored values may be overwritten.
 
-        # Expand missing dimensions
-        for d in diff:
-            self._pmf = np.expand_dims(self.pmf, axis=d)
-            reps[d] = states[d]
+        Args:
+            out: An optional Numpy array, in which a result is stored.
+            other: The other operand of the operation.
 
-        # Repeat missing dimensions
-        self._pmf = np.tile(self.pmf, reps)
-        self._dim = dims
+        """
+        if out is None:
+            return
+        for d in (self, other):
+            if isinstance(d, Discrete) and np.may_share_memory(out, d._stored):
+                d._log = None
 
     def normalize(self):
         """Normalize probability mass function."""
-        pmf = self.pmf / np.abs(np.sum(self.pmf))
-        return Discrete(pmf, *self.dim)
+        pmf = self.pmf / np.abs(_total(self.pmf, self.batched))
+        return Discrete(pmf, *self.dim, batched=self.batched,
+                        dtype=self.dtype)
 
     def marginalize(self, *dims, normalize=True):
         """Return the marginal for given dimensions.
@@ -308,13 +507,14 @@ class Discrete(RandomVariable):
             A new discrete random variable representing the marginal.
 
         """
-        axis = tuple(idx for idx, d in enumerate(self.dim) if d in dims)
-        pmf = np.sum(self.pmf, axis)
+        pmf = np.sum(self.pmf, self.axes(*dims),
+                     dtype=_accumulator(self.dtype))
         if normalize:
-            pmf /= np.sum(pmf)
+            pmf /= _total(pmf, self.batched)
 
         new_dims = tuple(d for d in self.dim if d not in dims)
-        return Discrete(pmf, *new_dims)
+        return Discrete(pmf, *new_dims, batched=self.batched,
+                        dtype=self.dtype)
 
     def maximize(self, *dims, normalize=True):
         """Return the maximum for given dimensions.
@@ -332,104 +532,218 @@ class Discrete(RandomVariable):
             A new discrete random variable representing the maximum.
 
         """
-        axis = tuple(idx for idx, d in enumerate(self.dim) if d in dims)
-        pmf = np.amax(self.pmf, axis)
+        pmf = np.amax(self.pmf, self.axes(*dims))
+        if normalize:
+            pmf = pmf / _total(pmf, self.batched)
+
+        new_dims = tuple(d for d in self.dim if d not in dims)
+        return Discrete(pmf, *new_dims, batched=self.batched,
+                        dtype=self.dtype)
+
+    def maximize_argmax(self, *dims, normalize=True):
+        """Return the maximum and its argument for given dimensions.
+
+        The maximum and the argument of the maximum are computed by a single
+        reduction over the given dimensions.
+
+        Args:
+            *dims: Instances of discrete random variables, which should be
+                maximized out.
+            normalize: Boolean flag if probability mass function should be
+                normalized after maximization.
+
+        Returns:
+            A tuple with a new discrete random variable representing the
+            maximum and an integer array with the flat index of the maximum
+            for each entry of the maximum. The flat index refers to the
+            maximized dimensions in the order of the dimensions of the
+            random variable. The array has the smallest unsigned integer
+            data type, which can hold the index.
+
+        """
+        pmf, table = _max_argmax(self.pmf, self.axes(*dims))
         if normalize:
-            pmf /= np.sum(pmf)
+            pmf = pmf / _total(pmf, self.batched)
 
         new_dims = tuple(d for d in self.dim if d not in dims)
-        return Discrete(pmf, *new_dims)
+        return Discrete(pmf, *new_dims, batched=self.batched,
+                        dtype=self.dtype), table
 
     def argmax(self, dim=None):
         """Return the dimension index of the maximum.
 
         Args:
-            dim: An optional discrete random variable along a marginalization
+            dim: An optional discrete random variable along a maximization
                 should be performed and the maximum is searched over the
                 remaining dimensions. In the case of None, the maximum is
                 search along all dimensions.
 
         Returns:
             An integer representing the dimension of the maximum.
+            For batched random variables, an array with one entry per batch.
 
         """
         if dim is None:
-            return np.unravel_index(self.pmf.argmax(), self.pmf.shape)
-        m = self.marginalize(dim)
-        return np.argmax(m.pmf)
+            return _unravel_argmax(self.pmf, self.batched)
+        m = self.maximize(dim, normalize=False)
+        return _flat_argmax(m.pmf, m.batched)
+
+    def _subscripts(self, others, dims):
+        """Return subscript lists for an Einstein summation.
+
+        Each distinct variable over the discrete random variable and the
+        others is labeled with an integer subscript. The batch dimension is
+        labeled with zero and kept in the output if any operand is batched.
+
+        Args:
+            others: Discrete random variables, which should be multiplied.
+            dims: Variables, which are kept in the result.
+
+        Returns:
+            A tuple with the list of input subscripts (self first), the
+            output subscripts and the batch flag of the result.
+
+        """
+        labels = {}
+        inputs = [[0] * f.batched +
+                  [labels.setdefault(d, len(labels) + 1) for d in f.dim]
+                  for f in (self,) + others]
+        batched = any(f.batched for f in (self,) + others)
+        output = [0] * batched + [labels[d] for d in dims]
+        return inputs, output, batched
+
+    def contraction_path(self, *others, dims=()):
+        """Return an optimized contraction path.
+
+        The contraction path can be cached and passed to contract as long as
+        the shapes of the operands do not change.
+
+        Args:
+            *others: Discrete random variables, which should be multiplied.
+            dims: Variables, which are kept in the result.
+
+        Returns:
+            A contraction path as computed by numpy.einsum_path.
+
+        """
+        inputs, output, _ = self._subscripts(others, dims)
+        shapes = [np.broadcast_to(0., f.shape) for f in (self,) + others]
+        operands = _interleave(shapes, inputs, output)
+        return np.einsum_path(*operands, optimize='greedy')[0]
+
+    def contract(self, *others, dims=(), path=None):
+        """Return the product with others summed over all but given dims.
+
+        The multiplication and the marginalization are performed by a single
+        Einstein summation, which avoids the allocation of intermediate
+        probability mass functions over the joint dimensions. Operands with
+        less than single precision are accumulated in single precision.
+
+        Args:
+            *others: Discrete random variables, which should be multiplied.
+            dims: Variables, which are kept in the result.
+            path: An optional contraction path computed by contraction_path.
+
+        Returns:
+            A new discrete random variable over the given dimensions.
+
+        """
+        dtype = _result_type(self, *others)
+        acc = _accumulator(dtype)
+
+        inputs, output, batched = self._subscripts(others, dims)
+        operands = _interleave([f.pmf.astype(acc, copy=False)
+                                for f in (self,) + others], inputs, output)
+        if path is None:
+            path = 'greedy'
+        pmf = np.einsum(*operands, optimize=path)
+        return Discrete(pmf, *dims, batched=batched, dtype=dtype)
 
     def log(self):
         """Natural logarithm of the discrete random variable.
 
+        The logarithm is computed once and cached.
+
         Returns:
             A new discrete random variable with the natural logarithm of the
             probablitiy mass function.
 
         """
-        return Discrete(np.log(self.pmf), *self.dim)
+        if self._log is None:
+            with np.errstate(divide='ignore'):  # Logarithm of zero
+                log_pmf = np.log(self.pmf)
+            self._log = Discrete(log_pmf, *self.dim, batched=self.batched,
+                                 dtype=self.dtype)
+        return self._log
 
+    def to_log(self):
+        """Return the discrete random variable in the logarithmic domain.
 
-class Gaussian(RandomVariable):
+        Returns:
+            A new discrete random variable of the class LogDiscrete.
 
-    """Class for Gaussian random variables.
+        """
+        return LogDiscrete(self.log_pmf, *self.dim, batched=self.batched,
+                           dtype=self.dtype)
 
-    A Gaussian random variable is defined by a mean vector and a covariance
-    matrix. In addition, each dimension of the mean vector and the covariance
-    matrix has to be associated with a variable. The variable is
-    represented by a variable node of the comprehensive factor graph.
 
-    """
+class LogDiscrete(Discrete):
 
-    def __init__(self, raw_mean, raw_cov, *args):
-        """Initialize a Gaussian random variable.
+    """Class for discrete random variables in the logarithmic domain.
 
-        Create a new Gaussian random variable with the given mean vector and
-        the given covariance matrix over the given variable nodes.
+    The discrete random variable stores the natural logarithm of the
+    probability mass function (log-potentials). Multiplication is performed
+    by addition, marginalization by the log-sum-exp operation and
+    maximization directly on the log-potentials. Hence, messages do not
+    underflow on long chains and the logarithm is never recomputed.
+
+    """
+
+    def __init__(self, raw_log_pmf, *args, batched=False, dtype=None):
+        """Initialize a discrete random variable in the logarithmic domain.
 
         Args:
-            raw_mean: A Numpy array representing the mean vector.
-            raw_cov: A Numpy array representing the covariance matrix.
+            raw_log_pmf: A Numpy array representing the natural logarithm of
+                the probability mass function. The probability mass function
+                does not need to be normalized.
             *args: Instances of the class VNode representing the variables of
-                the mean vector and covariance matrix, respectively. The number
-                of the positional arguments must match the number of dimensions
-                of the Numpy arrays.
+                the probability mass function. The number of the positional
+                arguments must match the number of dimensions of the Numpy
+                array (without the batch dimension).
+            batched: Boolean flag if the first dimension of the Numpy array is
+                a batch dimension.
+            dtype: An optional floating-point Numpy data type. In the case of
+                None, the data type of floating-point Numpy arrays or else
+                the default data type is used.
 
         Raises:
             ParameterException: An error occurred initializing with invalid
                 parameters.
 
         """
-        if raw_mean is not None and raw_cov is not None:
-            mean = np.asarray(raw_mean, dtype=np.float64)
-            cov = np.asarray(raw_cov, dtype=np.float64)
+        log_pmf = np.asarray(raw_log_pmf,
+                             dtype=_floating(dtype, raw_log_pmf))
 
-            # Set mean vector and covariance matrix
-            if mean.shape[0] != cov.shape[0]:
-                raise ParameterException('Dimension mismatch.')
-            else:
-                # Precision matrix
-                self._W = np.linalg.inv(np.asarray(cov))
-                # Precision-mean vector
-                self._Wm = np.dot(self._W, np.asarray(mean))
-
-            # Set variable nodes for dimensions
-            if cov.shape[0] != len(args):
-                raise ParameterException('Dimension mismatch.')
-            else:
-                self._dim = args
+        # Set logarithm of probability mass function
+        self._log_pmf = log_pmf
+        self._batched = bool(batched)
+        self._log = None
 
+        # Set variable nodes for dimensions
+        if np.ndim(log_pmf) != len(args) + self._batched:
+            raise ParameterException('Dimension mismatch.')
         else:
             self._dim = args
 
     @classmethod
     def unity(cls, *args):
-        """Initialize unit element of a Gaussian random variable.
+        """Initialize unit element of a discrete random variable.
 
         Args:
             *args: Instances of the class VNode representing the variables of
-                the mean vector and covariance matrix, respectively. The number
-                of the positional arguments must match the number of dimensions
-                of the Numpy arrays.
+                the probability mass function. The number of the positional
+                arguments must match the number of dimensions of the Numpy
+                array.
 
         Raises:
             ParameterException: An error occurred initializing with invalid
@@ -437,119 +751,1135 @@ class Gaussian(RandomVariable):
 
         """
         n = len(args)
-        return cls(np.diag(np.zeros(n)), np.diag(np.ones(n) * np.Inf), *args)
-
-    @classmethod
-    def inf_form(cls, raw_W, raw_Wm, *args):
-        """Initialize a Gaussian random variable using the information form.
-
-        Create a new Gaussian random variable with the given mean vector and
-        the given covariance matrix over the given variable nodes.
+        return cls(np.zeros((1,) * n), *args, dtype=_default_dtype)
 
-        Args:
-            raw_W: A Numpy array representing the precision matrix.
-            raw_Wm: A Numpy array representing the precision-mean vector.
-            *args: Instances of the class VNode representing the variables of
-                the mean vector and covariance matrix, respectively. The number
-                of the positional arguments must match the number of dimensions
-                of the Numpy arrays.
-
-        Raises:
-            ParameterException: An error occurred initializing with invalid
-                parameters.
-
-        """
-        g = cls(None, None, *args)
-        g._W = np.asarray(raw_W, dtype=np.float64)
-        g._Wm = np.asarray(raw_Wm, dtype=np.float64)
-        return g
+    @property
+    def pmf(self):
+        return np.exp(self._log_pmf)
 
     @property
-    def mean(self):
-        return np.dot(np.linalg.inv(self._W), self._Wm)
+    def _stored(self):
+        return self._log_pmf
 
     @property
-    def cov(self):
-        return np.linalg.inv(self._W)
+    def log_pmf(self):
+        return self._log_pmf
 
     @property
-    def dim(self):
-        return self._dim
+    def shape(self):
+        return self._log_pmf.shape
 
-    def __str__(self):
-        """Return string representation of the Gaussian random variable."""
-        mean = np.array2string(self.mean, separator=',', sign=' ')
-        cov = np.array2string(self.cov, separator=',', sign=' ')
-        return "%s\n%s" % (mean, cov)
+    @property
+    def dtype(self):
+        return self._log_pmf.dtype
 
-    def __add__(self, other):
+    def add(self, other, out=None):
         """Add other to self and return the result.
 
         Args:
-            other: Summand for the Gaussian random variable.
+            other: Summand for the discrete random variable.
+            out: An optional Numpy array over the union of dimensions,
+                in which the logarithm of the result is stored.
 
         Returns:
-            A new Gaussian random variable representing the summation.
+            A new discrete random variable representing the summation.
 
         """
-        return Gaussian(self.mean + other.mean,
-                        self.cov + other.cov,
-                        *self.dim)
-
-    def __sub__(self, other):
+        self._invalidate(out, other)
+        dtype = _result_type(self, other) if out is None else None
+        dims, batched, a, b = self._align(other, log=True)
+        log_pmf = np.logaddexp(a, b, out=out, dtype=dtype)
+        return LogDiscrete(log_pmf, *dims, batched=batched,
+                           dtype=log_pmf.dtype)
+
+    def subtract(self, other, out=None):
         """Subtract other from self and return the result.
 
         Args:
-            other: Subrahend for the Gaussian random variable.
+            other: Subtrahend for the discrete random variable.
+            out: An optional Numpy array over the union of dimensions,
+                in which the logarithm of the result is stored.
 
         Returns:
-            A new Gaussian random variable representing the subtraction.
+            A new discrete random variable representing the subtraction.
 
         """
-        return Gaussian(self.mean - other.mean,
-                        self.cov - other.cov,
-                        *self.dim)
-
-    def __mul__(self, other):
+        self._invalidate(out, other)
+        dtype = _result_type(self, other) if out is None else None
+        dims, batched, a, b = self._align(other, log=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_pmf = np.add(a, np.log1p(-np.exp(b - a)), out=out,
+                             dtype=dtype)
+        return LogDiscrete(log_pmf, *dims, batched=batched,
+                           dtype=log_pmf.dtype)
+
+    def multiply(self, other, out=None):
         """Multiply other with self and return the result.
 
         Args:
-            other: Multiplier for the Gaussian random variable.
+            other: Multiplier for the discrete random variable.
+            out: An optional Numpy array over the union of dimensions,
+                in which the logarithm of the result is stored.
 
         Returns:
-            A new Gaussian random variable representing the multiplication.
+            A new discrete random variable representing the multiplication.
 
         """
-        W = self._W + other._W
-        Wm = self._Wm + other._Wm
-        return Gaussian.inf_form(W, Wm, *self.dim)
-
-    def __iadd__(self, other):
-        """Method for augmented addition.
+        self._invalidate(out, other)
+        dtype = _result_type(self, other) if out is None else None
+        dims, batched, a, b = self._align(other, log=True)
+        log_pmf = np.add(a, b, out=out, dtype=dtype)
+        return LogDiscrete(log_pmf, *dims, batched=batched,
+                           dtype=log_pmf.dtype)
 
-        Args:
-            other: Summand for the Gaussian random variable.
+    def __eq__(self, other):
+        """Compare self with other and return the boolean result.
 
-        Returns:
-            A new Gaussian random variable representing the summation.
+        Two discrete random variables are equal only if the probability mass
+        functions are equal and the order of dimensions are equal.
 
         """
-        return self.__add__(other)
+        return np.allclose(self.log_pmf, other.log_pmf) \
+            and self.dim == other.dim \
+            and self.batched == other.batched
 
-    def __isub__(self, other):
-        """Method for augmented subtraction.
+    def normalize(self):
+        """Normalize probability mass function."""
+        log_pmf = self.log_pmf - _logsumexp(
+            self.log_pmf, _variable_axes(self.log_pmf, self.batched), True)
+        return LogDiscrete(log_pmf, *self.dim, batched=self.batched,
+                           dtype=self.dtype)
+
+    def marginalize(self, *dims, normalize=True):
+        """Return the marginal for given dimensions.
+
+        The probability mass function of the discrete random variable
+        is marginalized along the given dimensions by the log-sum-exp
+        operation.
 
         Args:
-            other: Subtrahend for the Gaussian random variable.
+            *dims: Instances of discrete random variables, which should be
+                marginalized out.
+            normalize: Boolean flag if probability mass function should be
+                normalized after marginalization.
 
         Returns:
-            A new Gaussian random variable representing the subtraction.
+            A new discrete random variable representing the marginal.
 
         """
-        return self.__sub__(other)
+        log_pmf = _logsumexp(self.log_pmf, self.axes(*dims))
+        if normalize:
+            log_pmf = log_pmf - _logsumexp(
+                log_pmf, _variable_axes(log_pmf, self.batched), True)
 
-    def __imul__(self, other):
-        """Method for augmented multiplication.
+        new_dims = tuple(d for d in self.dim if d not in dims)
+        return LogDiscrete(log_pmf, *new_dims, batched=self.batched,
+                           dtype=self.dtype)
+
+    def maximize(self, *dims, normalize=True):
+        """Return the maximum for given dimensions.
+
+        The probability mass function of the discrete random variable
+        is maximized along the given dimensions.
+
+        Args:
+            *dims: Instances of discrete random variables, which should be
+                maximized out.
+            normalize: Boolean flag if probability mass function should be
+                normalized after marginalization.
+
+        Returns:
+            A new discrete random variable representing the maximum.
+
+        """
+        log_pmf = np.amax(self.log_pmf, self.axes(*dims))
+        if normalize:
+            log_pmf = log_pmf - _logsumexp(
+                log_pmf, _variable_axes(log_pmf, self.batched), True)
+
+        new_dims = tuple(d for d in self.dim if d not in dims)
+        return LogDiscrete(log_pmf, *new_dims, batched=self.batched,
+                           dtype=self.dtype)
+
+    def maximize_argmax(self, *dims, normalize=True):
+        """Return the maximum and its argument for given dimensions.
+
+        The maximum and the argument of the maximum are computed by a single
+        reduction of the logarithm over the given dimensions.
+
+        Args:
+            *dims: Instances of discrete random variables, which should be
+                maximized out.
+            normalize: Boolean flag if probability mass function should be
+                normalized after maximization.
+
+        Returns:
+            A tuple with a new discrete random variable representing the
+            maximum and an integer array with the flat index of the maximum
+            for each entry of the maximum (see Discrete.maximize_argmax).
+
+        """
+        log_pmf, table = _max_argmax(self.log_pmf, self.axes(*dims))
+        if normalize:
+            log_pmf = log_pmf - _logsumexp(
+                log_pmf, _variable_axes(log_pmf, self.batched), True)
+
+        new_dims = tuple(d for d in self.dim if d not in dims)
+        return LogDiscrete(log_pmf, *new_dims, batched=self.batched,
+                           dtype=self.dtype), table
+
+    def argmax(self, dim=None):
+        """Return the dimension index of the maximum.
+
+        Args:
+            dim: An optional discrete random variable along a maximization
+                should be performed and the maximum is searched over the
+                remaining dimensions. In the case of None, the maximum is
+                search along all dimensions.
+
+        Returns:
+            An integer representing the dimension of the maximum.
+
+        """
+        if dim is None:
+            return _unravel_argmax(self.log_pmf, self.batched)
+        m = self.maximize(dim, normalize=False)
+        return _flat_argmax(m.log_pmf, m.batched)
+
+    def contract(self, *others, dims=(), path=None):
+        """Return the product with others summed over all but given dims.
+
+        The log-potentials are shifted by their maximum (per batch) before
+        the Einstein summation and the shifts are added to the logarithm of
+        the result.
+
+        Args:
+            *others: Discrete random variables, which should be multiplied.
+            dims: Variables, which are kept in the result.
+            path: An optional contraction path computed by contraction_path.
+
+        Returns:
+            A new discrete random variable in the logarithmic domain over the
+            given dimensions.
+
+        """
+        shift = 0.
+        arrays = []
+        for f in (self,) + others:
+            if isinstance(f, LogDiscrete):
+                m = np.amax(f.log_pmf, _variable_axes(f.log_pmf, f.batched),
+                            keepdims=True)
+                m = np.where(np.isfinite(m), m, 0.)
+                arrays.append(np.exp(f.log_pmf - m))
+                shift = shift + m.reshape(m.shape[:f.batched])
+            else:
+                arrays.append(f.pmf)
+
+        dtype = _result_type(self, *others)
+        acc = _accumulator(dtype)
+        arrays = [a.astype(acc, copy=False) for a in arrays]
+
+        inputs, output, batched = self._subscripts(others, dims)
+        operands = _interleave(arrays, inputs, output)
+        if path is None:
+            path = 'greedy'
+        with np.errstate(divide='ignore'):
+            log_pmf = np.log(np.einsum(*operands, optimize=path))
+        log_pmf += np.reshape(shift, np.shape(shift) + (1,) * len(dims))
+        return LogDiscrete(log_pmf, *dims, batched=batched, dtype=dtype)
+
+    def log(self):
+        """Natural logarithm of the discrete random variable.
+
+        No logarithm is computed, since the log-potentials are stored.
+
+        Returns:
+            A new discrete random variable with the natural logarithm of the
+            probablitiy mass function.
+
+        """
+        if self._log is None:
+            self._log = Discrete(self.log_pmf, *self.dim,
+                                 batched=self.batched, dtype=self.dtype)
+        return self._log
+
+    def to_log(self):
+        """Return the discrete random variable in the logarithmic domain."""
+        return self
+
+    def exp(self):
+        """Return the discrete random variable in the linear domain.
+
+        Returns:
+            A new discrete random variable of the class Discrete.
+
+        """
+        return Discrete(self.pmf, *self.dim, batched=self.batched,
+                        dtype=self.dtype)
+
+
+class SparseDiscrete(Discrete):
+
+    """Class for sparse discrete random variables.
+
+    The probability mass function is stored in coordinate format, i.e. by an
+    index array with the states of all non-zero entries and a value array
+    with the corresponding probabilities. Memory and computation scale with
+    the number of non-zero entries, which makes the class well suited for
+    deterministic or near-deterministic factors.
+
+    """
+
+    def __init__(self, raw_index, raw_values, shape, *args, dtype=None):
+        """Initialize a sparse discrete random variable.
+
+        Args:
+            raw_index: A Numpy array with one row per dimension and one
+                column per non-zero entry of the probability mass function.
+            raw_values: A Numpy array with the non-zero entries of the
+                probability mass function.
+            shape: A tuple with the number of states per dimension.
+            *args: Instances of the class VNode representing the variables of
+                the probability mass function. The number of the positional
+                arguments must match the number of dimensions.
+            dtype: An optional floating-point Numpy data type. In the case of
+                None, the data type of floating-point Numpy arrays or else
+                the default data type is used.
+
+        Raises:
+            ParameterException: An error occurred initializing with invalid
+                parameters.
+
+        """
+        index = np.asarray(raw_index, dtype=np.intp)
+        values = np.asarray(raw_values, dtype=_floating(dtype, raw_values))
+        shape = tuple(shape)
+
+        # Set non-zero entries of probability mass function
+        if index.shape != (len(shape), values.shape[0]):
+            raise ParameterException('Number of entries mismatch.')
+        else:
+            self._index = index
+            self._values = values
+            self._shape = shape
+            self._batched = False
+            self._log = None
+
+        # Set variable nodes for dimensions
+        if len(shape) != len(args):
+            raise ParameterException('Dimension mismatch.')
+        else:
+            self._dim = args
+
+    @classmethod
+    def unity(cls, *args):
+        """Initialize unit element of a sparse discrete random variable.
+
+        Args:
+            *args: Instances of the class VNode representing the variables of
+                the probability mass function.
+
+        """
+        n = len(args)
+        return cls(np.zeros((n, 1)), [1.], (1,) * n, *args)
+
+    @classmethod
+    def from_dense(cls, raw_pmf, *args, dtype=None):
+        """Initialize a sparse discrete random variable from a dense array.
+
+        Args:
+            raw_pmf: A Numpy array representing the probability mass function.
+            *args: Instances of the class VNode representing the variables of
+                the probability mass function.
+            dtype: An optional floating-point Numpy data type. In the case of
+                None, the data type of floating-point Numpy arrays or else
+                the default data type is used.
+
+        Raises:
+            ParameterException: An error occurred initializing with invalid
+                parameters.
+
+        """
+        pmf = np.asarray(raw_pmf, dtype=_floating(dtype, raw_pmf))
+        index = np.nonzero(pmf)
+        return cls(index, pmf[index], pmf.shape, *args, dtype=pmf.dtype)
+
+    @property
+    def pmf(self):
+        pmf = np.zeros(self.shape, dtype=self.dtype)
+        pmf[tuple(self.index)] = self.values
+        return pmf
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def _stored(self):
+        return self._values
+
+    @property
+    def nnz(self):
+        return self._values.shape[0]
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def dtype(self):
+        return self._values.dtype
+
+    def todense(self):
+        """Return the discrete random variable with a dense array.
+
+        Returns:
+            A new discrete random variable of the class Discrete.
+
+        """
+        return Discrete(self.pmf, *self.dim, dtype=self.dtype)
+
+    def _keys(self, dims, shape=None):
+        """Return linear indices of the non-zero entries over given dims.
+
+        Args:
+            dims: Variables, which are a subset of the dimensions.
+            shape: An optional shape over the given variables. States of
+                dimensions with a size of one are broadcast to zero.
+
+        Returns:
+            A Numpy array with the linear index of each non-zero entry.
+
+        """
+        axes = [self.dim.index(d) for d in dims]
+        if shape is None:
+            shape = tuple(self.shape[a] for a in axes)
+        index = tuple(self.index[a] if s > 1 else np.zeros_like(self.index[a])
+                      for a, s in zip(axes, shape))
+        return np.ravel_multi_index(index, shape)
+
+    def _gather(self, other):
+        """Return the entries of other at the non-zero entries of self.
+
+        Args:
+            other: Discrete random variable over a subset of the dimensions.
+
+        Returns:
+            A Numpy array with one entry of other per non-zero entry of self.
+            If other is batched, the array has a leading batch dimension.
+
+        """
+        if isinstance(other, SparseDiscrete):
+            if other.nnz == 0:
+                return np.zeros(self.nnz, dtype=other.dtype)
+            keys = self._keys(other.dim, other.shape)
+            other_keys = other._keys(other.dim)
+            order = np.argsort(other_keys)
+            pos = np.searchsorted(other_keys, keys, sorter=order)
+            pos = order[np.minimum(pos, other.nnz - 1)]
+            return np.where(other_keys[pos] == keys, other.values[pos], 0.)
+
+        pmf = other.pmf
+        index = tuple(self.index[self.dim.index(d)] if s > 1 else 0
+                      for d, s in zip(other.dim, pmf.shape[other.batched:]))
+        if other.batched:
+            values = pmf[(slice(None),) + index]
+            values = values.reshape((other.batch_size, -1))
+            return np.broadcast_to(values, (other.batch_size, self.nnz))
+        return np.broadcast_to(pmf[index], (self.nnz,))
+
+    def _group(self, dims):
+        """Group the non-zero entries by their states over given dims.
+
+        Args:
+            dims: Variables, which are kept.
+
+        Returns:
+            A tuple with the index array of the groups and the group number
+            of each non-zero entry.
+
+        """
+        axes = [idx for idx, d in enumerate(self.dim) if d in dims]
+        if not axes:
+            return np.zeros((0, 1), dtype=np.intp), np.zeros(self.nnz, int)
+
+        shape = tuple(self.shape[a] for a in axes)
+        keys = np.ravel_multi_index(tuple(self.index[a] for a in axes), shape)
+        keys, inverse = np.unique(keys, return_inverse=True)
+        index = np.array(np.unravel_index(keys, shape)).reshape(
+            (len(shape), -1))
+        return index, inverse.reshape(-1)
+
+    def add(self, other, out=None):
+        """Add other to self and return the result.
+
+        The summation is performed with the dense probability mass function.
+
+        """
+        return self.todense().add(other, out=out)
+
+    def subtract(self, other, out=None):
+        """Subtract other from self and return the result.
+
+        The subtraction is performed with the dense probability mass function.
+
+        """
+        return self.todense().subtract(other, out=out)
+
+    def multiply(self, other, out=None):
+        """Multiply other with self and return the result.
+
+        If the dimensions of other are a subset of the dimensions of self
+        and other is not batched, the entries of other are gathered at the
+        non-zero entries of self and the result is again sparse. Otherwise,
+        the multiplication is performed with the dense probability mass
+        function.
+
+        Args:
+            other: Multiplier for the discrete random variable.
+            out: An optional Numpy array for the non-zero entries of the
+                result.
+
+        Returns:
+            A new discrete random variable representing the multiplication.
+
+        """
+        if other.batched or not set(other.dim) <= set(self.dim):
+            return self.todense().multiply(other, out=out)
+
+        self._invalidate(out, other)
+        dtype = _result_type(self, other) if out is None else None
+        values = np.multiply(self.values, self._gather(other), out=out,
+                             dtype=dtype)
+        return SparseDiscrete(self.index, values, self.shape, *self.dim,
+                              dtype=values.dtype)
+
+    def normalize(self):
+        """Normalize probability mass function."""
+        total = np.sum(self.values, dtype=_accumulator(self.dtype))
+        values = self.values / np.abs(total)
+        return SparseDiscrete(self.index, values, self.shape, *self.dim,
+                              dtype=self.dtype)
+
+    def marginalize(self, *dims, normalize=True):
+        """Return the marginal for given dimensions.
+
+        The non-zero entries are summed up per state of the remaining
+        dimensions.
+
+        Args:
+            *dims: Instances of discrete random variables, which should be
+                marginalized out.
+            normalize: Boolean flag if probability mass function should be
+                normalized after marginalization.
+
+        Returns:
+            A new sparse discrete random variable representing the marginal.
+
+        """
+        new_dims = tuple(d for d in self.dim if d not in dims)
+        index, inverse = self._group(new_dims)
+        values = np.bincount(inverse, weights=self.values,
+                             minlength=index.shape[1])
+        if normalize:
+            values /= np.sum(values)
+
+        shape = tuple(s for s, d in zip(self.shape, self.dim) if d in new_dims)
+        return SparseDiscrete(index, values, shape, *new_dims,
+                              dtype=self.dtype)
+
+    def maximize(self, *dims, normalize=True):
+        """Return the maximum for given dimensions.
+
+        The maximum of the non-zero entries is searched per state of the
+        remaining dimensions. Omitted entries are zero and therefore never
+        exceed the non-zero entries of a probability mass function.
+
+        Args:
+            *dims: Instances of discrete random variables, which should be
+                maximized out.
+            normalize: Boolean flag if probability mass function should be
+                normalized after marginalization.
+
+        Returns:
+            A new sparse discrete random variable representing the maximum.
+
+        """
+        new_dims = tuple(d for d in self.dim if d not in dims)
+        index, inverse = self._group(new_dims)
+        values = np.full(index.shape[1], -np.inf, dtype=self.dtype)
+        np.maximum.at(values, inverse, self.values)
+        if normalize:
+            values /= np.sum(values, dtype=_accumulator(self.dtype))
+
+        shape = tuple(s for s, d in zip(self.shape, self.dim) if d in new_dims)
+        return SparseDiscrete(index, values, shape, *new_dims,
+                              dtype=self.dtype)
+
+    def argmax(self, dim=None):
+        """Return the dimension index of the maximum.
+
+        Args:
+            dim: An optional discrete random variable along a maximization
+                should be performed and the maximum is searched over the
+                remaining dimensions. In the case of None, the maximum is
+                search along all dimensions.
+
+        Returns:
+            An integer representing the dimension of the maximum.
+
+        """
+        if dim is None:
+            return tuple(self.index[:, np.argmax(self.values)])
+        m = self.maximize(dim, normalize=False)
+        return np.ravel_multi_index(tuple(m.index[:, np.argmax(m.values)]),
+                                    m.shape)
+
+    def contract(self, *others, dims=(), path=None):
+        """Return the product with others summed over all but given dims.
+
+        The entries of all others are gathered at the non-zero entries and
+        the products are accumulated over the given dimensions. The result is
+        a dense discrete random variable.
+
+        Args:
+            *others: Discrete random variables over subsets of the dimensions,
+                which should be multiplied.
+            dims: Variables, which are kept in the result.
+            path: Ignored, since no contraction path is needed.
+
+        Returns:
+            A new discrete random variable over the given dimensions.
+
+        """
+        if not all(set(o.dim) <= set(self.dim) for o in others):
+            return self.todense().contract(*others, dims=dims)
+
+        values = self.values
+        for o in others:
+            values = values * self._gather(o)
+        dtype = values.dtype
+
+        shape = tuple(self.shape[self.dim.index(d)] for d in dims)
+        size = int(np.prod(shape))
+        if values.ndim > 1:  # Batched
+            pmf = np.zeros((values.shape[0], size), dtype=_accumulator(dtype))
+            np.add.at(pmf, (slice(None), self._keys(dims)), values)
+            return Discrete(pmf.reshape((-1,) + shape), *dims, batched=True,
+                            dtype=dtype)
+
+        pmf = np.bincount(self._keys(dims), weights=values, minlength=size)
+        return Discrete(pmf.reshape(shape), *dims, dtype=dtype)
+
+    def contraction_path(self, *others, dims=()):
+        """Return None, since no contraction path is needed."""
+        return None
+
+
+def _interleave(arrays, inputs, output):
+    """Return interleaved operands for numpy.einsum in sublist format."""
+    operands = []
+    for a, i in zip(arrays, inputs):
+        operands.append(a)
+        operands.append(i)
+    operands.append(output)
+    return operands
+
+
+def _logsumexp(a, axis=None, keepdims=False):
+    """Return the logarithm of the sum of exponentials along given axes.
+
+    The maximum is subtracted before exponentiation for numerical stability.
+
+    """
+    m = np.amax(a, axis=axis, keepdims=True)
+    m = np.where(np.isfinite(m), m, 0).astype(a.dtype)
+    with np.errstate(divide='ignore'):
+        s = np.sum(np.exp(a - m), axis=axis, keepdims=True,
+                   dtype=_accumulator(a.dtype))
+        s = (np.log(s) + m).astype(a.dtype)
+    if keepdims:
+        return s
+    if axis is None:
+        return s.item()
+    return np.squeeze(s, axis=axis)
+
+
+def _variable_axes(pmf, batched):
+    """Return all axes of a Numpy array except the batch dimension."""
+    return tuple(range(int(batched), np.ndim(pmf)))
+
+
+def _total(pmf, batched):
+    """Return the sum over all variables (per batch) with kept dimensions."""
+    return np.sum(pmf, axis=_variable_axes(pmf, batched), keepdims=True,
+                  dtype=_accumulator(np.result_type(pmf)))
+
+
+def _unravel_argmax(pmf, batched):
+    """Return the states of the maximum (per batch) as a tuple."""
+    if batched:
+        flat = np.argmax(np.reshape(pmf, (pmf.shape[0], -1)), axis=1)
+        return np.unravel_index(flat, pmf.shape[1:])
+    return np.unravel_index(np.argmax(pmf), np.shape(pmf))
+
+
+def _max_argmax(pmf, axes):
+    """Return the maximum along axes and the flat index of the maximum.
+
+    The given axes are moved to the end and flattened, so that a single
+    reduction yields the maximum and its argument.
+
+    """
+    kept = [a for a in range(np.ndim(pmf)) if a not in axes]
+    moved = np.transpose(pmf, kept + list(axes))
+    flat = np.reshape(moved, moved.shape[:len(kept)] + (-1,))
+    index = np.argmax(flat, axis=-1)
+    maximum = np.take_along_axis(flat, index[..., None], axis=-1)[..., 0]
+    return maximum, index.astype(np.min_scalar_type(flat.shape[-1] - 1))
+
+
+def _flat_argmax(pmf, batched):
+    """Return the flat index of the maximum (per batch)."""
+    if batched:
+        return np.argmax(np.reshape(pmf, (pmf.shape[0], -1)), axis=1)
+    return np.argmax(pmf)
+
+
+def _broadcast(pmf, dim, dims, batched=False, batch=False):
+    """Return a view of a probability mass function aligned with dims.
+
+    The axes of the probability mass function are transposed into the order
+    of the given dimensions and missing dimensions are inserted with a size
+    of one. No data is copied.
+
+    Args:
+        pmf: A Numpy array representing the probability mass function.
+        dim: Variables of the probability mass function.
+        dims: Variables of the aligned view, which includes dim.
+        batched: Boolean flag if the probability mass function is batched.
+        batch: Boolean flag if the aligned view has a batch dimension.
+
+    Returns:
+        A Numpy array, which is a view of the probability mass function.
+
+    """
+    axes = [dim.index(d) + batched for d in dims if d in dim]
+    shape = [pmf.shape[dim.index(d) + batched] if d in dim else 1
+             for d in dims]
+    if batched:
+        axes = [0] + axes
+        shape = [pmf.shape[0]] + shape
+    elif batch:
+        shape = [1] + shape
+    return np.transpose(pmf, axes).reshape(shape)
+
+
+def _cholesky(A):
+    """Return the lower Cholesky factor of a matrix.
+
+    Returns:
+        The lower triangular Cholesky factor or None if the matrix is not
+        finite, not symmetric or not positive definite.
+
+    """
+    if not np.all(np.isfinite(A)) \
+            or not np.allclose(A, np.swapaxes(A, -1, -2)):
+        return None
+    try:
+        return np.linalg.cholesky(A)
+    except np.linalg.LinAlgError:
+        return None
+
+
+def _block(M, rows, cols):
+    """Return the block of a (stacked) matrix for given rows and columns."""
+    return M[..., rows, :][..., :, cols]
+
+
+def _broadcast_batch(*arrays):
+    """Broadcast the batch dimensions of (stacked) matrices.
+
+    Args:
+        *arrays: Numpy arrays, whose last two dimensions are matrix
+            dimensions and whose leading dimensions are batch dimensions.
+
+    Returns:
+        A list of (read-only) Numpy arrays with equal batch dimensions.
+
+    """
+    shape = np.broadcast_shapes(*(A.shape[:-2] for A in arrays))
+    return [np.broadcast_to(A, shape + A.shape[-2:]) for A in arrays]
+
+
+def _schur(M, v, a, b):
+    """Eliminate the block b of a matrix and a vector by Schur complement.
+
+    Only the block M_bb is factorized. If the block is singular, the
+    pseudo-inverse is used instead.
+
+    Args:
+        M: A Numpy array representing the (stacked) matrix.
+        v: A Numpy array representing the (stacked) column vector.
+        a: Indices of the kept block.
+        b: Indices of the eliminated block.
+
+    Returns:
+        A tuple with M_aa - M_ab M_bb^-1 M_ba and v_a - M_ab M_bb^-1 v_b.
+
+    """
+    M_ab = _block(M, a, b)
+    M_bb = _block(M, b, b)
+    rhs = np.concatenate(_broadcast_batch(_block(M, b, a), v[..., b, :]),
+                         axis=-1)
+    try:
+        X = np.linalg.solve(M_bb, rhs)
+    except np.linalg.LinAlgError:
+        X = np.matmul(np.linalg.pinv(M_bb), rhs)
+    Y = np.matmul(M_ab, X)
+    return _block(M, a, a) - Y[..., :len(a)], v[..., a, :] - Y[..., len(a):]
+
+
+def _inverse(A, L=None):
+    """Return the inverse of a matrix.
+
+    Args:
+        A: A Numpy array representing the matrix.
+        L: An optional lower Cholesky factor of the matrix. In the case of
+            None, the inverse is computed by an LU factorization.
+
+    Returns:
+        A Numpy array representing the inverse.
+
+    """
+    if L is None:
+        return np.linalg.inv(A)
+    L_inv = np.linalg.inv(L)
+    return np.matmul(np.swapaxes(L_inv, -1, -2), L_inv)
+
+
+class Gaussian(RandomVariable):
+
+    """Class for Gaussian random variables.
+
+    A Gaussian random variable is defined by a mean vector and a covariance
+    matrix. In addition, each dimension of the mean vector and the covariance
+    matrix has to be associated with a variable. The variable is
+    represented by a variable node of the comprehensive factor graph.
+
+    The Gaussian random variable keeps the parameterization it was built in,
+    i.e. either the moment form (mean vector and covariance matrix) or the
+    information form (precision matrix and precision-mean vector). The other
+    form is derived lazily from a cached Cholesky factorization of the stored
+    matrix.
+
+    A batched Gaussian random variable stores stacked parameters, i.e. arrays
+    of shape (N, d, 1) and (N, d, d), and represents N independent Gaussian
+    random variables over the same variables. All operations are performed
+    by batched Numpy routines.
+
+    """
+
+    def __init__(self, raw_mean, raw_cov, *args, batched=False, dtype=None):
+        """Initialize a Gaussian random variable.
+
+        Create a new Gaussian random variable with the given mean vector and
+        the given covariance matrix over the given variable nodes.
+
+        Args:
+            raw_mean: A Numpy array representing the mean vector.
+            raw_cov: A Numpy array representing the covariance matrix.
+            *args: Instances of the class VNode representing the variables of
+                the mean vector and covariance matrix, respectively. The number
+                of the positional arguments must match the number of dimensions
+                of the Numpy arrays.
+            batched: Boolean flag if the first dimension of the Numpy arrays
+                is a batch dimension.
+            dtype: An optional floating-point Numpy data type. In the case of
+                None, the data type of floating-point Numpy arrays or else
+                the default data type is used.
+
+        Raises:
+            ParameterException: An error occurred initializing with invalid
+                parameters.
+
+        """
+        self._dtype = _floating(dtype, raw_mean, raw_cov)
+        self._batched = bool(batched)
+        self._set_moment(None, None)
+
+        if raw_mean is not None and raw_cov is not None:
+            mean = np.asarray(raw_mean, dtype=self._dtype)
+            cov = np.asarray(raw_cov, dtype=self._dtype)
+            self._check(mean, cov, args)
+            self._set_moment(mean, cov)
+
+        self._dim = args
+
+    def _check(self, vector, matrix, dims):
+        """Validate the shapes of a (stacked) vector and matrix.
+
+        Raises:
+            ParameterException: An error occurred if the shapes do not match
+                each other, the batch flag or the number of dimensions.
+
+        """
+        ndim = 2 + self._batched
+        if np.ndim(vector) != ndim or np.ndim(matrix) != ndim:
+            raise ParameterException('Dimension mismatch.')
+        if vector.shape[:-1] != matrix.shape[:-1]:
+            raise ParameterException('Dimension mismatch.')
+        if matrix.shape[-1] != len(dims):
+            raise ParameterException('Dimension mismatch.')
+
+    @classmethod
+    def unity(cls, *args):
+        """Initialize unit element of a Gaussian random variable.
+
+        Args:
+            *args: Instances of the class VNode representing the variables of
+                the mean vector and covariance matrix, respectively. The number
+                of the positional arguments must match the number of dimensions
+                of the Numpy arrays.
+
+        Raises:
+            ParameterException: An error occurred initializing with invalid
+                parameters.
+
+        """
+        n = len(args)
+        return cls(np.zeros((n, 1)), np.diag(np.ones(n) * np.Inf), *args,
+                   dtype=_default_dtype)
+
+    @classmethod
+    def inf_form(cls, raw_W, raw_Wm, *args, batched=False, dtype=None):
+        """Initialize a Gaussian random variable using the information form.
+
+        Create a new Gaussian random variable with the given mean vector and
+        the given covariance matrix over the given variable nodes.
+
+        Args:
+            raw_W: A Numpy array representing the precision matrix.
+            raw_Wm: A Numpy array representing the precision-mean vector.
+            *args: Instances of the class VNode representing the variables of
+                the mean vector and covariance matrix, respectively. The number
+                of the positional arguments must match the number of dimensions
+                of the Numpy arrays.
+            batched: Boolean flag if the first dimension of the Numpy arrays
+                is a batch dimension.
+            dtype: An optional floating-point Numpy data type. In the case of
+                None, the data type of floating-point Numpy arrays or else
+                the default data type is used.
+
+        Raises:
+            ParameterException: An error occurred initializing with invalid
+                parameters.
+
+        """
+        g = cls(None, None, *args, batched=batched,
+                dtype=_floating(dtype, raw_W, raw_Wm))
+        W = np.asarray(raw_W, dtype=g.dtype)
+        Wm = np.asarray(raw_Wm, dtype=g.dtype)
+        g._check(Wm, W, args)
+        g._set_canonical(W, Wm)
+        return g
+
+    def _set_moment(self, mean, cov):
+        """Set the moment form and invalidate all derived parameters."""
+        self._mean, self._cov = mean, cov
+        self._W, self._Wm = None, None
+        self._moment = True
+        self._factor = None
+
+    def _set_canonical(self, W, Wm):
+        """Set the information form and invalidate all derived parameters."""
+        self._mean, self._cov = None, None
+        self._W, self._Wm = W, Wm
+        self._moment = False
+        self._factor = None
+
+    def _chol_factor(self):
+        """Return the Cholesky factor of the stored matrix.
+
+        The factor of the stored covariance or precision matrix is computed
+        once. It is None if the stored matrix is not symmetric positive
+        definite.
+
+        """
+        if self._factor is None:
+            A = self._cov if self._moment else self._W
+            self._factor = (_cholesky(A.astype(_accumulator(self.dtype))),)
+        return self._factor[0]
+
+    def _inverse(self, A):
+        """Return the inverse of the stored matrix A."""
+        A = A.astype(_accumulator(self.dtype))
+        return _inverse(A, self._chol_factor()).astype(self.dtype)
+
+    @property
+    def mean(self):
+        if self._mean is None:
+            self._mean = np.matmul(self.cov, self._Wm)
+        return self._mean
+
+    @property
+    def cov(self):
+        if self._cov is None:
+            self._cov = self._inverse(self._W)
+        return self._cov
+
+    @property
+    def precision(self):
+        if self._W is None:
+            self._W = self._inverse(self._cov)
+        return self._W
+
+    @property
+    def precision_mean(self):
+        if self._Wm is None:
+            self._Wm = np.matmul(self.precision, self._mean)
+        return self._Wm
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def batched(self):
+        return self._batched
+
+    @property
+    def batch_size(self):
+        return self.precision.shape[0] if self.batched else None
+
+    @property
+    def dim(self):
+        return self._dim
+
+    def __str__(self):
+        """Return string representation of the Gaussian random variable."""
+        mean = np.array2string(self.mean, separator=',', sign=' ')
+        cov = np.array2string(self.cov, separator=',', sign=' ')
+        return "%s\n%s" % (mean, cov)
+
+    def __add__(self, other):
+        """Add other to self and return the result.
+
+        Args:
+            other: Summand for the Gaussian random variable.
+
+        Returns:
+            A new Gaussian random variable representing the summation.
+
+        """
+        return Gaussian(self.mean + other.mean,
+                        self.cov + other.cov,
+                        *self.dim, batched=self.batched or other.batched,
+                        dtype=self.dtype)
+
+    def __sub__(self, other):
+        """Subtract other from self and return the result.
+
+        Args:
+            other: Subrahend for the Gaussian random variable.
+
+        Returns:
+            A new Gaussian random variable representing the subtraction.
+
+        """
+        return Gaussian(self.mean - other.mean,
+                        self.cov - other.cov,
+                        *self.dim, batched=self.batched or other.batched,
+                        dtype=self.dtype)
+
+    def __mul__(self, other):
+        """Multiply other with self and return the result.
+
+        The multiplication is performed in the information form. If the
+        dimensions differ, both operands are embedded into the union of
+        dimensions (with zero precision for missing dimensions).
+
+        The result is batched if any of the operands is batched.
+
+        Args:
+            other: Multiplier for the Gaussian random variable.
+
+        Returns:
+            A new Gaussian random variable representing the multiplication.
+
+        """
+        batched = self.batched or other.batched
+
+        if self.dim == other.dim:
+            W = self.precision + other.precision
+            Wm = self.precision_mean + other.precision_mean
+            return Gaussian.inf_form(W, Wm, *self.dim, batched=batched,
+                                     dtype=W.dtype)
+
+        if len(other.dim) > len(self.dim):
+            dims = other.dim + tuple(d for d in self.dim
+                                     if d not in other.dim)
+        else:
+            dims = self.dim + tuple(d for d in other.dim
+                                    if d not in self.dim)
+
+        W_a, Wm_a = self._embed(dims)
+        W_b, Wm_b = other._embed(dims)
+        W = W_a + W_b
+        return Gaussian.inf_form(W, Wm_a + Wm_b, *dims, batched=batched,
+                                 dtype=W.dtype)
+
+    def _embed(self, dims):
+        """Return the information form embedded into the given dimensions.
+
+        Args:
+            dims: Variables, which include the dimensions of self.
+
+        Returns:
+            A tuple with the embedded precision matrix and precision-mean
+            vector.
+
+        """
+        idx = [dims.index(d) for d in self.dim]
+        W, Wm = self.precision, self.precision_mean
+        n = len(dims)
+
+        W_e = np.zeros(W.shape[:-2] + (n, n), dtype=W.dtype)
+        W_e[..., np.array(idx)[:, None], np.array(idx)] = W
+        Wm_e = np.zeros(Wm.shape[:-2] + (n, 1), dtype=Wm.dtype)
+        Wm_e[..., idx, :] = Wm
+        return W_e, Wm_e
+
+    def __iadd__(self, other):
+        """Method for augmented addition.
+
+        Args:
+            other: Summand for the Gaussian random variable.
+
+        Returns:
+            A new Gaussian random variable representing the summation.
+
+        """
+        return self.__add__(other)
+
+    def __isub__(self, other):
+        """Method for augmented subtraction.
+
+        Args:
+            other: Subtrahend for the Gaussian random variable.
+
+        Returns:
+            A new Gaussian random variable representing the subtraction.
+
+        """
+        return self.__sub__(other)
+
+    def __imul__(self, other):
+        """Method for augmented multiplication.
 
         Args:
             other: Multiplier for the Gaussian random variable.
@@ -568,8 +1898,9 @@ class Gaussian(RandomVariable):
         equal.
 
         """
-        return np.allclose(self._W, other._W) \
-            and np.allclose(self._Wm, other._Wm) \
+        return self.batched == other.batched \
+            and np.allclose(self.precision, other.precision) \
+            and np.allclose(self.precision_mean, other.precision_mean) \
             and self.dim == other.dim
 
     def normalize(self):
@@ -592,18 +1923,29 @@ class Gaussian(RandomVariable):
             A new Gaussian random variable representing the marginal.
 
         """
-        axis = tuple(idx for idx, d in enumerate(self.dim) if d not in dims)
-        mean = self.mean[np.ix_(axis, [0])]
-        cov = self.cov[np.ix_(axis, axis)]
-
-        new_dims = tuple(d for d in self.dim if d not in dims)
-        return Gaussian(mean, cov, *new_dims)
+        a = [idx for idx, d in enumerate(self.dim) if d not in dims]
+        b = [idx for idx, d in enumerate(self.dim) if d in dims]
+        new_dims = tuple(self.dim[idx] for idx in a)
+
+        if self._moment:
+            # Moment form: marginal is given by the sub-blocks
+            mean = self.mean[..., a, :]
+            cov = _block(self.cov, a, a)
+            return Gaussian(mean, cov, *new_dims, batched=self.batched,
+                            dtype=self.dtype)
+
+        # Information form: Schur complement of the eliminated block
+        W, Wm = _schur(self.precision, self.precision_mean, a, b)
+        return Gaussian.inf_form(W, Wm, *new_dims, batched=self.batched,
+                                 dtype=self.dtype)
 
     def maximize(self, *dims):
         """Return the maximum for given dimensions.
 
         The probability density function of the Gaussian random variable
-        is maximized along the given dimensions.
+        is maximized along the given dimensions. The maximum of a Gaussian
+        probability density function over some of its dimensions is
+        proportional to the marginal.
 
         Args:
             *dims: Instances of Gaussian random variables, which should be
@@ -613,12 +1955,49 @@ class Gaussian(RandomVariable):
             A new Gaussian random variable representing the maximum.
 
         """
-        axis = tuple(idx for idx, d in enumerate(self.dim) if d not in dims)
-        mean = self.mean[np.ix_(axis, [0])]
-        cov = self.cov[np.ix_(axis, axis)]
+        return self.marginalize(*dims)
 
-        new_dims = tuple(d for d in self.dim if d not in dims)
-        return Gaussian(mean, cov, *new_dims)
+    def condition(self, *dims, values):
+        """Return the conditional for given dimensions and values.
+
+        The probability density function of the Gaussian random variable is
+        conditioned on the given dimensions taking the given values. In the
+        information form, no factorization is needed. In the moment form,
+        only the block of the given dimensions is factorized.
+
+        Args:
+            *dims: Instances of Gaussian random variables, which are
+                observed.
+            values: A Numpy array (column vector) with the observed values
+                in the order of the given dimensions. For batched random
+                variables, the values may be stacked (one per batch).
+
+        Returns:
+            A new Gaussian random variable representing the conditional.
+
+        """
+        a = [idx for idx, d in enumerate(self.dim) if d not in dims]
+        b = [self.dim.index(d) for d in dims]
+        new_dims = tuple(self.dim[idx] for idx in a)
+        x = np.asarray(values, dtype=self.dtype)
+
+        # Stacked values give a batched conditional
+        batched = self.batched or x.ndim > 2
+
+        if self._moment:
+            # Moment form: Schur complement of the observed block
+            d = np.zeros(x.shape[:-2] + self.mean.shape[-2:], dtype=x.dtype)
+            d[..., b, :] = x
+            cov, mean = _schur(self.cov, self.mean - d, a, b)
+            mean, cov = map(np.array, _broadcast_batch(mean, cov))
+            return Gaussian(mean, cov, *new_dims, batched=batched,
+                            dtype=self.dtype)
+
+        W = self.precision
+        Wm = self.precision_mean[..., a, :] - np.matmul(_block(W, a, b), x)
+        Wm, W = map(np.array, _broadcast_batch(Wm, _block(W, a, a)))
+        return Gaussian.inf_form(W, Wm, *new_dims, batched=batched,
+                                 dtype=self.dtype)
 
     def argmax(self, dim=None):
         """Return the dimension index of the maximum.
@@ -647,3 +2026,280 @@ class Gaussian(RandomVariable):
 
         """
         raise NotImplementedError
+
+    def to_sqrt(self):
+        """Return the random variable in the square-root information form.
+
+        The square root of the precision matrix is computed from the cached
+        Cholesky factor of the stored matrix. If the stored matrix is not
+        positive definite (e.g. for the unit element), the square root is
+        computed by an eigendecomposition of the precision matrix.
+
+        Returns:
+            A new SqrtGaussian random variable.
+
+        """
+        acc = _accumulator(self.dtype)
+        L = self._chol_factor()
+
+        if L is not None and self._moment:
+            # Moment form: W = L^-T L^-1
+            R = np.linalg.inv(L)
+            z = np.matmul(R, self._mean.astype(acc))
+        elif L is not None:
+            # Information form: W = L L^T
+            R = np.swapaxes(L, -1, -2)
+            z = np.linalg.solve(L, self._Wm.astype(acc))
+        else:
+            R, z = _eigh_sqrt(self.precision.astype(acc),
+                              self.precision_mean.astype(acc))
+
+        return SqrtGaussian(R, z, *self.dim, batched=self.batched,
+                            dtype=self.dtype)
+
+
+def _eigh_sqrt(W, Wm):
+    """Return a square root of a positive semi-definite precision matrix.
+
+    Negative eigenvalues caused by rounding errors are clipped to zero.
+
+    Args:
+        W: A Numpy array representing the precision matrix.
+        Wm: A Numpy array representing the precision-mean vector.
+
+    Returns:
+        A tuple with a square root R of W (i.e. W = R^T R) and a vector z with
+        Wm = R^T z in the range of R.
+
+    """
+    lam, V = np.linalg.eigh(W)
+    s = np.sqrt(np.clip(lam, 0, None))
+    inv_s = np.divide(1, s, out=np.zeros_like(s), where=s > 0)
+    R = s[..., :, None] * np.swapaxes(V, -1, -2)
+    z = inv_s[..., :, None] * np.matmul(np.swapaxes(V, -1, -2), Wm)
+    return R, z
+
+
+def _triangularize(A, n):
+    """Return the upper triangular factor of a QR decomposition.
+
+    The factor is padded with zero rows, so that it has (at least) n rows.
+    The orthogonal factor is never formed.
+
+    Args:
+        A: A Numpy array representing the (stacked) matrix.
+        n: The minimum number of rows of the result.
+
+    Returns:
+        A Numpy array representing the upper triangular factor.
+
+    """
+    R = np.linalg.qr(A, mode='r')
+    if R.shape[-2] < n:
+        pad = np.zeros(R.shape[:-2] + (n - R.shape[-2], R.shape[-1]),
+                       dtype=R.dtype)
+        R = np.concatenate((R, pad), axis=-2)
+    return R
+
+
+class SqrtGaussian(Gaussian):
+
+    """Class for Gaussian random variables in square-root information form.
+
+    A square-root Gaussian random variable is defined by a square root R of
+    the precision matrix W = R^T R and a vector z with W m = R^T z. Products
+    and marginals are computed by QR decompositions of the stacked square
+    roots, which keeps the precision matrix positive semi-definite by
+    construction and never inverts a matrix. The moment form and the
+    information form are derived lazily.
+
+    """
+
+    def __init__(self, raw_R, raw_z, *args, batched=False, dtype=None):
+        """Initialize a square-root Gaussian random variable.
+
+        Args:
+            raw_R: A Numpy array representing the (upper triangular) square
+                root of the precision matrix.
+            raw_z: A Numpy array representing the transformed mean vector.
+            *args: Instances of the class VNode representing the variables of
+                the square root, respectively. The number of the positional
+                arguments must match the number of columns of the square root.
+            batched: Boolean flag if the first dimension of the Numpy arrays
+                is a batch dimension.
+            dtype: An optional floating-point Numpy data type. In the case of
+                None, the data type of floating-point Numpy arrays or else
+                the default data type is used.
+
+        Raises:
+            ParameterException: An error occurred initializing with invalid
+                parameters.
+
+        """
+        self._dtype = _floating(dtype, raw_R, raw_z)
+        self._batched = bool(batched)
+        self._R = np.asarray(raw_R, dtype=self._dtype)
+        self._z = np.asarray(raw_z, dtype=self._dtype)
+        self._set_moment(None, None)
+        self._check(self._z, self._R, args)
+        self._dim = args
+
+    @classmethod
+    def unity(cls, *args):
+        """Initialize unit element of a square-root Gaussian random variable.
+
+        Args:
+            *args: Instances of the class VNode representing the variables of
+                the square root.
+
+        """
+        n = len(args)
+        return cls(np.zeros((n, n)), np.zeros((n, 1)), *args,
+                   dtype=_default_dtype)
+
+    @property
+    def sqrt_precision(self):
+        return self._R
+
+    @property
+    def sqrt_precision_mean(self):
+        return self._z
+
+    @property
+    def mean(self):
+        if self._mean is None:
+            R = self._R.astype(_accumulator(self.dtype))
+            z = self._z.astype(R.dtype)
+            try:
+                mean = np.linalg.solve(R, z)
+            except np.linalg.LinAlgError:
+                mean = np.matmul(np.linalg.pinv(R), z)
+            self._mean = mean.astype(self.dtype)
+        return self._mean
+
+    @property
+    def cov(self):
+        if self._cov is None:
+            R_inv = np.linalg.inv(self._R.astype(_accumulator(self.dtype)))
+            cov = np.matmul(R_inv, np.swapaxes(R_inv, -1, -2))
+            self._cov = cov.astype(self.dtype)
+        return self._cov
+
+    @property
+    def precision(self):
+        if self._W is None:
+            self._W = np.matmul(np.swapaxes(self._R, -1, -2), self._R)
+        return self._W
+
+    @property
+    def precision_mean(self):
+        if self._Wm is None:
+            self._Wm = np.matmul(np.swapaxes(self._R, -1, -2), self._z)
+        return self._Wm
+
+    def _reduce(self, R, z, n, dims):
+        """Triangularize stacked square roots and return the result.
+
+        Args:
+            R: A Numpy array with stacked square roots (columns in the order
+                of dims).
+            z: A Numpy array with the stacked transformed mean vectors.
+            n: Number of leading columns to be eliminated.
+            dims: Variables of the columns.
+
+        Returns:
+            A new square-root Gaussian random variable over the remaining
+            dimensions.
+
+        """
+        acc = _accumulator(self.dtype)
+        A = np.concatenate(_broadcast_batch(R, z), axis=-1).astype(acc)
+        T = _triangularize(A, A.shape[-1] - 1)
+        m = len(dims)
+        return SqrtGaussian(T[..., n:m, n:m], T[..., n:m, m:],
+                            *dims[n:], batched=T.ndim > 2, dtype=self.dtype)
+
+    def __mul__(self, other):
+        """Multiply other with self and return the result.
+
+        The square roots of both operands are embedded into the union of
+        dimensions, stacked and triangularized by a QR decomposition. This is
+        a rank update of the square root.
+
+        Args:
+            other: Multiplier for the Gaussian random variable.
+
+        Returns:
+            A new square-root Gaussian random variable representing the
+            multiplication.
+
+        """
+        other = other.to_sqrt()
+
+        if len(other.dim) > len(self.dim):
+            dims = other.dim + tuple(d for d in self.dim
+                                     if d not in other.dim)
+        else:
+            dims = self.dim + tuple(d for d in other.dim
+                                    if d not in self.dim)
+
+        R = np.concatenate(_broadcast_batch(self._embed_sqrt(dims),
+                                            other._embed_sqrt(dims)), axis=-2)
+        z = np.concatenate(_broadcast_batch(self._z, other._z), axis=-2)
+        return self._reduce(R, z, 0, dims)
+
+    def _embed_sqrt(self, dims):
+        """Return the square root embedded into the given dimensions."""
+        idx = [dims.index(d) for d in self.dim]
+        R = np.zeros(self._R.shape[:-1] + (len(dims),), dtype=self._R.dtype)
+        R[..., idx] = self._R
+        return R
+
+    def marginalize(self, *dims, normalize=True):
+        """Return the marginal for given dimensions.
+
+        The columns of the marginalized dimensions are moved to the front and
+        the square root is triangularized. The trailing diagonal block is the
+        square root of the Schur complement of the precision matrix.
+
+        Args:
+            *dims: Instances of Gaussian random variables, which should be
+                marginalized out.
+            normalize: Boolean flag if probability mass function should be
+                normalized after marginalization.
+
+        Returns:
+            A new square-root Gaussian random variable representing the
+            marginal.
+
+        """
+        b = [idx for idx, d in enumerate(self.dim) if d in dims]
+        a = [idx for idx, d in enumerate(self.dim) if d not in dims]
+        order = tuple(self.dim[idx] for idx in b + a)
+        return self._reduce(self._R[..., b + a], self._z, len(b), order)
+
+    def condition(self, *dims, values):
+        """Return the conditional for given dimensions and values.
+
+        Args:
+            *dims: Instances of Gaussian random variables, which are
+                observed.
+            values: A Numpy array (column vector) with the observed values
+                in the order of the given dimensions.
+
+        Returns:
+            A new square-root Gaussian random variable representing the
+            conditional.
+
+        """
+        a = [idx for idx, d in enumerate(self.dim) if d not in dims]
+        b = [self.dim.index(d) for d in dims]
+        x = np.asarray(values, dtype=self.dtype)
+
+        z = self._z - np.matmul(self._R[..., b], x)
+        return self._reduce(self._R[..., a], z, 0,
+                            tuple(self.dim[idx] for idx in a))
+
+    def to_sqrt(self):
+        """Return the random variable in the square-root information form."""
+        return self
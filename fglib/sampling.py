@@ -0,0 +1,245 @@
+"""Module for sampling.
+
+This module contains samplers for factor graphs with discrete factors. The
+samples of all variable nodes are drawn as Numpy arrays of state indices, so
+that thousands of samples (or Markov chains) are processed by vectorized
+operations instead of a loop in Python.
+
+Forward sampling draws independent and exact samples from tree structured
+factor graphs. Starting from a root node, each variable is sampled given its
+parent, using the messages left behind by the sum-product algorithm.
+
+Gibbs sampling draws dependent samples from arbitrary structured factor
+graphs. Each variable is resampled from its conditional distribution given
+all other variables. Variables of the same color of a graph coloring (e.g.
+the black and white nodes of a checkerboard for grids) do not share a factor
+and are resampled as a block.
+
+Functions:
+    forward_sampling: Exact forward sampling for tree structured graphs.
+    gibbs_sampling: Gibbs sampling with parallel Markov chains.
+
+"""
+
+import networkx as nx
+import numpy as np
+
+from . import elimination, inference, nodes, rv
+
+
+def forward_sampling(graph, samples, root=None, reuse=False, seed=None):
+    """Exact forward sampling.
+
+    Draw independent samples from the joint distribution of a tree
+    structured factor graph. A sum-product sweep is performed for each
+    connected component. Then, the root node is sampled from its marginal and
+    the variables of each factor node are sampled jointly given the parent
+    variable towards the root, weighted by the messages from the subtrees.
+
+    Args:
+        graph: A tree structured factor graph (or a forest) with discrete
+            factors without batch dimensions.
+        samples: Number of samples.
+        root: Optional root node of its connected component. In the case of
+            None, the first variable node of each component is used.
+        reuse: Boolean flag if the messages of previous sum-product sweeps
+            should be reused. Only the messages on the paths from nodes with
+            changed local evidence to the root node are recomputed. A
+            complete sweep is performed for connected components without a
+            previous sweep and if the graph was modified.
+        seed: Optional seed or Numpy random generator.
+
+    Returns:
+        A dictionary with the Numpy arrays of shape (samples,) of the state
+        indices of all variable nodes.
+
+    Raises:
+        ParameterException: An error occurred for a factor, which is not
+            discrete or which has a batch dimension.
+
+    """
+    _check(graph)
+    rng = np.random.default_rng(seed)
+    dtype = _dtype(graph)
+
+    values = {}
+    for component in nx.connected_components(graph):
+        vnodes = [v for v in graph.get_vnodes() if v in component]
+        if not vnodes:
+            continue
+        r = root if root in component else vnodes[0]
+        inference.belief_propagation(graph, r, incremental=reuse)
+
+        # Root node given the initial message and all incoming messages
+        logits = r.init.log_pmf
+        for n in r.neighbors():
+            logits = logits + graph[n][r]['object'].get_message(n, r).log_pmf
+        values[r] = _categorical(
+            rng, np.broadcast_to(logits, (samples,) + logits.shape))
+
+        # Variables of each factor node given its parent variable
+        for (u, f) in graph.schedule(r):
+            if u.type != nodes.NodeType.variable_node:
+                continue
+
+            dims = f.factor.dim
+            axis = dims.index(u)
+            children = dims[:axis] + dims[axis + 1:]
+            if not children:
+                continue
+            logits = _take(f.factor.log_pmf, axis, values[u])
+            for i, c in enumerate(children):
+                msg = graph[c][f]['object'].get_message(c, f).log_pmf
+                shape = (1,) * (i + 1) + msg.shape \
+                    + (1,) * (len(children) - i - 1)
+                logits = logits + msg.reshape(shape)
+
+            shape = logits.shape[1:]
+            index = _categorical(rng, logits.reshape(samples, -1))
+            for c, x in zip(children, np.unravel_index(index, shape)):
+                values[c] = x
+
+    return {v: values[v].astype(dtype) for v in graph.get_vnodes()}
+
+
+def gibbs_sampling(graph, samples, chains=1, burn_in=0, thinning=1,
+                   initial=None, seed=None):
+    """Gibbs sampling.
+
+    Draw samples from the joint distribution of an arbitrary structured
+    factor graph by running Markov chains in parallel. The state of all
+    chains is a single Numpy array of shape (chains, variables). The
+    variables are colored by a greedy coloring of the interaction graph, so
+    that variables of the same color do not share a factor. In each sweep,
+    all variables of a color are resampled together from the same state.
+
+    Args:
+        graph: A factor graph with discrete factors without batch
+            dimensions.
+        samples: Number of recorded samples per chain.
+        chains: Number of parallel Markov chains.
+        burn_in: Number of sweeps before the first recorded sample.
+        thinning: Number of sweeps between two recorded samples.
+        initial: Optional dictionary with the initial state indices of
+            variable nodes (a scalar or an array of shape (chains,)). All
+            other variables are initialized by samples of their normalized
+            initial messages.
+        seed: Optional seed or Numpy random generator.
+
+    Returns:
+        A dictionary with the Numpy arrays of shape (samples, chains) of the
+        state indices of all variable nodes.
+
+    Raises:
+        ParameterException: An error occurred for a factor, which is not
+            discrete or which has a batch dimension.
+
+    """
+    _check(graph)
+    rng = np.random.default_rng(seed)
+    variables = graph.get_vnodes()
+    column = {v: i for i, v in enumerate(variables)}
+    card = elimination.cardinalities(graph)
+
+    # Log-factors with the dimension of the variable moved to the end
+    terms = {v: [] for v in variables}
+    for d in [f.factor for f in graph.get_fnodes()] \
+            + [v.init for v in variables]:
+        log_pmf = d.log_pmf
+        for axis, v in enumerate(d.dim):
+            others = tuple(column[u] if log_pmf.shape[i] > 1 else None
+                           for i, u in enumerate(d.dim) if i != axis)
+            terms[v].append((np.moveaxis(log_pmf, axis, -1), others))
+
+    # Initial state
+    state = np.empty((chains, len(variables)), dtype=_dtype(graph))
+    for v in variables:
+        if initial is not None and v in initial:
+            state[:, column[v]] = initial[v]
+        else:
+            logits = np.broadcast_to(v.init.log_pmf, (chains, card[v]))
+            state[:, column[v]] = _categorical(rng, logits)
+
+    colors = nx.coloring.greedy_color(elimination.interaction_graph(graph),
+                                      strategy='saturation_largest_first')
+    blocks = [[v for v in variables if colors[v] == c]
+              for c in sorted(set(colors.values()))]
+
+    values = np.empty((samples,) + state.shape, dtype=state.dtype)
+    sweeps = burn_in + samples * thinning
+    for t in range(1, sweeps + 1):
+        for block in blocks:
+            update = [_categorical(rng, _conditional(state, card[v],
+                                                     terms[v]))
+                      for v in block]
+            for v, x in zip(block, update):
+                state[:, column[v]] = x
+
+        if t > burn_in and (t - burn_in) % thinning == 0:
+            values[(t - burn_in) // thinning - 1] = state
+
+    return {v: values[:, :, column[v]] for v in variables}
+
+
+def _check(graph):
+    """Raise an error for factors, which are not supported by the samplers."""
+    for d in [f.factor for f in graph.get_fnodes()] \
+            + [v.init for v in graph.get_vnodes()]:
+        if not isinstance(d, rv.Discrete) or d.batched:
+            raise rv.ParameterException('Sampling requires discrete '
+                                        'factors without batch dimensions.')
+
+
+def _dtype(graph):
+    """Return the smallest integer data type for all state indices."""
+    card = elimination.cardinalities(graph)
+    return np.min_scalar_type(max(card.values(), default=1) - 1)
+
+
+def _take(array, axis, index):
+    """Index an axis of an array and move it to the front.
+
+    Dimensions of size one are broadcast.
+
+    """
+    if array.shape[axis] == 1:
+        index = np.zeros_like(index)
+    return np.moveaxis(np.take(array, index, axis=axis), axis, 0)
+
+
+def _conditional(state, k, terms):
+    """Return the conditional log-probabilities of a variable.
+
+    Args:
+        state: Numpy array of the states of all chains.
+        k: Number of states of the variable.
+        terms: List of log-factors with the variable as last dimension and
+            the columns of the other variables (None for broadcasting).
+
+    Returns:
+        A Numpy array of shape (chains, k).
+
+    """
+    logits = np.zeros((len(state), k))
+    for log_pmf, others in terms:
+        index = tuple(0 if c is None else state[:, c] for c in others)
+        logits += log_pmf[index]
+    return logits
+
+
+def _categorical(rng, logits):
+    """Draw state indices from unnormalized log-probabilities.
+
+    Args:
+        rng: Numpy random generator.
+        logits: Numpy array of shape (n, k).
+
+    Returns:
+        A Numpy array of shape (n,) with the sampled indices.
+
+    """
+    with np.errstate(invalid='ignore'):
+        p = np.exp(logits - np.max(logits, axis=-1, keepdims=True))
+    cdf = np.cumsum(p, axis=-1)
+    u = rng.random((len(cdf), 1)) * cdf[:, -1:]
+    return np.minimum(np.sum(cdf <= u, axis=-1), cdf.shape[-1] - 1)
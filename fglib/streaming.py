@@ -0,0 +1,190 @@
+"""Module for streaming inference.
+
+This module contains a fixed-lag smoother for chain structured factor graphs
+(e.g. hidden Markov models), which grow by one time slice per observation.
+Only a window of the last time slices is kept as a factor graph. Older time
+slices are summarized by a boundary factor, which holds the forward message
+into the oldest time slice of the window.
+
+Classes:
+    SmootherStep: Beliefs of a single step of a fixed-lag smoother.
+    FixedLagSmoother: Class for fixed-lag smoothers of chains.
+
+Functions:
+    fixed_lag_smoothing: Fixed-lag smoothing of a stream of observations.
+
+"""
+
+from collections import deque, namedtuple
+
+from . import graphs, nodes, rv
+
+
+SmootherStep = namedtuple('SmootherStep', ['time', 'filtered', 'smoothed'])
+SmootherStep.__doc__ = """Beliefs of a single step of a fixed-lag smoother.
+
+Attributes:
+    time: Time index of the latest time slice.
+    filtered: Belief of the latest time slice given all observations so far.
+    smoothed: Belief of the time slice (time - lag) given all observations
+        so far. None, as long as fewer time slices have been observed.
+
+"""
+
+_Slice = namedtuple('_Slice', ['variable', 'factor', 'evidence'])
+
+
+class FixedLagSmoother:
+
+    """Class for fixed-lag smoothers of chains.
+
+    Each time slice consists of a variable node, a factor node connecting it
+    to the previous time slice (a prior or boundary factor for the oldest time
+    slice) and an optional factor node for the observation. The window holds
+    lag + 1 time slices, so that memory and work per step only depend on the
+    lag. Each step passes the forward messages into the new time slice and
+    the backward messages through the window. Messages are normalized to
+    avoid numerical underflow.
+
+    """
+
+    def __init__(self, prior, transition, likelihood, lag,
+                 rv_type=rv.Discrete):
+        """Initialize a fixed-lag smoother.
+
+        Args:
+            prior: Function returning the prior distribution for the variable
+                node of the first time slice.
+            transition: Function returning the factor for the variable nodes
+                of the previous and the current time slice.
+            likelihood: Function returning the factor for the variable node
+                of a time slice and an observation. An observation of None or
+                a factor of None skips the observation.
+            lag: Number of time slices between the latest time slice and the
+                smoothed time slice.
+            rv_type: Type of the random variables of the variable nodes.
+
+        """
+        if lag < 0:
+            raise ValueError('Lag must not be negative.')
+
+        self.prior = prior
+        self.transition = transition
+        self.likelihood = likelihood
+        self.lag = lag
+        self.rv_type = rv_type
+
+        self.graph = graphs.FactorGraph()
+        self.slices = deque()
+        self.time = -1
+
+    def _send(self, snode, tnode):
+        """Pass the (normalized) sum-product message from snode to tnode."""
+        msg = snode.spa(tnode).normalize()
+        self.graph[snode][tnode]['object'].set_message(snode, tnode, msg)
+
+    def _connect(self, fnode, *vnodes):
+        """Add a factor node connected to variable nodes."""
+        self.graph.set_node(fnode)
+        for v in vnodes:
+            self.graph.set_edge(v, fnode)
+
+    def update(self, observation):
+        """Add a time slice with an observation.
+
+        Args:
+            observation: Observation of the new time slice or None.
+
+        Returns:
+            A smoother step with the filtered and the smoothed belief.
+
+        """
+        self.time = t = self.time + 1
+        x = nodes.VNode("x%d" % t, self.rv_type)
+        self.graph.set_node(x)
+
+        # Forward messages into the new time slice
+        if self.slices:
+            prev = self.slices[-1].variable
+            f = nodes.FNode("f%d" % t, self.transition(prev, x))
+            self._connect(f, prev, x)
+            self._send(prev, f)
+        else:
+            f = nodes.FNode("f%d" % t, self.prior(x))
+            self._connect(f, x)
+        self._send(f, x)
+
+        e = None
+        factor = None if observation is None \
+            else self.likelihood(x, observation)
+        if factor is not None:
+            e = nodes.FNode("e%d" % t, factor)
+            self._connect(e, x)
+            self._send(e, x)
+
+        self.slices.append(_Slice(x, f, e))
+
+        # Replace the oldest time slice by a boundary factor
+        if len(self.slices) > self.lag + 1:
+            old = self.slices.popleft()
+            head = self.slices[0]
+            msg = self.graph[head.factor][head.variable]['object'].get_message(
+                head.factor, head.variable)
+            boundary = nodes.FNode("b%d" % (t - self.lag), msg)
+            self.graph.remove_nodes_from(
+                [n for n in old + (head.factor,) if n is not None])
+            self._connect(boundary, head.variable)
+            self._send(boundary, head.variable)
+            self.slices[0] = head._replace(factor=boundary)
+
+        # Backward messages through the window
+        for i in range(len(self.slices) - 1, 0, -1):
+            s = self.slices[i]
+            self._send(s.variable, s.factor)
+            self._send(s.factor, self.slices[i - 1].variable)
+
+        smoothed = self.slices[0].variable.belief() \
+            if len(self.slices) == self.lag + 1 else None
+        return SmootherStep(t, x.belief(), smoothed)
+
+    def beliefs(self):
+        """Return the beliefs of all time slices of the window.
+
+        Returns:
+            A dictionary with the smoothed beliefs keyed by time index.
+
+        """
+        first = self.time - len(self.slices) + 1
+        return {first + i: s.variable.belief()
+                for i, s in enumerate(self.slices)}
+
+    def run(self, observations):
+        """Generate smoother steps for an iterable of observations."""
+        for observation in observations:
+            yield self.update(observation)
+
+
+def fixed_lag_smoothing(observations, prior, transition, likelihood, lag,
+                        rv_type=rv.Discrete):
+    """Fixed-lag smoothing.
+
+    Perform streaming inference on a chain, which grows by one time slice
+    per observation. The observations are consumed lazily from an iterable.
+    Generate the filtered belief of the latest time slice and the smoothed
+    belief of the time slice lag steps before.
+
+    Args:
+        observations: Iterable of observations (see FixedLagSmoother.update).
+        prior: Function returning the prior distribution for the variable
+            node of the first time slice.
+        transition: Function returning the factor for the variable nodes of
+            the previous and the current time slice.
+        likelihood: Function returning the factor for the variable node of a
+            time slice and an observation.
+        lag: Number of time slices between the latest time slice and the
+            smoothed time slice.
+        rv_type: Type of the random variables of the variable nodes.
+
+    """
+    smoother = FixedLagSmoother(prior, transition, likelihood, lag, rv_type)
+    return smoother.run(observations)
@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from .. import aio, graphs, nodes, rv
+
+
+class TestAsync(unittest.TestCase):
+
+    def setUp(self):
+        # Create a star with input-output factor nodes (coroutine callbacks)
+        self.active = 0
+        self.peak = 0
+        self.delay = 0.01
+
+        async def callback(node, tnode):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(self.delay)
+            self.active -= 1
+            return nodes.FNode.spa(node, tnode)
+
+        rng = np.random.RandomState(0)
+        self.fg = graphs.FactorGraph()
+        self.x0 = nodes.IOVNode("x0", rv.Discrete)
+        self.x = [nodes.VNode("x%d" % i, rv.Discrete) for i in range(1, 5)]
+        self.fg.set_nodes([self.x0] + self.x)
+        for i, x in enumerate(self.x):
+            fn = nodes.IOFNode("f%d" % i, rv.Discrete(rng.rand(2, 3), x,
+                                                      self.x0), callback)
+            self.fg.set_node(fn)
+            self.fg.set_edges([(x, fn), (fn, self.x0)])
+
+    def _exact(self, x):
+        factors = [fn.factor for fn in self.fg.get_fnodes()]
+        return rv.Discrete.contract(*factors, dims=(x,)).normalize().pmf
+
+    def test_tree(self):
+        beliefs = asyncio.run(aio.async_belief_propagation(
+            self.fg, self.x0, all_marginals=True))
+        self.assertEqual(self.peak, 4)  # Messages of the leaves
+        for x in self.x + [self.x0]:
+            npt.assert_almost_equal(beliefs[x].pmf, self._exact(x))
+
+        # Concurrency limit
+        self.peak = 0
+        belief = asyncio.run(aio.async_belief_propagation(
+            self.fg, self.x0, concurrency=2))
+        self.assertEqual(self.peak, 2)
+        npt.assert_almost_equal(belief.pmf, self._exact(self.x0))
+
+    def test_timeout(self):
+        self.delay = 10
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(aio.async_belief_propagation(
+                self.fg, self.x0, timeout=0.05))
+        self.assertEqual(self.active, 4)  # Cancelled callbacks
+
+    def test_loopy(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(aio.async_loopy_belief_propagation(
+                self.fg, 10, damping=1.))
+
+        b, report = asyncio.run(aio.async_loopy_belief_propagation(
+            self.fg, 10, [self.x0], tolerance=1e-10, concurrency=3))
+        self.assertTrue(report.converged)
+        self.assertEqual(self.peak, 3)
+        npt.assert_almost_equal(b[self.x0][-1].pmf, self._exact(self.x0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from .. import gabp, graphs, nodes, rv
+
+
+class TestSolve(unittest.TestCase):
+
+    def setUp(self):
+        # Diagonally dominant system of a 10x10 grid
+        n = 10
+        rng = np.random.RandomState(0)
+        self.A = np.diag(4.5 + rng.rand(n * n))
+        for i in range(n):
+            for j in range(n):
+                k = i * n + j
+                for m in ((i + 1) * n + j if i + 1 < n else None,
+                          k + 1 if j + 1 < n else None):
+                    if m is not None:
+                        self.A[k, m] = self.A[m, k] = -rng.rand()
+        self.b = rng.randn(n * n)
+        self.x = np.linalg.solve(self.A, self.b)
+
+    def test_synchronous(self):
+        sol = gabp.solve(self.A, self.b)
+        self.assertTrue(sol.report.converged)
+        self.assertIsNone(sol.variance)
+        npt.assert_almost_equal(sol.mean, self.x)
+
+        # Coordinates of the upper triangle and damping
+        rows, cols = np.nonzero(np.triu(self.A))
+        sol = gabp.solve((rows, cols, self.A[rows, cols]), self.b,
+                         damping=0.3)
+        self.assertTrue(sol.report.converged)
+        npt.assert_almost_equal(sol.mean, self.x)
+
+        engine = gabp.GaussianGraph.from_system(self.A, self.b)
+        for damping in (-0.1, 1., 1.5):
+            with self.assertRaises(ValueError):
+                engine.iterate(damping)
+            with self.assertRaises(ValueError):
+                gabp.solve(self.A, self.b, damping=damping)
+
+    def test_residual(self):
+        sol = gabp.solve(self.A, self.b, schedule='residual',
+                         variances=True)
+        self.assertTrue(sol.report.converged)
+        npt.assert_almost_equal(sol.mean, self.x)
+        self.assertTrue(np.all(sol.variance > 0))
+
+        engine = gabp.GaussianGraph.from_system(self.A, self.b)
+        report = engine.propagate(max_updates=10)
+        self.assertEqual(report.iterations, 10)
+        self.assertFalse(report.converged)
+
+        with self.assertRaises(ValueError):
+            gabp.solve(self.A, self.b, schedule='unknown')
+
+    def test_tree(self):
+        # Marginal variances are exact for tridiagonal systems
+        A = np.diag(np.full(50, 2.)) + np.diag(np.full(49, -0.9), 1) \
+            + np.diag(np.full(49, -0.9), -1)
+        b = np.arange(50.)
+        sol = gabp.solve(A, b, variances=True)
+        npt.assert_almost_equal(sol.mean, np.linalg.solve(A, b))
+        npt.assert_almost_equal(sol.variance, np.diag(np.linalg.inv(A)))
+
+        # Residual updates stop at the fixed point without a tolerance
+        sol = gabp.solve(A, b, tolerance=None, schedule='residual')
+        self.assertTrue(sol.report.converged)
+        self.assertEqual(sol.report.residual, 0.)
+        self.assertLess(sol.report.iterations, 1000 * 98)
+        npt.assert_almost_equal(sol.mean, np.linalg.solve(A, b))
+
+
+class TestGaussianGraph(unittest.TestCase):
+
+    def setUp(self):
+        # Loop of four variables with a factor over three of them
+        self.fg = graphs.FactorGraph()
+        self.x = [nodes.VNode("x%d" % i, rv.Gaussian) for i in range(4)]
+        self.fg.set_nodes(self.x)
+
+        factors = [rv.Gaussian([[1]], [[2]], self.x[0]),
+                   rv.Gaussian.inf_form([[1, -1], [-1, 1]], [[0], [0]],
+                                        self.x[0], self.x[1]),
+                   rv.Gaussian.inf_form([[2, -0.5, -0.5], [-0.5, 1, 0],
+                                         [-0.5, 0, 1]], [[1], [0], [-1]],
+                                        self.x[1], self.x[2], self.x[3]),
+                   rv.Gaussian.inf_form([[1, -0.3], [-0.3, 1]], [[0], [2]],
+                                        self.x[3], self.x[0])]
+        for i, factor in enumerate(factors):
+            fn = nodes.FNode("f%d" % i, factor)
+            self.fg.set_node(fn)
+            self.fg.set_edges([(x, fn) for x in factor.dim])
+
+        joint = factors[0]
+        for factor in factors[1:]:
+            joint = joint * factor
+        self.joint = joint
+
+    def test_beliefs(self):
+        beliefs, report = gabp.gaussian_belief_propagation(
+            self.fg, 200, tolerance=1e-12)
+        self.assertTrue(report.converged)
+        for i, x in enumerate(self.joint.dim):
+            self.assertEqual(beliefs[x].dim, (x,))
+            npt.assert_almost_equal(beliefs[x].mean,
+                                    self.joint.mean[i:i + 1])
+
+        beliefs, report = gabp.gaussian_belief_propagation(
+            self.fg, 200, self.x[:1], tolerance=1e-12, schedule='residual')
+        self.assertTrue(report.converged)
+        self.assertEqual(list(beliefs), self.x[:1])
+        i = self.joint.dim.index(self.x[0])
+        npt.assert_almost_equal(beliefs[self.x[0]].mean,
+                                self.joint.mean[i:i + 1])
+
+    def test_lowering(self):
+        engine = gabp.GaussianGraph(self.fg)
+        self.assertEqual(len(engine.J), 5)
+        npt.assert_almost_equal(engine.diag, [2.5, 3, 1, 2])
+
+        fn = nodes.FNode("f", rv.Discrete([0.5, 0.5], self.x[0]))
+        self.fg.set_node(fn)
+        with self.assertRaises(rv.ParameterException):
+            gabp.GaussianGraph(self.fg)
+
+        with self.assertRaises(rv.ParameterException):
+            gabp.GaussianGraph.from_system(np.eye(2), np.ones(2)).beliefs()
+
+
+if __name__ == "__main__":
+    unittest.main()
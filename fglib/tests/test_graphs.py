@@ -28,6 +28,74 @@ class TestFactorGraph(unittest.TestCase):
         self.assertSetEqual(bottom_nodes, vn)
         self.assertSetEqual(top_nodes, fn)
 
+    def test_schedule(self):
+        fg = graphs.FactorGraph()
+        x1 = nodes.VNode("x1", rv.Discrete)
+        x2 = nodes.VNode("x2", rv.Discrete)
+        fa = nodes.FNode("fa")
+        fg.set_nodes([x1, x2, fa])
+        fg.set_edge(x1, fa)
+
+        schedule = fg.schedule(x1)
+        self.assertEqual(schedule, ((x1, fa),))
+        self.assertIs(fg.schedule(x1), schedule)  # Cached
+
+        # Adding an edge invalidates the cache
+        fg.set_edge(fa, x2)
+        self.assertEqual(fg.schedule(x1), ((x1, fa), (fa, x2)))
+        self.assertEqual(fg.schedule(x2), ((x2, fa), (fa, x1)))
+
+        # Removing a node invalidates the cache
+        fg.remove_node(x2)
+        self.assertEqual(fg.schedule(x1), ((x1, fa),))
+
+        fg.remove_edges_from([(x1, fa)])
+        self.assertEqual(fg.schedule(x1), ())
+
+    def test_sweeps(self):
+        # Forest of two components
+        fg = graphs.FactorGraph()
+        x1 = nodes.VNode("x1", rv.Discrete)
+        x2 = nodes.VNode("x2", rv.Discrete)
+        fa = nodes.FNode("fa", rv.Discrete([0.5, 0.5], x1))
+        fb = nodes.FNode("fb", rv.Discrete([0.5, 0.5], x2))
+        fg.set_nodes([x1, x2, fa, fb])
+        fg.set_edges([(x1, fa), (x2, fb)])
+
+        fg.mark_swept('spa', x1)
+        self.assertTrue(fg.is_swept('spa', fa))
+        self.assertFalse(fg.is_swept('spa', x2))
+        self.assertFalse(fg.is_swept('mpa', x1))
+
+        # Changes of other components are kept
+        fb.factor = rv.Discrete([0.2, 0.8], x2)
+        fg.mark_swept('spa', x2)
+        fa.factor = rv.Discrete([0.2, 0.8], x1)
+        self.assertEqual(list(fg.stale(x1)), [(fa, x1)])
+        self.assertEqual(list(fg.stale(x2)), [])
+
+        fg.mark_swept(None)
+        self.assertFalse(fg.is_swept('spa', x1))
+
+        # Compiled structures are cached until the graph is modified
+        obj = fg.compiled('key', lambda g: object())
+        self.assertIs(fg.compiled('key', lambda g: object()), obj)
+        self.assertIsNot(fg.compiled('key', lambda g: object(),
+                                     lambda o: False), obj)
+        fg.mark_swept('spa')
+        fa.factor = rv.Discrete([0.5, 0.5], x1)
+        fg.stamp(fa, x1)
+        fg.remove_node(fb)
+        self.assertFalse(fg.is_swept('spa', x1))
+        self.assertEqual(fg.compiled('key', lambda g: 1), 1)
+
+        # Change stamps are dropped and removed nodes are not tracked
+        fb.factor = rv.Discrete([0.5, 0.5], x2)
+        self.assertEqual(fg._changed, {})
+        self.assertEqual(fg._stamps, {})
+        fg.mark_swept('spa', x1)
+        self.assertEqual(list(fg.stale(x1)), [])
+
 
 if __name__ == "__main__":
     unittest.main()
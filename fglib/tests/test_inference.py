@@ -1,9 +1,11 @@
 import unittest
+from unittest.mock import patch
 
+import networkx as nx
 import numpy as np
 import numpy.testing as npt
 
-from .. import graphs, nodes, inference, rv
+from .. import edges, graphs, nodes, inference, rv
 
 
 class TestInference(unittest.TestCase):
@@ -90,6 +92,24 @@ class TestInference(unittest.TestCase):
         npt.assert_almost_equal(belief.pmf, res)
         self.assertEqual(belief.dim, (self.x4,))
 
+    def test_spa_all_marginals(self):
+        vn = [self.x1, self.x2, self.x3, self.x4]
+        res = {n: inference.sum_product(self.fg, n) for n in vn}
+
+        beliefs = inference.sum_product(self.fg, self.x3, all_marginals=True)
+        self.assertEqual(set(beliefs), set(vn))
+        for n in vn:
+            self.assertEqual(beliefs[n], res[n])
+
+        beliefs = inference.sum_product(self.fg, self.x3, all_marginals=True,
+                                        factors=True)
+        self.assertEqual(len(beliefs), 7)
+        belief = beliefs[self.fa]
+        self.assertEqual(belief.dim, (self.x1, self.x2))
+        npt.assert_almost_equal(np.sum(belief.pmf), 1)
+        self.assertEqual(belief.marginalize(self.x2), res[self.x1])
+        self.assertEqual(belief.marginalize(self.x1), res[self.x2])
+
     def test_mpa(self):
         inference.max_product(self.fg, query_node=self.x1)
 
@@ -169,6 +189,626 @@ class TestInference(unittest.TestCase):
         npt.assert_almost_equal(maximum, res, decimal=3)
 
 
+class TestBatched(unittest.TestCase):
+
+    def setUp(self):
+        self.fg = graphs.FactorGraph()
+
+        self.x1 = nodes.VNode("x1", rv.Discrete)
+        self.x2 = nodes.VNode("x2", rv.Discrete)
+        self.x3 = nodes.VNode("x3", rv.Discrete)
+
+        dist_fa = [[0.3, 0.2, 0.1],
+                   [0.3, 0.0, 0.1]]
+        self.fa = nodes.FNode("fa", rv.Discrete(dist_fa, self.x1, self.x2))
+
+        dist_fb = [[0.3, 0.2],
+                   [0.3, 0.0],
+                   [0.1, 0.1]]
+        self.fb = nodes.FNode("fb", rv.Discrete(dist_fb, self.x2, self.x3))
+
+        self.fg.set_nodes([self.x1, self.x2, self.x3, self.fa, self.fb])
+        self.fg.set_edges([(self.x1, self.fa), (self.fa, self.x2),
+                           (self.x2, self.fb), (self.fb, self.x3)])
+
+        self.evidence = np.array([[1.0, 0.0],
+                                  [0.0, 1.0],
+                                  [0.5, 0.5]])
+        self.x1.observed = True
+
+    def test_spa(self):
+        res = []
+        for e in self.evidence:
+            self.x1.init = rv.Discrete(e, self.x1)
+            res.append(inference.belief_propagation(self.fg, self.x3).pmf)
+
+        self.x1.init = rv.Discrete(self.evidence, self.x1, batched=True)
+        belief = inference.belief_propagation(self.fg, self.x3)
+        self.assertTrue(belief.batched)
+        npt.assert_almost_equal(belief.pmf, np.array(res))
+
+    def test_mpa(self):
+        res = []
+        for e in self.evidence:
+            self.x1.init = rv.Discrete(e, self.x1)
+            res.append(inference.max_product(self.fg, self.x3)[0])
+
+        self.x1.init = rv.Discrete(self.evidence, self.x1, batched=True)
+        maximum, _ = inference.max_product(self.fg, self.x3)
+        npt.assert_almost_equal(maximum, np.array(res))
+
+        # Decoded setting with a unary factor below the query node
+        fu = nodes.FNode("fu", rv.Discrete([0.2, 0.5, 0.3], self.x2))
+        self.fg.set_node(fu)
+        self.fg.set_edge(fu, self.x2)
+        res = []
+        for e in self.evidence:
+            self.x1.init = rv.Discrete(e, self.x1)
+            res.append(inference.max_product(self.fg, self.x3)[1])
+
+        self.x1.init = rv.Discrete(self.evidence, self.x1, batched=True)
+        for method in (inference.max_product, inference.max_sum):
+            _, track = method(self.fg, self.x3)
+            for x in (self.x1, self.x2, self.x3):
+                npt.assert_equal(track[x], [t[x] for t in res])
+
+
+class TestSparse(unittest.TestCase):
+
+    def test_spa(self):
+        fg = graphs.FactorGraph()
+        x1 = nodes.VNode("x1", rv.Discrete)
+        x2 = nodes.VNode("x2", rv.Discrete)
+        x3 = nodes.VNode("x3", rv.Discrete)
+
+        # Deterministic constraint x3 = (x1 + x2) mod 3
+        dist = np.zeros((3, 3, 3))
+        for i in range(3):
+            for j in range(3):
+                dist[i, j, (i + j) % 3] = 1.
+        fa = nodes.FNode("fa", rv.SparseDiscrete.from_dense(dist,
+                                                            x1, x2, x3))
+        fb = nodes.FNode("fb", rv.Discrete([0.2, 0.3, 0.5], x1))
+        fc = nodes.FNode("fc", rv.Discrete([0.6, 0.4, 0.0], x2))
+
+        fg.set_nodes([x1, x2, x3, fa, fb, fc])
+        fg.set_edges([(x1, fa), (x2, fa), (fa, x3), (fb, x1), (fc, x2)])
+
+        belief = inference.sum_product(fg, x3)
+        res = np.einsum('ijk,i,j->k', dist, [0.2, 0.3, 0.5], [0.6, 0.4, 0.])
+        npt.assert_almost_equal(belief.pmf, res / np.sum(res))
+
+        inference.max_product(fg, x3)
+        self.assertEqual(np.argmax(x3.belief().pmf), 2)
+
+
+class TestLogDomain(unittest.TestCase):
+
+    def setUp(self):
+        self.fg = graphs.FactorGraph()
+        self.vn = [nodes.VNode("x%d" % i, rv.Discrete) for i in range(3)]
+        self.fn = []
+
+        dist = [[0.3, 0.4],
+                [0.3, 0.0]]
+        for i in range(2):
+            self.fn.append(nodes.FNode("f%d" % i, rv.Discrete(
+                dist, self.vn[i], self.vn[i + 1])))
+
+        self.fg.set_nodes(self.vn + self.fn)
+        for i, f in enumerate(self.fn):
+            self.fg.set_edge(self.vn[i], f)
+            self.fg.set_edge(f, self.vn[i + 1])
+
+    def _to_log(self):
+        for f in self.fn:
+            f.factor = f.factor.to_log()
+
+    def test_spa(self):
+        res = inference.sum_product(self.fg, self.vn[0])
+        self._to_log()
+        belief = inference.sum_product(self.fg, self.vn[0])
+        self.assertIsInstance(belief, rv.LogDiscrete)
+        npt.assert_almost_equal(belief.pmf, res.pmf)
+
+    def test_msa(self):
+        _, res = inference.max_sum(self.fg, self.vn[0])
+        maximum = self.vn[0].maximum(normalize=False)
+        self._to_log()
+        _, track = inference.max_sum(self.fg, self.vn[0])
+        self.assertEqual(track, res)
+        npt.assert_almost_equal(self.vn[0].maximum(normalize=False), maximum)
+
+    def test_long_chain(self):
+        fg = graphs.FactorGraph()
+        vn = [nodes.VNode(i, rv.Discrete) for i in range(401)]
+        fg.set_nodes(vn)
+
+        dist = np.log([[1e-3, 2e-3],
+                       [3e-3, 1e-3]])
+        for i in range(400):
+            fn = nodes.FNode("f%d" % i, rv.LogDiscrete(dist, vn[i], vn[i + 1]))
+            fg.set_node(fn)
+            fg.set_edge(vn[i], fn)
+            fg.set_edge(fn, vn[i + 1])
+
+        belief = inference.sum_product(fg, vn[0])
+        self.assertTrue(np.all(np.isfinite(belief.log_pmf)))
+        npt.assert_almost_equal(np.sum(belief.pmf), 1.)
+
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.fg = graphs.FactorGraph()
+        self.vn = [nodes.VNode("x%d" % i, rv.Discrete) for i in range(9)]
+        self.fg.set_nodes(self.vn)
+
+        # Chain x0 - ... - x7 with a branch x4 - x8
+        dist = [[0.3, 0.4],
+                [0.3, 0.1]]
+        pairs = [(i, i + 1) for i in range(7)] + [(4, 8)]
+        for i, j in pairs:
+            fn = nodes.FNode("f%d%d" % (i, j),
+                             rv.Discrete(dist, self.vn[i], self.vn[j]))
+            self.fg.set_node(fn)
+            self.fg.set_edge(self.vn[i], fn)
+            self.fg.set_edge(fn, self.vn[j])
+
+    def _count(self, query_node):
+        with patch.object(nodes.FNode, 'spa', autospec=True,
+                          side_effect=nodes.FNode.spa) as spa:
+            belief = inference.sum_product(self.fg, query_node,
+                                           incremental=True)
+        return belief, spa.call_count
+
+    def test_spa(self):
+        x = self.vn
+        inference.sum_product(self.fg, x[7], incremental=True)
+
+        x[5].init = rv.Discrete([0.9, 0.1], x[5])
+        belief, count = self._count(x[7])
+        self.assertEqual(count, 2)  # Path x5 - f56 - x6 - f67 - x7
+        self.assertEqual(belief, inference.sum_product(self.fg, x[7]))
+
+        # Messages of other nodes are outdated after the change
+        x[0].init = rv.Discrete([0.2, 0.8], x[0])
+        belief, count = self._count(x[8])
+        self.assertEqual(count, 5)
+        self.assertEqual(belief, inference.sum_product(self.fg, x[8]))
+
+        # Nothing changed since the last query
+        _, count = self._count(x[8])
+        self.assertEqual(count, 0)
+
+    def test_observed(self):
+        x = self.vn
+        inference.sum_product(self.fg, x[0], incremental=True)
+
+        x[8].init = rv.Discrete([1.0, 0.0], x[8])
+        x[8].observed = True
+        belief, count = self._count(x[0])
+        self.assertEqual(count, 5)
+        self.assertEqual(belief, inference.sum_product(self.fg, x[0]))
+
+    def test_modified_graph(self):
+        x = self.vn
+        inference.sum_product(self.fg, x[0], incremental=True)
+
+        fn = nodes.FNode("f8", rv.Discrete([0.1, 0.9], x[8]))
+        self.fg.set_node(fn)
+        self.fg.set_edge(fn, x[8])
+        belief, count = self._count(x[0])
+        self.assertEqual(count, 17)  # Complete sweep
+        self.assertEqual(belief, inference.sum_product(self.fg, x[0]))
+
+
+class TestLoopy(unittest.TestCase):
+
+    def setUp(self):
+        # Create a 3x3 grid with random unary and pairwise factors
+        rng = np.random.RandomState(0)
+        self.fg = graphs.FactorGraph()
+        self.x = {(i, j): nodes.VNode("x%d%d" % (i, j), rv.Discrete)
+                  for i in range(3) for j in range(3)}
+        self.fg.set_nodes(self.x.values())
+
+        for (i, j), x in self.x.items():
+            fn = nodes.FNode("f%s" % x, rv.Discrete(rng.rand(2) + 0.1, x))
+            self.fg.set_node(fn)
+            self.fg.set_edge(fn, x)
+            for y in (self.x.get((i + 1, j)), self.x.get((i, j + 1))):
+                if y is not None:
+                    dist = np.exp(rng.randn(2, 2))
+                    fn = nodes.FNode("f%s%s" % (x, y), rv.Discrete(dist, x, y))
+                    self.fg.set_node(fn)
+                    self.fg.set_edge(x, fn)
+                    self.fg.set_edge(fn, y)
+
+    def _tree(self):
+        # Remove horizontal factors of the lower rows to obtain a tree
+        self.fg.remove_nodes_from([fn for fn in self.fg.get_fnodes()
+                                   if str(fn) in ("fx10x11", "fx11x12",
+                                                  "fx20x21", "fx21x22")])
+        self.assertTrue(nx.is_tree(self.fg))
+
+    def test_lbp_iterations(self):
+        x = self.x[(1, 1)]
+        b, report = inference.loopy_belief_propagation(self.fg, 5, [x])
+        self.assertEqual(len(b[x]), 5)
+        self.assertEqual(report.iterations, 5)
+        self.assertFalse(report.converged)
+
+    def test_lbp_tree(self):
+        self._tree()
+        b, report = inference.loopy_belief_propagation(
+            self.fg, 100, self.x.values(), tolerance=1e-10)
+        self.assertTrue(report.converged)
+        self.assertLess(report.iterations, 100)
+        self.assertLess(report.residual, 1e-10)
+        for n, beliefs in b.items():
+            self.assertEqual(len(beliefs), report.iterations)
+            res = inference.sum_product(self.fg, n)
+            npt.assert_almost_equal(beliefs[-1].pmf, res.pmf)
+
+    def test_mean_field(self):
+        b, report = inference.mean_field(self.fg, 100, self.x.values(),
+                                         tolerance=1e-10)
+        self.assertTrue(report.converged)
+        self.assertEqual(len(report.elbo), report.iterations)
+        self.assertTrue(np.all(np.diff(report.elbo) >= -1e-12))
+
+        # Lower bound of the logarithm of the partition function
+        joint = rv.Discrete.contract(*[fn.factor
+                                       for fn in self.fg.get_fnodes()])
+        self.assertLessEqual(report.elbo[-1], np.log(joint.pmf))
+        for beliefs in b.values():
+            self.assertEqual(len(beliefs), report.iterations)
+            npt.assert_almost_equal(np.sum(beliefs[-1].pmf), 1)
+
+        # Parallel updates
+        _, report = inference.mean_field(self.fg, 200, parallel=True,
+                                         damping=0.5, tolerance=1e-10)
+        self.assertTrue(report.converged)
+
+        with self.assertRaises(ValueError):
+            inference.mean_field(self.fg, 1, order=self.fg.get_fnodes())
+        with self.assertRaises(ValueError):
+            inference.mean_field(self.fg, 1, parallel=True, damping=1.)
+
+    def test_mean_field_exact(self):
+        # Mean-field is exact without pairwise factors
+        self.fg.remove_nodes_from([fn for fn in self.fg.get_fnodes()
+                                   if len(fn.factor.dim) > 1])
+        self.fg.remove_nodes_from([x for x in self.x.values()
+                                   if not self.fg[x]])
+        x = self.x[(0, 0)]
+        b, report = inference.mean_field(self.fg, 3, [x])
+        self.assertFalse(report.converged)
+        npt.assert_almost_equal(b[x][-1].pmf,
+                                inference.sum_product(self.fg, x).pmf)
+
+        fn = nodes.FNode("g", rv.Gaussian([[0]], [[1]], x))
+        self.fg.set_node(fn)
+        self.fg.set_edge(fn, x)
+        with self.assertRaises(rv.ParameterException):
+            inference.mean_field(self.fg, 1)
+
+    def test_lbp_damping(self):
+        res = inference.residual_belief_propagation(
+            self.fg, self.x.values(), tolerance=1e-12)
+
+        for damping in (0., 0.5):
+            b, report = inference.loopy_belief_propagation(
+                self.fg, 200, self.x.values(), tolerance=1e-10,
+                damping=damping)
+            self.assertTrue(report.converged)
+            for n, beliefs in b.items():
+                npt.assert_almost_equal(beliefs[-1].pmf, res[n].pmf)
+
+        for damping in (-0.1, 1., 1.5):
+            with self.assertRaises(ValueError):
+                inference.loopy_belief_propagation(self.fg, 1,
+                                                   damping=damping)
+
+    def test_lbp_synchronous(self):
+        res = inference.residual_belief_propagation(
+            self.fg, self.x.values(), tolerance=1e-12)
+
+        b, report = inference.loopy_belief_propagation(
+            self.fg, 200, self.x.values(), tolerance=1e-10, synchronous=True)
+        self.assertTrue(report.converged)
+        for n, beliefs in b.items():
+            npt.assert_almost_equal(beliefs[-1].pmf, res[n].pmf)
+
+        with self.assertRaises(ValueError):
+            inference.loopy_belief_propagation(
+                self.fg, 1, order=self.fg.get_fnodes(), synchronous=True)
+
+    def test_lbp_processes(self):
+        query_node = [self.x[(0, 0)], self.x[(1, 2)]]
+        x = self.x[(2, 2)]
+        for damping in (0., 0.3):
+            res, res_report = inference.loopy_belief_propagation(
+                self.fg, 20, query_node, damping=damping, synchronous=True)
+            res_belief = x.belief()
+            b, report = inference.loopy_belief_propagation(
+                self.fg, 20, query_node, damping=damping, processes=2)
+
+            self.assertEqual(report.iterations, res_report.iterations)
+            self.assertAlmostEqual(report.residual, res_report.residual)
+            for n in query_node:
+                for belief, r in zip(b[n], res[n]):
+                    npt.assert_almost_equal(belief.pmf, r.pmf)
+
+            # All final messages are loaded into the factor graph
+            npt.assert_almost_equal(x.belief().pmf, res_belief.pmf)
+
+    def test_lbp_processes_gaussian(self):
+        fg = graphs.FactorGraph()
+        x1 = nodes.VNode("x1", rv.Gaussian)
+        fa = nodes.FNode("fa", rv.Gaussian([[1]], [[2]], x1))
+        fg.set_nodes([x1, fa])
+        fg.set_edge(fa, x1)
+
+        with self.assertRaises(rv.ParameterException):
+            inference.loopy_belief_propagation(fg, 2, processes=2)
+
+    def test_residual_fixed_point(self):
+        beliefs = inference.residual_belief_propagation(
+            self.fg, self.x.values(), tolerance=1e-10)
+        self.assertEqual(len(beliefs), 9)
+
+        # Recomputed messages equal the stored messages
+        for (u, v) in self.fg.edges():
+            for (s, t) in ((u, v), (v, u)):
+                msg = self.fg[s][t]['object'].get_message(s, t)
+                npt.assert_almost_equal(s.spa(t).normalize().pmf, msg.pmf)
+
+        for belief in beliefs.values():
+            npt.assert_almost_equal(np.sum(belief.pmf), 1)
+
+    def test_residual_tree(self):
+        self._tree()
+
+        beliefs = inference.residual_belief_propagation(
+            self.fg, self.x.values(), tolerance=1e-12)
+        for n, belief in beliefs.items():
+            res = inference.sum_product(self.fg, n)
+            npt.assert_almost_equal(belief.pmf, res.pmf)
+
+    def test_residual_max_updates(self):
+        with patch.object(edges.Edge, 'set_message', autospec=True,
+                          side_effect=edges.Edge.set_message) as set_message:
+            inference.residual_belief_propagation(self.fg, max_updates=10)
+
+        # Unit messages in both directions and the applied updates
+        self.assertEqual(set_message.call_count,
+                         2 * self.fg.number_of_edges() + 10)
+
+
+class TestVariableElimination(unittest.TestCase):
+
+    def setUp(self):
+        # Create a 3x3 grid with random unary and pairwise factors
+        rng = np.random.RandomState(0)
+        self.fg = graphs.FactorGraph()
+        self.x = {(i, j): nodes.VNode("x%d%d" % (i, j), rv.Discrete)
+                  for i in range(3) for j in range(3)}
+        self.fg.set_nodes(self.x.values())
+
+        for (i, j), x in self.x.items():
+            fn = nodes.FNode("f%s" % x, rv.Discrete(rng.rand(2) + 0.1, x))
+            self.fg.set_node(fn)
+            self.fg.set_edge(fn, x)
+            for y in (self.x.get((i + 1, j)), self.x.get((i, j + 1))):
+                if y is not None:
+                    dist = np.exp(rng.randn(2, 2))
+                    fn = nodes.FNode("f%s%s" % (x, y), rv.Discrete(dist, x, y))
+                    self.fg.set_node(fn)
+                    self.fg.set_edge(x, fn)
+                    self.fg.set_edge(fn, y)
+
+        # Conditional distribution of a barren variable
+        self.y = nodes.VNode("y", rv.Discrete)
+        self.fy = nodes.FNode("fy", rv.Discrete(
+            np.array([[0.2, 0.3, 0.5], [0.6, 0.3, 0.1]]), self.x[(2, 2)],
+            self.y))
+        self.fg.set_nodes([self.y, self.fy])
+        self.fg.set_edges([(self.x[(2, 2)], self.fy), (self.fy, self.y)])
+
+        # Disconnected component
+        self.z = nodes.VNode("z", rv.Discrete)
+        self.fz = nodes.FNode("fz", rv.Discrete(np.array([1., 3.]), self.z))
+        self.fg.set_nodes([self.z, self.fz])
+        self.fg.set_edge(self.fz, self.z)
+
+    def _exact(self, x, *factors):
+        factors += tuple(f.factor for f in self.fg.get_fnodes())
+        return rv.Discrete.contract(factors[0], *factors[1:],
+                                    dims=(x,)).normalize()
+
+    def test_grid(self):
+        for x in list(self.x.values()) + [self.y, self.z]:
+            npt.assert_almost_equal(
+                inference.variable_elimination(self.fg, x).pmf,
+                self._exact(x).pmf)
+
+    def test_evidence(self):
+        x = self.x[(1, 1)]
+        evidence = {x: 1, self.y: 2}
+        indicators = (rv.Discrete(np.array([0., 1.]), x),
+                      rv.Discrete(np.array([0., 0., 1.]), self.y))
+        for q in (self.x[(0, 0)], self.x[(2, 2)], x):
+            npt.assert_almost_equal(
+                inference.variable_elimination(self.fg, q, evidence).pmf,
+                self._exact(q, *indicators).pmf)
+
+    def test_plan(self):
+        q = self.x[(0, 0)]
+        plan = inference.elimination_plan(self.fg, q)
+        for d in plan.factors:
+            self.assertNotIn(self.y, d.dim)
+            self.assertNotIn(self.z, d.dim)
+        self.assertEqual(set(plan.order), set(self.x.values()) - {q})
+        self.assertLessEqual(plan.size, 16)
+
+        # Evidence separates the query node from the grid
+        evidence = {self.x[(0, 1)]: 0, self.x[(1, 0)]: 1}
+        plan = inference.elimination_plan(self.fg, q, evidence)
+        self.assertEqual(plan.order, [])
+        self.assertEqual(plan.size, 2)
+        npt.assert_almost_equal(
+            inference.variable_elimination(self.fg, q, plan=plan).pmf,
+            inference.variable_elimination(self.fg, q, evidence).pmf)
+
+
+class TestDecoding(unittest.TestCase):
+
+    def setUp(self):
+        # Create a tree with random factors over two and three variables
+        rng = np.random.RandomState(0)
+        self.fg = graphs.FactorGraph()
+        self.x = [nodes.VNode("x%d" % i, rv.Discrete) for i in range(6)]
+        self.fg.set_nodes(self.x)
+
+        card = [2, 3, 2, 3, 2, 2]
+        scopes = [(0, 1), (1, 2, 3), (3, 4), (2, 5), (0,)]
+        for i, scope in enumerate(scopes):
+            dims = [self.x[j] for j in scope]
+            dist = rng.rand(*[card[j] for j in scope])
+            fn = nodes.FNode("f%d" % i, rv.Discrete(dist, *dims))
+            self.fg.set_node(fn)
+            self.fg.set_edges([(x, fn) for x in dims])
+
+        factors = [f.factor for f in self.fg.get_fnodes()]
+        self.joint = rv.Discrete.contract(factors[0], *factors[1:],
+                                          dims=self.x).pmf
+
+    def _setting(self, track):
+        return tuple(track[x] for x in self.x)
+
+    def test_max_product(self):
+        best = np.unravel_index(np.argmax(self.joint), self.joint.shape)
+        for x in (self.x[0], self.x[3]):
+            _, track = inference.max_product(self.fg, x)
+            self.assertEqual(self._setting(track), best)
+            _, track = inference.max_sum(self.fg, x)
+            self.assertEqual(self._setting(track), best)
+
+        for f in self.fg.get_fnodes():
+            f.factor = f.factor.to_log()
+        _, track = inference.max_product(self.fg, self.x[2])
+        self.assertEqual(self._setting(track), best)
+
+    def test_k_best(self):
+        order = np.argsort(-self.joint, axis=None, kind='stable')
+        for x in (self.x[0], self.x[3]):
+            res = inference.max_product(self.fg, x, k=10)
+            self.assertEqual(len(res), 10)
+            npt.assert_almost_equal([p for p, _ in res],
+                                    self.joint.ravel()[order[:10]])
+            for p, track in res:
+                npt.assert_almost_equal(self.joint[self._setting(track)], p)
+
+            res = inference.max_sum(self.fg, x, k=10)
+            npt.assert_almost_equal([p for p, _ in res],
+                                    np.log(self.joint.ravel()[order[:10]]))
+
+        # All settings
+        res = inference.max_product(self.fg, self.x[1], k=1000)
+        self.assertEqual(len(res), self.joint.size)
+        self.assertEqual(len({self._setting(t) for _, t in res}),
+                         self.joint.size)
+
+        with self.assertRaises(ValueError):
+            inference.max_product(self.fg, self.x[1], k=0)
+
+    def test_k_best_observed(self):
+        # Factor with an order of variables different from its edges
+        f1, f2 = self.fg.get_fnodes()[1:3]
+        f1.factor = rv.Discrete(np.transpose(f1.factor.pmf, (2, 0, 1)),
+                                self.x[3], self.x[1], self.x[2])
+
+        # Observed variable separates the factor of (x3, x4)
+        self.x[3].init = rv.Discrete([0., 1., 0.], self.x[3])
+        self.x[3].observed = True
+        joint = np.amax(self.joint / f2.factor.pmf[..., None], axis=4)
+        joint[:, :, :, [0, 2]] = 0
+        order = np.argsort(-joint, axis=None, kind='stable')
+
+        _, best = inference.max_product(self.fg, self.x[0])
+        res = inference.max_product(self.fg, self.x[0], k=10)
+        npt.assert_almost_equal([p for p, _ in res],
+                                joint.ravel()[order[:10]])
+        self.assertEqual(res[0][1], best)
+        for p, track in res:
+            self.assertEqual(track[self.x[3]], 1)
+            self.assertEqual(track[self.x[4]], best[self.x[4]])
+            setting = tuple(track[x] for x in self.x if x is not self.x[4])
+            npt.assert_almost_equal(joint[setting], p)
+
+
+class TestGaussian(unittest.TestCase):
+
+    def setUp(self):
+        self.fg = graphs.FactorGraph()
+        self.x1 = nodes.VNode("x1", rv.Gaussian)
+        self.x2 = nodes.VNode("x2", rv.Gaussian)
+
+        # Prior of x1 and random walk x2 = x1 + n with unit noise variance
+        self.fa = fa = nodes.FNode("fa", rv.Gaussian([[1]], [[2]], self.x1))
+        W = [[1, -1], [-1, 1]]
+        fb = nodes.FNode("fb", rv.Gaussian.inf_form(W, [[0], [0]],
+                                                    self.x1, self.x2))
+
+        self.fg.set_nodes([self.x1, self.x2, fa, fb])
+        self.fg.set_edge(fa, self.x1)
+        self.fg.set_edge(self.x1, fb)
+        self.fg.set_edge(fb, self.x2)
+
+    def test_spa(self):
+        belief = inference.sum_product(self.fg, self.x2)
+        npt.assert_almost_equal(belief.mean, [[1]])
+        npt.assert_almost_equal(belief.cov, [[3]])
+
+        belief = inference.sum_product(self.fg, self.x1)
+        npt.assert_almost_equal(belief.mean, [[1]])
+        npt.assert_almost_equal(belief.cov, [[2]])
+
+    def test_batched(self):
+        mean = np.array([[[1]], [[-2]], [[4]]])
+        cov = np.array([[[2]], [[1]], [[3]]])
+        self.fa.factor = rv.Gaussian(mean, cov, self.x1, batched=True)
+
+        belief = inference.sum_product(self.fg, self.x2)
+        self.assertTrue(belief.batched)
+        npt.assert_almost_equal(belief.mean, mean)
+        npt.assert_almost_equal(belief.cov, cov + 1)
+
+    def test_sqrt_long_chain(self):
+        fg = graphs.FactorGraph()
+        vn = [nodes.VNode(i, rv.SqrtGaussian) for i in range(201)]
+        fg.set_nodes(vn)
+
+        fn = nodes.FNode("f", rv.Gaussian([[1]], [[1]], vn[0]).to_sqrt())
+        fg.set_node(fn)
+        fg.set_edge(fn, vn[0])
+
+        W = [[1, -1], [-1, 1]]
+        for i in range(200):
+            fn = nodes.FNode("f%d" % i, rv.Gaussian.inf_form(
+                W, [[0], [0]], vn[i], vn[i + 1]).to_sqrt())
+            fg.set_node(fn)
+            fg.set_edge(vn[i], fn)
+            fg.set_edge(fn, vn[i + 1])
+
+        belief = inference.sum_product(fg, vn[-1])
+        self.assertIsInstance(belief, rv.SqrtGaussian)
+        npt.assert_almost_equal(belief.mean, [[1]])
+        npt.assert_almost_equal(belief.cov, [[201]])
+
+
 class TestExample(unittest.TestCase):
 
     def test_readme(self):
@@ -218,6 +858,42 @@ class TestExample(unittest.TestCase):
 
         npt.assert_almost_equal(belief.pmf, np.array([0.63, 0.36]), decimal=2)
 
+    def test_float32(self):
+        rv.set_default_dtype(np.float32)
+        try:
+            fg = graphs.FactorGraph()
+            x1 = nodes.VNode("x1", rv.Discrete)
+            x2 = nodes.VNode("x2", rv.Discrete)
+            fa = nodes.FNode("fa", rv.Discrete([[0.3, 0.2, 0.1],
+                                                [0.3, 0.0, 0.1]], x1, x2))
+            fg.set_nodes([x1, x2, fa])
+            fg.set_edges([(x1, fa), (fa, x2)])
+
+            belief = inference.sum_product(fg, x2)
+            self.assertEqual(belief.dtype, np.float32)
+            npt.assert_almost_equal(belief.pmf, np.array([0.6, 0.2, 0.2]))
+        finally:
+            rv.set_default_dtype(np.float64)
+
+    def test_float32_factors(self):
+        # Data type of the factors with the default data type float64
+        fg = graphs.FactorGraph()
+        x1 = nodes.VNode("x1", rv.Discrete)
+        x2 = nodes.VNode("x2", rv.Discrete)
+        fa = nodes.FNode("fa", rv.Discrete(np.float32([[0.3, 0.2, 0.1],
+                                                       [0.3, 0.0, 0.1]]),
+                                           x1, x2))
+        fb = nodes.FNode("fb", rv.Discrete(np.float32([0.4, 0.6]), x1))
+        fg.set_nodes([x1, x2, fa, fb])
+        fg.set_edges([(x1, fa), (fa, x2), (fb, x1)])
+
+        beliefs = inference.sum_product(fg, x2, all_marginals=True,
+                                        factors=True)
+        for belief in beliefs.values():
+            self.assertEqual(belief.dtype, np.float32)
+        npt.assert_almost_equal(beliefs[x2].pmf,
+                                np.array([0.3, 0.08, 0.1]) / 0.48)
+
 
 if __name__ == "__main__":
     unittest.main()
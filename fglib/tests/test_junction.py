@@ -0,0 +1,128 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from .. import elimination, graphs, nodes, inference, junction, rv
+
+
+class TestJunctionTree(unittest.TestCase):
+
+    def setUp(self):
+        # Create a 3x3 grid with random unary and pairwise factors
+        rng = np.random.RandomState(0)
+        self.fg = graphs.FactorGraph()
+        self.x = {(i, j): nodes.VNode("x%d%d" % (i, j), rv.Discrete)
+                  for i in range(3) for j in range(3)}
+        self.fg.set_nodes(self.x.values())
+
+        for (i, j), x in self.x.items():
+            fn = nodes.FNode("f%s" % x, rv.Discrete(rng.rand(2) + 0.1, x))
+            self.fg.set_node(fn)
+            self.fg.set_edge(fn, x)
+            for y in (self.x.get((i + 1, j)), self.x.get((i, j + 1))):
+                if y is not None:
+                    dist = np.exp(rng.randn(2, 2))
+                    fn = nodes.FNode("f%s%s" % (x, y), rv.Discrete(dist, x, y))
+                    self.fg.set_node(fn)
+                    self.fg.set_edge(x, fn)
+                    self.fg.set_edge(fn, y)
+
+    def _exact(self, x):
+        factors = [f.factor for f in self.fg.get_fnodes()]
+        return rv.Discrete.contract(factors[0], *factors[1:],
+                                    dims=(x,)).normalize()
+
+    def test_elimination_order(self):
+        g = elimination.interaction_graph(self.fg)
+        self.assertEqual(g.number_of_nodes(), 9)
+        self.assertEqual(g.number_of_edges(), 12)
+
+        for heuristic in ('min_fill', 'min_degree'):
+            order, cliques = elimination.elimination_order(g, heuristic)
+            self.assertEqual(set(order), set(self.x.values()))
+            self.assertEqual(max(len(c) for c in cliques), 4)
+        self.assertEqual(g.number_of_edges(), 12)
+
+        card = elimination.cardinalities(self.fg)
+        for heuristic in ('min_weight', 'weighted_min_fill'):
+            order, cliques = elimination.elimination_order(
+                g, heuristic, card, keep=(self.x[(1, 1)],))
+            self.assertEqual(set(order), set(self.x.values())
+                             - {self.x[(1, 1)]})
+
+        with self.assertRaises(ValueError):
+            elimination.elimination_order(g, 'unknown')
+        with self.assertRaises(ValueError):
+            elimination.elimination_order(g, 'min_weight')
+
+    def test_running_intersection(self):
+        jt = junction.JunctionTree(self.fg)
+        for v in self.x.values():
+            ids = [i for i, c in enumerate(jt.cliques) if v in c]
+            self.assertTrue(jt.tree.subgraph(ids).number_of_edges()
+                            == len(ids) - 1)
+
+    def test_grid(self):
+        b = junction.junction_tree(self.fg)
+        for x in self.x.values():
+            npt.assert_almost_equal(b[x].pmf, self._exact(x).pmf)
+
+        jt = junction.JunctionTree(self.fg, 'min_degree')
+        jt.calibrate()
+        for i, c in enumerate(jt.cliques):
+            belief = jt.clique_belief(i)
+            for x in c:
+                npt.assert_almost_equal(belief.marginalize(
+                    *[y for y in c if y is not x]).pmf, self._exact(x).pmf)
+
+    def test_tree(self):
+        # Remove horizontal factors except in the first row
+        for fn in list(self.fg.get_fnodes()):
+            names = [str(x) for x in fn.factor.dim]
+            if len(names) == 2 and names[0][1] == names[1][1] != "0":
+                self.fg.remove_node(fn)
+
+        res = inference.belief_propagation(self.fg, all_marginals=True)
+        for x in self.x.values():
+            npt.assert_almost_equal(junction.junction_tree(self.fg, x).pmf,
+                                    res[x].pmf)
+
+    def test_cache(self):
+        x = self.x[(1, 1)]
+        junction.junction_tree(self.fg, x)
+        key = ('junction_tree', 'min_fill')
+        jt = self.fg.compiled(key, None)
+
+        # Changed factors are used without compilation
+        fn = next(f for f in self.fg.get_fnodes() if f.factor.dim == (x,))
+        fn.factor = rv.Discrete(np.array([1., 0.]), x)
+        npt.assert_almost_equal(junction.junction_tree(self.fg, x).pmf,
+                                [1, 0])
+        self.assertIs(self.fg.compiled(key, None), jt)
+
+        # Modified graphs are compiled again
+        y = nodes.VNode("y", rv.Discrete)
+        fn = nodes.FNode("fy", rv.Discrete(np.array([[1., 2.], [3., 4.]]),
+                                           x, y))
+        self.fg.set_nodes([y, fn])
+        self.fg.set_edges([(x, fn), (fn, y)])
+        self.assertIsNone(self.fg.compiled(key, lambda g: None))
+        npt.assert_almost_equal(junction.junction_tree(self.fg, y).pmf,
+                                self._exact(y).pmf)
+
+    def test_batched(self):
+        x = self.x[(0, 0)]
+        fn = next(f for f in self.fg.get_fnodes() if f.factor.dim == (x,))
+        fn.factor = rv.Discrete(np.array([[1., 0.], [0., 1.]]), x,
+                                batched=True)
+
+        b = junction.junction_tree(self.fg, self.x[(2, 2)])
+        self.assertEqual(b.pmf.shape, (2, 2))
+        for k in range(2):
+            fn.factor = rv.Discrete(np.eye(2)[k], x)
+            npt.assert_almost_equal(b.pmf[k], self._exact(self.x[(2, 2)]).pmf)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from .. import graphs, messages, nodes, rv
+
+
+class TestMessages(unittest.TestCase):
+
+    def setUp(self):
+        self.fg = graphs.FactorGraph()
+        self.x1 = nodes.VNode("x1", rv.Discrete)
+        self.x2 = nodes.VNode("x2", rv.Discrete)
+        self.fa = nodes.FNode("fa", rv.Discrete([[0.3, 0.4],
+                                                 [0.3, 0.0]],
+                                                self.x1, self.x2))
+        self.fg.set_nodes([self.x1, self.x2, self.fa])
+        self.fg.set_edges([(self.x1, self.fa), (self.fa, self.x2)])
+
+    def test_check_damping(self):
+        for damping in (0, 0., 0.5, 0.99):
+            messages.check_damping(damping)
+        for damping in (-0.1, 1, 1.5):
+            with self.assertRaises(ValueError):
+                messages.check_damping(damping)
+
+    def test_damp(self):
+        old = rv.Discrete([0.2, 0.8], self.x1)
+        new = rv.Discrete([0.6, 0.4], self.x1)
+        npt.assert_almost_equal(messages.damp(old, new, 0.25).pmf,
+                                [0.5, 0.5])
+        self.assertAlmostEqual(messages.residual(old, new), 0.4)
+
+        msg = messages.damp(old.to_log(), new.to_log(), 0.25)
+        self.assertIsInstance(msg, rv.LogDiscrete)
+        npt.assert_almost_equal(msg.pmf, [0.5, 0.5])
+
+        old = rv.Gaussian.inf_form([[1.]], [[0.]], self.x1)
+        new = rv.Gaussian.inf_form([[3.]], [[2.]], self.x1)
+        msg = messages.damp(old, new, 0.5)
+        npt.assert_almost_equal(msg.precision, [[2.]])
+        npt.assert_almost_equal(msg.precision_mean, [[1.]])
+        self.assertAlmostEqual(messages.residual(old, new), 2.)
+
+    def test_sweep(self):
+        messages.initialize(self.fg)
+        self.assertFalse(self.fg.is_swept('spa', self.x1))
+        edge = self.fg[self.x1][self.fa]['object']
+        npt.assert_almost_equal(edge.get_message(self.x1, self.fa).pmf,
+                                [1.])  # Unit element
+
+        edges = [(self.fa, self.x1), (self.fa, self.x2)]
+        old = [self.fg[u][v]['object'].get_message(u, v) for (u, v) in edges]
+        new = [u.spa(v).normalize() for (u, v) in edges]
+        residual = messages.swap(self.fg, edges, old, new, 0.)
+        self.assertAlmostEqual(residual, max(messages.residual(o, m)
+                                             for (o, m) in zip(old, new)))
+        self.assertEqual(self.x1.belief(), new[0].normalize())
+
+        b = messages.beliefs(self.x1, self.fg.schedule(self.x1),
+                             all_marginals=True, factors=True)
+        self.assertEqual(set(b), {self.x1, self.x2, self.fa})
+        self.assertEqual(messages.beliefs(self.x1, ()), b[self.x1])
+        self.assertTrue(np.all(b[self.fa].pmf >= 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
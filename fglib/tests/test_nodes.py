@@ -142,6 +142,27 @@ class TestFactorNode(unittest.TestCase):
         npt.assert_almost_equal(msg_out.pmf, res)
         self.assertEqual(msg_out.dim, (n0,))
 
+    def test_spa_ternary(self):
+        fg = graphs.FactorGraph()
+        n0 = nodes.VNode(0, rv.Discrete)
+        n2 = nodes.VNode(2, rv.Discrete)
+        n3 = nodes.VNode(3, rv.Discrete)
+        pmf = np.arange(1, 25, dtype=float).reshape((2, 3, 4))
+        n1 = nodes.FNode(1, rv.Discrete(pmf, n0, n2, n3))
+        fg.set_nodes([n0, n1, n2, n3])
+        fg.set_edges([(n0, n1), (n1, n2), (n1, n3)])
+
+        msg2 = rv.Discrete([0.2, 0.3, 0.5], n2)
+        msg3 = rv.Discrete([0.1, 0.2, 0.3, 0.4], n3)
+        fg[n2][n1]['object'].set_message(n2, n1, msg2)
+        fg[n3][n1]['object'].set_message(n3, n1, msg3)
+
+        res = np.einsum('ijk,j,k->i', pmf, msg2.pmf, msg3.pmf)
+        for _ in range(2):  # Second call uses cached contraction path
+            msg_out = n1.spa(n0)
+            npt.assert_almost_equal(msg_out.pmf, res)
+            self.assertEqual(msg_out.dim, (n0,))
+
     @unittest.skip("Test case is not implemented.")
     def test_mpa(self):
         pass
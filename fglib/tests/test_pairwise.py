@@ -0,0 +1,133 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from .. import graphs, nodes, inference, pairwise, rv
+
+
+class TestPairwiseGraph(unittest.TestCase):
+
+    def setUp(self):
+        # Create a 3x3 grid with random unary and pairwise factors
+        rng = np.random.RandomState(0)
+        self.fg = graphs.FactorGraph()
+        self.x = {(i, j): nodes.VNode("x%d%d" % (i, j), rv.Discrete)
+                  for i in range(3) for j in range(3)}
+        self.fg.set_nodes(self.x.values())
+
+        for (i, j), x in self.x.items():
+            fn = nodes.FNode("f%s" % x, rv.Discrete(rng.rand(3) + 0.1, x))
+            self.fg.set_node(fn)
+            self.fg.set_edge(fn, x)
+            for y in (self.x.get((i + 1, j)), self.x.get((i, j + 1))):
+                if y is not None:
+                    dist = np.exp(rng.randn(3, 3))
+                    fn = nodes.FNode("f%s%s" % (x, y), rv.Discrete(dist, x, y))
+                    self.fg.set_node(fn)
+                    self.fg.set_edge(x, fn)
+                    self.fg.set_edge(fn, y)
+
+    def test_lowering(self):
+        engine = pairwise.PairwiseGraph(self.fg)
+        self.assertEqual(engine.tables.shape, (12, 3, 3))
+        self.assertEqual(engine.messages.shape, (24, 3))
+        npt.assert_almost_equal(np.exp(engine.messages), 1 / 3)
+
+        fn = nodes.FNode("f", rv.Discrete(np.ones((3, 3, 3)), self.x[(0, 0)],
+                                          self.x[(0, 1)], self.x[(0, 2)]))
+        self.fg.set_node(fn)
+        with self.assertRaises(rv.ParameterException):
+            pairwise.PairwiseGraph(self.fg)
+
+    def test_fixed_point(self):
+        res = inference.residual_belief_propagation(
+            self.fg, self.x.values(), tolerance=1e-12)
+
+        b, report = pairwise.loopy_belief_propagation(
+            self.fg, 200, self.x.values(), tolerance=1e-12)
+        self.assertTrue(report.converged)
+        for n, beliefs in b.items():
+            self.assertEqual(len(beliefs), report.iterations)
+            npt.assert_almost_equal(beliefs[-1].pmf, res[n].pmf)
+
+        # Messages are stored in the factor graph
+        for (u, v) in self.fg.edges():
+            for (s, t) in ((u, v), (v, u)):
+                msg = self.fg[s][t]['object'].get_message(s, t)
+                npt.assert_almost_equal(s.spa(t).normalize().pmf, msg.pmf)
+
+    def test_tree(self):
+        # Remove horizontal factors of the lower rows to obtain a tree
+        self.fg.remove_nodes_from([fn for fn in self.fg.get_fnodes()
+                                   if str(fn) in ("fx10x11", "fx11x12",
+                                                  "fx20x21", "fx21x22")])
+
+        engine = pairwise.PairwiseGraph(self.fg)
+        _, report = pairwise.loopy_belief_propagation(engine, 100,
+                                                      tolerance=1e-12)
+        self.assertTrue(report.converged)
+        for n, belief in engine.beliefs().items():
+            res = inference.sum_product(self.fg, n)
+            npt.assert_almost_equal(belief.pmf, res.pmf)
+
+    def test_observed(self):
+        x = self.x[(1, 1)]
+        x.init = rv.Discrete([0., 1., 0.], x)
+        x.observed = True
+        res = inference.residual_belief_propagation(
+            self.fg, self.x.values(), tolerance=1e-12)
+
+        b, _ = pairwise.loopy_belief_propagation(
+            self.fg, 200, self.x.values(), tolerance=1e-12, damping=0.2)
+        for n, beliefs in b.items():
+            npt.assert_almost_equal(beliefs[-1].pmf, res[n].pmf)
+
+    def test_damping(self):
+        # The first iteration is not damped
+        b, _ = pairwise.loopy_belief_propagation(self.fg, 1, self.x.values())
+        res, _ = pairwise.loopy_belief_propagation(self.fg, 1, self.x.values(),
+                                                   damping=0.5)
+        for n, beliefs in b.items():
+            npt.assert_almost_equal(res[n][-1].pmf, beliefs[-1].pmf)
+
+        # Same fixed point as the synchronous schedule of the object engine
+        b, report = pairwise.loopy_belief_propagation(
+            self.fg, 200, self.x.values(), tolerance=1e-12, damping=0.5)
+        self.assertTrue(report.converged)
+        res, _ = inference.loopy_belief_propagation(
+            self.fg, 200, self.x.values(), tolerance=1e-12, damping=0.5,
+            synchronous=True)
+        for n, beliefs in b.items():
+            npt.assert_almost_equal(beliefs[-1].pmf, res[n][-1].pmf)
+
+        engine = pairwise.PairwiseGraph(self.fg)
+        for damping in (-0.1, 1., 1.5):
+            with self.assertRaises(ValueError):
+                engine.iterate(damping)
+            with self.assertRaises(ValueError):
+                pairwise.loopy_belief_propagation(engine, 10, damping=damping)
+
+    def test_cardinality(self):
+        # Variables with different numbers of states are padded
+        x = nodes.VNode("x", rv.Discrete)
+        fn = nodes.FNode("f", rv.Discrete([[1, 2, 3], [4, 5, 6]], x,
+                                          self.x[(0, 0)]))
+        self.fg.set_nodes([x, fn])
+        self.fg.set_edge(fn, x)
+        self.fg.set_edge(fn, self.x[(0, 0)])
+
+        engine = pairwise.PairwiseGraph(self.fg)
+        self.assertEqual(engine.K, 3)
+        _, report = pairwise.loopy_belief_propagation(engine, 200,
+                                                      tolerance=1e-12)
+        self.assertTrue(report.converged)
+
+        res = inference.residual_belief_propagation(
+            self.fg, [x], tolerance=1e-12)
+        self.assertEqual(engine.belief(x).shape, (2,))
+        npt.assert_almost_equal(engine.belief(x).pmf, res[x].pmf)
+
+
+if __name__ == "__main__":
+    unittest.main()
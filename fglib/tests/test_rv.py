@@ -33,15 +33,21 @@ class TestDiscrete(unittest.TestCase):
         s = str(self.rv3)
         self.assertEqual(s, '[[ 0.1, 0.2],\n [ 0.3, 0.4]]')
 
-    @unittest.skip("Test case is not implemented.")
     def test_addition(self):
-        # ToDo: ...
-        pass
+        res = np.array([[0.7, 0.8],
+                        [0.7, 0.8]])
+
+        add = self.rv1 + self.rv3
+        npt.assert_almost_equal(add.pmf, res)
+        self.assertEqual(add.dim, (self.x1, self.x2))
 
-    @unittest.skip("Test case is not implemented.")
     def test_subtraction(self):
-        # ToDo: ...
-        pass
+        res = np.array([[-0.5, -0.4],
+                        [-0.1, 0.0]])
+
+        sub = self.rv3 - self.rv1
+        npt.assert_almost_equal(sub.pmf, res)
+        self.assertEqual(sub.dim, (self.x1, self.x2))
 
     def test_multiplication_1D_1(self):
         res = np.array([0.36, 0.16])
@@ -97,6 +103,56 @@ class TestDiscrete(unittest.TestCase):
         npt.assert_almost_equal(mul.pmf, res)
         self.assertEqual(mul.dim, (self.x1, self.x2))
 
+    def test_multiplication_overlap(self):
+        x3 = nodes.VNode("x3", rv.Discrete)
+        rv4 = rv.Discrete([[1, 2, 3],
+                           [4, 5, 6]], self.x2, x3)
+        res = np.einsum('ij,jk->ijk', self.rv3.pmf, rv4.pmf)
+
+        mul = self.rv3 * rv4
+        npt.assert_almost_equal(mul.pmf, res)
+        self.assertEqual(mul.dim, (self.x1, self.x2, x3))
+
+        # Operands are not modified
+        self.assertEqual(self.rv3.dim, (self.x1, self.x2))
+        self.assertEqual(rv4.dim, (self.x2, x3))
+
+    def test_multiplication_out(self):
+        out = np.empty((2, 2))
+        mul = self.rv3.multiply(self.rv1, out=out)
+        self.assertIs(mul.pmf, out)
+        npt.assert_almost_equal(out, np.array([[0.06, 0.12],
+                                               [0.12, 0.16]]))
+
+        rv4 = rv.Discrete(np.array([[0.1, 0.2],
+                                    [0.3, 0.4]]), self.x1, self.x2)
+        rv4.multiply(self.rv2, out=rv4.pmf)
+        npt.assert_almost_equal(rv4.pmf, np.array([[0.02, 0.16],
+                                                   [0.06, 0.32]]))
+
+    def test_inplace_log(self):
+        # Cached logarithm is cleared by in-place operations
+        rv4 = rv.Discrete(np.array([[0.1, 0.2],
+                                    [0.3, 0.4]]), self.x1, self.x2)
+        for op in (rv4.add, rv4.subtract, rv4.multiply):
+            rv4.log_pmf
+            op(self.rv2, out=rv4.pmf)
+            npt.assert_almost_equal(rv4.log_pmf, np.log(rv4.pmf))
+
+        rv5 = rv4.to_log()
+        for op in (rv5.add, rv5.subtract, rv5.multiply):
+            rv5.log().pmf
+            op(self.rv2, out=rv5.log_pmf)
+            npt.assert_almost_equal(rv5.log().pmf, rv5.log_pmf)
+
+        # In-place result in the buffer of the other operand
+        rv6 = rv.Discrete(np.array([[0.5, 0.6],
+                                    [0.7, 0.8]]), self.x1, self.x2)
+        for op in (rv4.add, rv4.multiply):
+            rv6.log_pmf
+            op(rv6, out=rv6.pmf)
+            npt.assert_almost_equal(rv6.log().pmf, np.log(rv6.pmf))
+
     def test_unit_element_1D(self):
         rv0 = rv.Discrete.unity(self.x1)
         self.assertEqual(self.rv1 * rv0, self.rv1)
@@ -139,9 +195,342 @@ class TestDiscrete(unittest.TestCase):
         self.assertEqual(self.rv3.argmax(), (1, 1))
         self.assertEqual(self.rv3.argmax(self.x1), (1,))
 
-    @unittest.skip("Test case is not implemented.")
+        # Maximum instead of marginal over the first dimension
+        rv3 = rv.Discrete([[0.5, 0.0], [0.0, 0.3], [0.0, 0.3]],
+                          self.x1, self.x2)
+        self.assertEqual(rv3.argmax(self.x1), 0)
+
+    def test_maximize_argmax(self):
+        amax, table = self.rv3.maximize_argmax(self.x1)
+        self.assertEqual(amax, self.rv3.maximize(self.x1))
+        npt.assert_equal(table, [1, 1])
+        self.assertEqual(table.dtype, np.uint8)
+
+        x3 = nodes.VNode("x3", rv.Discrete)
+        rv4 = rv.Discrete(np.random.RandomState(0).rand(3, 4, 5),
+                          self.x1, x3, self.x2)
+        amax, table = rv4.maximize_argmax(self.x1, self.x2, normalize=False)
+        self.assertEqual(amax.dim, (x3,))
+        for i in range(4):
+            states = np.unravel_index(table[i], (3, 5))
+            npt.assert_almost_equal(rv4.pmf[states[0], i, states[1]],
+                                    np.amax(rv4.pmf[:, i, :]))
+            npt.assert_almost_equal(amax.pmf[i], np.amax(rv4.pmf[:, i, :]))
+
+    def test_contract(self):
+        res = self.rv1 * self.rv3 * self.rv2
+        res = res.marginalize(self.x1, normalize=False)
+
+        con = self.rv3.contract(self.rv1, self.rv2, dims=(self.x2,))
+        npt.assert_almost_equal(con.pmf, res.pmf)
+        self.assertEqual(con.dim, (self.x2,))
+
+        path = self.rv3.contraction_path(self.rv1, self.rv2, dims=(self.x2,))
+        con = self.rv3.contract(self.rv1, self.rv2, dims=(self.x2,),
+                                path=path)
+        npt.assert_almost_equal(con.pmf, res.pmf)
+
+    def test_contract_unity(self):
+        rv0 = rv.Discrete.unity(self.x1)
+        con = self.rv3.contract(rv0, dims=(self.x2,))
+        npt.assert_almost_equal(con.pmf, np.array([0.4, 0.6]))
+
     def test_log(self):
-        pass
+        log = self.rv3.log()
+        npt.assert_almost_equal(log.pmf, np.log(self.rv3.pmf))
+        self.assertEqual(log.dim, (self.x1, self.x2))
+        self.assertIs(self.rv3.log(), log)  # Cached
+
+
+class TestDataType(unittest.TestCase):
+
+    def setUp(self):
+        self.x1 = nodes.VNode("x1", rv.Discrete)
+        self.x2 = nodes.VNode("x2", rv.Discrete)
+
+    def tearDown(self):
+        rv.set_default_dtype(np.float64)
+
+    def test_default(self):
+        self.assertEqual(rv.get_default_dtype(), np.float64)
+        self.assertEqual(rv.Discrete([0.6, 0.4], self.x1).dtype, np.float64)
+
+        rv.set_default_dtype(np.float32)
+        self.assertEqual(rv.get_default_dtype(), np.float32)
+        self.assertEqual(rv.Discrete([0.6, 0.4], self.x1).dtype, np.float32)
+        self.assertEqual(rv.Discrete.unity(self.x1).dtype, np.float32)
+
+        with self.assertRaises(rv.ParameterException):
+            rv.set_default_dtype(np.int32)
+
+    def test_inferred(self):
+        # Data type of floating-point Numpy arrays
+        rv1 = rv.Discrete(np.array([0.6, 0.4], np.float32), self.x1)
+        self.assertEqual(rv1.dtype, np.float32)
+        self.assertEqual(rv.Discrete(np.array([1, 0]), self.x1).dtype,
+                         np.float64)
+
+        # Unit elements do not promote the data type
+        rv0 = rv.Discrete.unity(self.x1, self.x2)
+        self.assertEqual(rv0.dtype, np.float64)
+        self.assertEqual((rv1 * rv0).dtype, np.float32)
+        self.assertEqual((rv0 * rv1).dtype, np.float32)
+        self.assertEqual(rv1.contract(rv0, dims=(self.x2,)).dtype,
+                         np.float32)
+        self.assertEqual((rv0 * rv0).dtype, np.float64)
+
+    def test_discrete(self):
+        rv1 = rv.Discrete([0.6, 0.4], self.x1, dtype=np.float16)
+        rv3 = rv.Discrete([[0.1, 0.2],
+                           [0.3, 0.4]], self.x1, self.x2, dtype=np.float16)
+        self.assertEqual(rv1.dtype, np.float16)
+
+        mul = rv1 * rv3
+        self.assertEqual(mul.dtype, np.float16)
+        self.assertEqual(mul.normalize().dtype, np.float16)
+        self.assertEqual(mul.marginalize(self.x1).dtype, np.float16)
+        self.assertEqual(mul.maximize(self.x1).dtype, np.float16)
+        self.assertEqual(rv3.contract(rv1, dims=(self.x2,)).dtype,
+                         np.float16)
+        self.assertEqual(rv3.log().dtype, np.float16)
+        npt.assert_almost_equal(mul.marginalize(self.x1).pmf,
+                                np.array([0.18, 0.28]) / 0.46, decimal=3)
+
+        log3 = rv3.to_log()
+        self.assertEqual(log3.dtype, np.float16)
+        self.assertEqual(log3.marginalize(self.x1).dtype, np.float16)
+        self.assertEqual(log3.contract(rv1, dims=(self.x2,)).dtype,
+                         np.float16)
+
+        sp3 = rv.SparseDiscrete.from_dense(rv3.pmf, self.x1, self.x2,
+                                           dtype=np.float32)
+        self.assertEqual(sp3.dtype, np.float32)
+        self.assertEqual(sp3.marginalize(self.x1).dtype, np.float32)
+
+    def test_gaussian(self):
+        g = rv.Gaussian([[1], [2]], [[2, 0], [0, 4]], self.x1, self.x2,
+                        dtype=np.float32)
+        self.assertEqual(g.dtype, np.float32)
+        self.assertEqual(g.mean.dtype, np.float32)
+        self.assertEqual((g * g).dtype, np.float32)
+        self.assertEqual(g.marginalize(self.x2).dtype, np.float32)
+        npt.assert_almost_equal(g.marginalize(self.x2).mean, [[1]])
+
+
+class TestBatchedDiscrete(unittest.TestCase):
+
+    def setUp(self):
+        self.x1 = nodes.VNode("x1", rv.Discrete)
+        self.x2 = nodes.VNode("x2", rv.Discrete)
+
+        self.rv1 = rv.Discrete([[0.6, 0.4],
+                                [0.1, 0.9],
+                                [0.5, 0.5]], self.x1, batched=True)
+        self.rv3 = rv.Discrete([[0.1, 0.2],
+                                [0.3, 0.4]], self.x1, self.x2)
+
+    def test_initialization(self):
+        with self.assertRaises(rv.ParameterException):
+            rv.Discrete([0.6, 0.4], self.x1, batched=True)
+
+        self.assertTrue(self.rv1.batched)
+        self.assertEqual(self.rv1.batch_size, 3)
+        self.assertEqual(self.rv1.dim, (self.x1,))
+        self.assertIsNone(self.rv3.batch_size)
+
+        # Axes of the variables shifted by the batch dimension
+        self.assertEqual(self.rv3.axes(self.x2), (1,))
+        self.assertEqual(self.rv3.axes(self.x2, self.x1), (0, 1))
+        self.assertEqual(self.rv1.axes(self.x1), (1,))
+
+    def test_multiplication(self):
+        mul = self.rv3 * self.rv1
+        self.assertTrue(mul.batched)
+        self.assertEqual(mul.dim, (self.x1, self.x2))
+        for i in range(3):
+            res = self.rv3 * rv.Discrete(self.rv1.pmf[i], self.x1)
+            npt.assert_almost_equal(mul.pmf[i], res.pmf)
+
+    def test_normalize(self):
+        rv0 = rv.Discrete([[1, 3], [2, 2]], self.x1, batched=True)
+        npt.assert_almost_equal(rv0.normalize().pmf,
+                                np.array([[0.25, 0.75], [0.5, 0.5]]))
+
+    def test_marginalize(self):
+        mul = self.rv3 * self.rv1
+        marginalize = mul.marginalize(self.x1)
+        self.assertTrue(marginalize.batched)
+        npt.assert_almost_equal(np.sum(marginalize.pmf, axis=1), np.ones(3))
+        npt.assert_almost_equal(marginalize.pmf[1],
+                                np.array([0.28, 0.38]) / 0.66)
+
+    def test_argmax(self):
+        npt.assert_equal(self.rv1.argmax(), (np.array([0, 1, 0]),))
+
+    def test_contract(self):
+        con = self.rv3.contract(self.rv1, dims=(self.x2,))
+        self.assertTrue(con.batched)
+        npt.assert_almost_equal(con.pmf, np.dot(self.rv1.pmf, self.rv3.pmf))
+
+        log = self.rv3.to_log().contract(self.rv1.to_log(), dims=(self.x2,))
+        self.assertTrue(log.batched)
+        npt.assert_almost_equal(log.pmf, con.pmf)
+
+        sp3 = rv.SparseDiscrete.from_dense(self.rv3.pmf, self.x1, self.x2)
+        npt.assert_almost_equal(sp3.contract(self.rv1, dims=(self.x2,)).pmf,
+                                con.pmf)
+
+
+class TestLogDiscrete(unittest.TestCase):
+
+    def setUp(self):
+        self.x1 = nodes.VNode("x1", rv.Discrete)
+        self.x2 = nodes.VNode("x2", rv.Discrete)
+
+        self.rv1 = rv.Discrete([0.6, 0.4], self.x1)
+        self.rv3 = rv.Discrete([[0.1, 0.2],
+                                [0.3, 0.4]], self.x1, self.x2)
+
+        self.log1 = self.rv1.to_log()
+        self.log3 = self.rv3.to_log()
+
+    def test_initialization(self):
+        with self.assertRaises(rv.ParameterException):
+            rv.LogDiscrete([[0.1, 0.2]], self.x1)
+
+        npt.assert_almost_equal(self.log3.log_pmf, np.log(self.rv3.pmf))
+        npt.assert_almost_equal(self.log3.pmf, self.rv3.pmf)
+
+    def test_multiplication(self):
+        mul = self.log1 * self.log3
+        self.assertIsInstance(mul, rv.LogDiscrete)
+        npt.assert_almost_equal(mul.pmf, (self.rv1 * self.rv3).pmf)
+        self.assertEqual(mul.dim, (self.x1, self.x2))
+
+        # Mixed product with the linear domain
+        mul = self.rv1 * self.log3
+        self.assertIsInstance(mul, rv.LogDiscrete)
+        npt.assert_almost_equal(mul.pmf, (self.rv1 * self.rv3).pmf)
+
+    def test_addition(self):
+        add = self.log1 + self.log3
+        npt.assert_almost_equal(add.pmf, (self.rv1 + self.rv3).pmf)
+
+    def test_unit_element(self):
+        rv0 = rv.LogDiscrete.unity(self.x1, self.x2)
+        self.assertEqual(self.log3 * rv0, self.log3)
+
+    def test_marginalize(self):
+        marginalize = self.log3.marginalize(self.x1)
+        npt.assert_almost_equal(marginalize.pmf, np.array([0.4, 0.6]))
+
+        marginalize = self.log3.marginalize(self.x2, normalize=False)
+        npt.assert_almost_equal(marginalize.pmf, np.array([0.3, 0.7]))
+
+    def test_maximize(self):
+        amax = self.log3.maximize(self.x1, normalize=False)
+        npt.assert_almost_equal(amax.pmf, np.array([0.3, 0.4]))
+
+        amax = self.log3.maximize(self.x2)
+        npt.assert_almost_equal(amax.pmf, np.array([0.2, 0.4]) / 0.6)
+
+    def test_argmax(self):
+        self.assertEqual(self.log3.argmax(), (1, 1))
+        self.assertEqual(self.log3.argmax(self.x1), (1,))
+
+    def test_maximize_argmax(self):
+        amax, table = self.log3.maximize_argmax(self.x2, normalize=False)
+        self.assertIsInstance(amax, rv.LogDiscrete)
+        npt.assert_almost_equal(amax.pmf, [0.2, 0.4])
+        npt.assert_equal(table, [1, 1])
+
+    def test_normalize(self):
+        rv0 = rv.LogDiscrete([-1000., -1000.], self.x1)
+        npt.assert_almost_equal(rv0.normalize().pmf, np.array([0.5, 0.5]))
+
+    def test_contract(self):
+        con = self.log3.contract(self.log1, dims=(self.x2,))
+        res = self.rv3.contract(self.rv1, dims=(self.x2,))
+        self.assertIsInstance(con, rv.LogDiscrete)
+        npt.assert_almost_equal(con.pmf, res.pmf)
+
+    def test_log(self):
+        log = self.log3.log()
+        self.assertIsInstance(log, rv.Discrete)
+        npt.assert_almost_equal(log.pmf, self.log3.log_pmf)
+        npt.assert_almost_equal(self.log3.exp().pmf, self.rv3.pmf)
+
+
+class TestSparseDiscrete(unittest.TestCase):
+
+    def setUp(self):
+        self.x1 = nodes.VNode("x1", rv.Discrete)
+        self.x2 = nodes.VNode("x2", rv.Discrete)
+
+        self.rv1 = rv.Discrete([0.6, 0.4], self.x1)
+        self.rv2 = rv.Discrete([0.2, 0.3, 0.5], self.x2)
+        self.rv3 = rv.Discrete([[0.0, 0.2, 0.0],
+                                [0.3, 0.0, 0.4]], self.x1, self.x2)
+        self.sp3 = rv.SparseDiscrete.from_dense(self.rv3.pmf,
+                                                self.x1, self.x2)
+
+    def test_initialization(self):
+        with self.assertRaises(rv.ParameterException):
+            rv.SparseDiscrete([[0], [1]], [0.5], (2, 2), self.x1)
+
+        with self.assertRaises(rv.ParameterException):
+            rv.SparseDiscrete([[0], [1]], [0.5, 0.5], (2, 2),
+                              self.x1, self.x2)
+
+        self.assertEqual(self.sp3.nnz, 3)
+        self.assertEqual(self.sp3.shape, (2, 3))
+        npt.assert_almost_equal(self.sp3.pmf, self.rv3.pmf)
+        self.assertEqual(self.sp3, self.rv3)
+
+    def test_multiplication(self):
+        mul = self.sp3 * self.rv1
+        self.assertIsInstance(mul, rv.SparseDiscrete)
+        npt.assert_almost_equal(mul.pmf, (self.rv3 * self.rv1).pmf)
+        self.assertEqual(mul.dim, (self.x1, self.x2))
+
+        mul = self.rv2 * self.sp3
+        self.assertIsInstance(mul, rv.SparseDiscrete)
+        npt.assert_almost_equal(mul.pmf, (self.rv3 * self.rv2).pmf)
+
+        sp2 = rv.SparseDiscrete.from_dense([0.0, 0.5, 0.5], self.x2)
+        mul = self.sp3 * sp2
+        npt.assert_almost_equal(mul.pmf, self.rv3.pmf * sp2.pmf)
+
+    def test_unit_element(self):
+        rv0 = rv.SparseDiscrete.unity(self.x1)
+        self.assertEqual(self.sp3 * rv0, self.rv3)
+
+    def test_normalize(self):
+        npt.assert_almost_equal(self.sp3.normalize().pmf,
+                                self.rv3.normalize().pmf)
+
+    def test_marginalize(self):
+        marginalize = self.sp3.marginalize(self.x1)
+        self.assertIsInstance(marginalize, rv.SparseDiscrete)
+        npt.assert_almost_equal(marginalize.pmf,
+                                np.array([0.3, 0.2, 0.4]) / 0.9)
+        self.assertEqual(marginalize.dim, (self.x2,))
+
+        marginalize = self.sp3.marginalize(self.x2, normalize=False)
+        npt.assert_almost_equal(marginalize.pmf, np.array([0.2, 0.7]))
+
+    def test_maximize(self):
+        amax = self.sp3.maximize(self.x2, normalize=False)
+        npt.assert_almost_equal(amax.pmf, np.array([0.2, 0.4]))
+
+    def test_argmax(self):
+        self.assertEqual(self.sp3.argmax(), (1, 2))
+        self.assertEqual(self.sp3.argmax(self.x1), self.rv3.argmax(self.x1))
+
+    def test_contract(self):
+        con = self.sp3.contract(self.rv1, dims=(self.x2,))
+        res = self.rv3.contract(self.rv1, dims=(self.x2,))
+        self.assertEqual(con, res)
 
 
 class TestGaussian(unittest.TestCase):
@@ -170,6 +559,22 @@ class TestGaussian(unittest.TestCase):
                                    self.x1, self.x2)
         self.assertEqual(self.rv3, tmp)
 
+    def test_dual_form(self):
+        mean = np.array([[1], [2]])
+        cov = np.array([[2, 1], [1, 3]])
+        W = np.linalg.inv(cov)
+
+        g = rv.Gaussian(mean, cov, self.x1, self.x2)
+        self.assertIs(g.cov, g.cov)
+        self.assertIs(g.precision, g.precision)  # Derived once
+        npt.assert_almost_equal(g.precision, W)
+        npt.assert_almost_equal(g.precision_mean, np.dot(W, mean))
+
+        g = rv.Gaussian.inf_form(W, np.dot(W, mean), self.x1, self.x2)
+        self.assertIs(g.cov, g.cov)
+        npt.assert_almost_equal(g.cov, cov)
+        npt.assert_almost_equal(g.mean, mean)
+
     def test_string(self):
         s = str(self.rv1)
         self.assertEqual(s, '[[ 1.]]\n[[ 2.]]')
@@ -225,6 +630,35 @@ class TestGaussian(unittest.TestCase):
         marginalize = self.rv4.marginalize(self.x2)
         self.assertEqual(marginalize, res)
 
+    def test_marginalize_inf_form(self):
+        g = rv.Gaussian([[1], [2]], [[2, 1], [1, 3]], self.x1, self.x2)
+        res = g.marginalize(self.x2)
+
+        g = rv.Gaussian.inf_form(g.precision, g.precision_mean,
+                                 self.x1, self.x2)
+        marginalize = g.marginalize(self.x2)
+        self.assertEqual(marginalize, res)
+        npt.assert_almost_equal(marginalize.mean, [[1]])
+        npt.assert_almost_equal(marginalize.cov, [[2]])
+
+    def test_condition(self):
+        g = rv.Gaussian([[1], [2]], [[2, 1], [1, 3]], self.x1, self.x2)
+        res = rv.Gaussian([[1 + 1 / 3]], [[2 - 1 / 3]], self.x1)
+        self.assertEqual(g.condition(self.x2, values=[[3]]), res)
+
+        g = rv.Gaussian.inf_form(g.precision, g.precision_mean,
+                                 self.x1, self.x2)
+        self.assertEqual(g.condition(self.x2, values=[[3]]), res)
+
+    def test_multiplication_scope(self):
+        g = rv.Gaussian([[1], [2]], [[2, 1], [1, 3]], self.x1, self.x2)
+        mul = self.rv1 * g
+        self.assertEqual(mul.dim, (self.x1, self.x2))
+        npt.assert_almost_equal(mul.precision,
+                                g.precision + [[0.5, 0], [0, 0]])
+        npt.assert_almost_equal(mul.precision_mean,
+                                g.precision_mean + [[0.5], [0]])
+
     def test_maximize(self):
         res = self.rv1
         amax = self.rv1.maximize()
@@ -245,5 +679,139 @@ class TestGaussian(unittest.TestCase):
         pass
 
 
+class TestBatchedGaussian(unittest.TestCase):
+
+    def setUp(self):
+        self.x1 = nodes.VNode("x1", rv.Gaussian)
+        self.x2 = nodes.VNode("x2", rv.Gaussian)
+
+        self.mean = np.array([[[1], [2]], [[0], [-1]], [[3], [1]]])
+        self.cov = np.array([[[2, 1], [1, 3]],
+                             [[1, 0], [0, 1]],
+                             [[4, -1], [-1, 2]]])
+        self.rv = rv.Gaussian(self.mean, self.cov, self.x1, self.x2,
+                              batched=True)
+        self.rvs = [rv.Gaussian(m, c, self.x1, self.x2)
+                    for m, c in zip(self.mean, self.cov)]
+
+    def test_initialization(self):
+        self.assertTrue(self.rv.batched)
+        self.assertEqual(self.rv.batch_size, 3)
+        npt.assert_almost_equal(self.rv.precision,
+                                np.linalg.inv(self.cov))
+
+        with self.assertRaises(rv.ParameterException):
+            rv.Gaussian(self.mean, self.cov, self.x1, self.x2)
+        with self.assertRaises(rv.ParameterException):
+            rv.Gaussian([[1], [2]], [[2, 1], [1, 3]], self.x1, self.x2,
+                        batched=True)
+
+    def test_multiplication(self):
+        g = rv.Gaussian([[1]], [[2]], self.x2)
+        mul = self.rv * g
+        self.assertTrue(mul.batched)
+        for i, r in enumerate(self.rvs):
+            res = r * g
+            npt.assert_almost_equal(mul.precision[i], res.precision)
+            npt.assert_almost_equal(mul.precision_mean[i],
+                                    res.precision_mean)
+
+    def test_marginalize(self):
+        for g in (self.rv, rv.Gaussian.inf_form(self.rv.precision,
+                                                self.rv.precision_mean,
+                                                self.x1, self.x2,
+                                                batched=True)):
+            marginalize = g.marginalize(self.x2)
+            self.assertTrue(marginalize.batched)
+            npt.assert_almost_equal(marginalize.mean, self.mean[:, :1])
+            npt.assert_almost_equal(marginalize.cov, self.cov[:, :1, :1])
+
+    def test_condition(self):
+        values = np.array([[[3]], [[0]], [[-2]]])
+        condition = self.rv.condition(self.x2, values=values)
+        for i, r in enumerate(self.rvs):
+            res = r.condition(self.x2, values=values[i])
+            npt.assert_almost_equal(condition.mean[i], res.mean)
+            npt.assert_almost_equal(condition.cov[i], res.cov)
+
+        # Stacked values for a single random variable
+        condition = self.rvs[0].condition(self.x2, values=values)
+        self.assertTrue(condition.batched)
+        npt.assert_almost_equal(condition.mean[:, 0, 0],
+                                [1 + 1 / 3, 1 - 2 / 3, 1 - 4 / 3])
+
+    def test_sqrt(self):
+        s = self.rv.to_sqrt()
+        self.assertTrue(s.batched)
+        self.assertEqual(s, self.rv)
+        self.assertEqual(s.marginalize(self.x1), self.rv.marginalize(self.x1))
+        self.assertEqual(s * rv.SqrtGaussian.unity(self.x1), self.rv)
+
+
+class TestSqrtGaussian(unittest.TestCase):
+
+    def setUp(self):
+        self.x1 = nodes.VNode("x1", rv.SqrtGaussian)
+        self.x2 = nodes.VNode("x2", rv.SqrtGaussian)
+
+        self.g = rv.Gaussian([[1], [2]], [[2, 1], [1, 3]], self.x1, self.x2)
+        self.s = self.g.to_sqrt()
+
+    def test_initialization(self):
+        self.assertIsInstance(self.s, rv.SqrtGaussian)
+        self.assertEqual(self.s, self.g)
+        npt.assert_almost_equal(self.s.mean, self.g.mean)
+        npt.assert_almost_equal(self.s.cov, self.g.cov)
+
+        s = rv.Gaussian.inf_form(self.g.precision, self.g.precision_mean,
+                                 self.x1, self.x2).to_sqrt()
+        self.assertEqual(s, self.g)
+        self.assertIs(s.to_sqrt(), s)
+
+        R = s.sqrt_precision
+        npt.assert_almost_equal(np.dot(R.T, R), self.g.precision)
+
+        # Moment form with derived precision matrix
+        g = rv.Gaussian([[1], [2]], [[2, 1], [1, 3]], self.x1, self.x2)
+        g.precision
+        self.assertEqual(g.to_sqrt(), self.g)
+
+        with self.assertRaises(rv.ParameterException):
+            rv.SqrtGaussian([[1, 0], [0, 1]], [[0], [0]], self.x1)
+
+    def test_derived_form(self):
+        g = rv.Gaussian(self.g.mean, self.g.cov, self.x1, self.x2)
+        g.precision  # Derive the information form before the conversion
+        self.assertEqual(g.to_sqrt(), self.g)
+
+    def test_unit_element(self):
+        rv0 = rv.SqrtGaussian.unity(self.x1, self.x2)
+        self.assertEqual(self.s * rv0, self.g)
+        self.assertEqual(rv0 * self.s, self.g)
+
+        rv0 = rv.Gaussian.unity(self.x1).to_sqrt()
+        npt.assert_almost_equal(rv0.sqrt_precision, [[0]])
+
+    def test_multiplication(self):
+        g = rv.Gaussian([[3]], [[4]], self.x2)
+        mul = self.s * g
+        self.assertIsInstance(mul, rv.SqrtGaussian)
+        self.assertEqual(mul, self.g * g)
+
+        # Result is upper triangular
+        R = mul.sqrt_precision
+        npt.assert_almost_equal(R, np.triu(R))
+
+    def test_marginalize(self):
+        for dim in (self.x1, self.x2):
+            marginalize = self.s.marginalize(dim)
+            self.assertIsInstance(marginalize, rv.SqrtGaussian)
+            self.assertEqual(marginalize, self.g.marginalize(dim))
+
+    def test_condition(self):
+        condition = self.s.condition(self.x2, values=[[3]])
+        self.assertEqual(condition, self.g.condition(self.x2, values=[[3]]))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from .. import graphs, inference, nodes, rv, sampling
+
+
+class TestSampling(unittest.TestCase):
+
+    def setUp(self):
+        # Create a 3x3 grid with random unary and pairwise factors
+        rng = np.random.RandomState(0)
+        self.fg = graphs.FactorGraph()
+        self.x = {(i, j): nodes.VNode("x%d%d" % (i, j), rv.Discrete)
+                  for i in range(3) for j in range(3)}
+        self.fg.set_nodes(self.x.values())
+
+        for (i, j), x in self.x.items():
+            fn = nodes.FNode("f%s" % x, rv.Discrete(rng.rand(3) + 0.1, x))
+            self.fg.set_node(fn)
+            self.fg.set_edge(fn, x)
+            for y in (self.x.get((i + 1, j)), self.x.get((i, j + 1))):
+                if y is not None:
+                    dist = np.exp(rng.randn(3, 3))
+                    fn = nodes.FNode("f%s%s" % (x, y), rv.Discrete(dist, x, y))
+                    self.fg.set_node(fn)
+                    self.fg.set_edge(x, fn)
+                    self.fg.set_edge(fn, y)
+
+    def _marginals(self, values):
+        return {x: np.bincount(v.ravel(), minlength=3) / v.size
+                for x, v in values.items()}
+
+    def _exact(self, x):
+        factors = [fn.factor for fn in self.fg.get_fnodes()]
+        return rv.Discrete.contract(*factors, dims=(x,)).normalize().pmf
+
+    def test_forward(self):
+        # Remove horizontal factors of the lower rows to obtain a tree
+        self.fg.remove_nodes_from([fn for fn in self.fg.get_fnodes()
+                                   if str(fn) in ("fx10x11", "fx11x12",
+                                                  "fx20x21", "fx21x22")])
+        x, y = self.x[(0, 0)], self.x[(1, 0)]
+        values = sampling.forward_sampling(self.fg, 50000, self.x[(1, 1)],
+                                           seed=0)
+        self.assertEqual(set(values), set(self.x.values()))
+        self.assertEqual(values[x].shape, (50000,))
+        self.assertEqual(values[x].dtype, np.uint8)
+        for n, p in self._marginals(values).items():
+            npt.assert_almost_equal(p, self._exact(n), decimal=2)
+
+        # Joint distribution of a pairwise factor
+        joint = np.zeros((3, 3))
+        np.add.at(joint, (values[x], values[y]), 1 / 50000)
+        factors = [fn.factor for fn in self.fg.get_fnodes()]
+        npt.assert_almost_equal(
+            joint, rv.Discrete.contract(*factors, dims=(x, y))
+            .normalize().pmf, decimal=2)
+
+        # Observed variable
+        x.init = rv.Discrete([0, 0, 1], x)
+        values = sampling.forward_sampling(self.fg, 100, reuse=True, seed=0)
+        self.assertTrue(np.all(values[x] == 2))
+
+    def test_forward_forest(self):
+        # Remove the factors between the rows to obtain three chains
+        self.fg.remove_nodes_from([fn for fn in self.fg.get_fnodes()
+                                   if len(fn.factor.dim) > 1
+                                   and str(fn)[2] != str(fn)[5]])
+        x, y = self.x[(0, 0)], self.x[(2, 2)]
+
+        # Only the component of the query node was swept before
+        inference.sum_product(self.fg, x)
+        values = sampling.forward_sampling(self.fg, 50000, reuse=True,
+                                           seed=0)
+        for n, p in self._marginals(values).items():
+            npt.assert_almost_equal(p, self._exact(n), decimal=2)
+
+        # Changed evidence of another component
+        y.init = rv.Discrete([0, 1, 0], y)
+        values = sampling.forward_sampling(self.fg, 50000, reuse=True,
+                                           seed=0)
+        self.assertTrue(np.all(values[y] == 1))
+        for n in (x, self.x[(1, 1)]):
+            npt.assert_almost_equal(self._marginals({n: values[n]})[n],
+                                    self._exact(n), decimal=2)
+
+    def test_gibbs(self):
+        values = sampling.gibbs_sampling(self.fg, 20, chains=1000,
+                                         burn_in=20, thinning=2, seed=0)
+        x = self.x[(1, 1)]
+        self.assertEqual(values[x].shape, (20, 1000))
+        for n, p in self._marginals(values).items():
+            npt.assert_almost_equal(p, self._exact(n), decimal=2)
+
+        # Initial state and observed variable
+        x.init = rv.Discrete([0, 1, 0], x)
+        values = sampling.gibbs_sampling(self.fg, 1, chains=10,
+                                         initial={x: 1}, seed=0)
+        self.assertTrue(np.all(values[x] == 1))
+
+    def test_exceptions(self):
+        x = self.x[(0, 0)]
+        fn = nodes.FNode("g", rv.Gaussian([[0]], [[1]], x))
+        self.fg.set_node(fn)
+        self.fg.set_edge(fn, x)
+        with self.assertRaises(rv.ParameterException):
+            sampling.gibbs_sampling(self.fg, 1)
+        with self.assertRaises(rv.ParameterException):
+            sampling.forward_sampling(self.fg, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
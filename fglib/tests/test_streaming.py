@@ -0,0 +1,114 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from .. import graphs, nodes, inference, rv, streaming
+
+
+class TestFixedLagSmoother(unittest.TestCase):
+
+    def setUp(self):
+        # Hidden Markov model with three states and two observation symbols
+        rng = np.random.RandomState(0)
+        self.pi = np.array([0.5, 0.3, 0.2])
+        self.A = rng.rand(3, 3) + 0.1
+        self.A /= np.sum(self.A, axis=1, keepdims=True)
+        self.B = np.array([[0.9, 0.1], [0.2, 0.8], [0.5, 0.5]])
+        self.y = list(rng.randint(2, size=25))
+        self.y[7] = None  # Missing observation
+
+    def prior(self, x):
+        return rv.Discrete(self.pi, x)
+
+    def transition(self, x0, x1):
+        return rv.Discrete(self.A, x0, x1)
+
+    def likelihood(self, x, y):
+        return rv.Discrete(self.B[:, y], x)
+
+    def _chain(self, prior, transition, likelihood, observations, rv_type):
+        # Factor graph of the complete chain
+        fg = graphs.FactorGraph()
+        xs = [nodes.VNode("x%d" % t, rv_type)
+              for t in range(len(observations))]
+        fg.set_nodes(xs)
+        for t, (x, y) in enumerate(zip(xs, observations)):
+            factor = transition(xs[t - 1], x) if t else prior(x)
+            f = nodes.FNode("f%d" % t, factor)
+            fg.set_node(f)
+            fg.set_edges([(xs[t - 1], f), (f, x)] if t else [(f, x)])
+            if y is not None:
+                e = nodes.FNode("e%d" % t, likelihood(x, y))
+                fg.set_node(e)
+                fg.set_edge(e, x)
+        return fg, xs
+
+    def test_discrete(self):
+        lag = 3
+        steps = streaming.fixed_lag_smoothing(
+            iter(self.y), self.prior, self.transition, self.likelihood, lag)
+
+        for step in steps:
+            t = step.time
+            fg, xs = self._chain(self.prior, self.transition,
+                                 self.likelihood, self.y[:t + 1], rv.Discrete)
+            npt.assert_almost_equal(step.filtered.pmf,
+                                    inference.sum_product(fg, xs[t]).pmf)
+            if t < lag:
+                self.assertIsNone(step.smoothed)
+            else:
+                npt.assert_almost_equal(
+                    step.smoothed.pmf,
+                    inference.sum_product(fg, xs[t - lag]).pmf)
+        self.assertEqual(t, len(self.y) - 1)
+
+    def test_window(self):
+        smoother = streaming.FixedLagSmoother(
+            self.prior, self.transition, self.likelihood, 2)
+        sizes = [smoother.graph.number_of_nodes()
+                 for _ in smoother.run([0, 1] * 50)]
+        self.assertEqual(max(sizes), 3 * 3)
+        self.assertEqual(sizes[-1], sizes[10])
+
+        # Beliefs of the window
+        fg, xs = self._chain(self.prior, self.transition, self.likelihood,
+                             [0, 1] * 50, rv.Discrete)
+        beliefs = smoother.beliefs()
+        self.assertEqual(sorted(beliefs), [97, 98, 99])
+        for t, belief in beliefs.items():
+            npt.assert_almost_equal(belief.pmf,
+                                    inference.sum_product(fg, xs[t]).pmf)
+
+        with self.assertRaises(ValueError):
+            streaming.FixedLagSmoother(self.prior, self.transition,
+                                       self.likelihood, -1)
+
+    def test_gaussian(self):
+        # Random walk with noisy observations of the position
+        def prior(x):
+            return rv.Gaussian([[0]], [[4]], x)
+
+        def transition(x0, x1):
+            return rv.Gaussian.inf_form([[1, -1], [-1, 1]], [[0], [0]],
+                                        x0, x1)
+
+        def likelihood(x, y):
+            return rv.Gaussian([[y]], [[0.5]], x)
+
+        y = np.cumsum(np.random.RandomState(1).randn(12))
+        steps = list(streaming.fixed_lag_smoothing(
+            y, prior, transition, likelihood, 2, rv.Gaussian))
+
+        fg, xs = self._chain(prior, transition, likelihood, y, rv.Gaussian)
+        filtered = inference.sum_product(fg, xs[11])
+        npt.assert_almost_equal(steps[-1].filtered.mean, filtered.mean)
+        npt.assert_almost_equal(steps[-1].filtered.cov, filtered.cov)
+
+        smoothed = inference.sum_product(fg, xs[9])
+        npt.assert_almost_equal(steps[-1].smoothed.mean, smoothed.mean)
+        npt.assert_almost_equal(steps[-1].smoothed.cov, smoothed.cov)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,9 +12,9 @@ setup(
     scripts=[],
 
     # Dependencies
-    python_requires='>=3.4',
-    install_requires=["networkx>=2.0",
-                      "numpy>=1.12",
+    python_requires='>=3.8',
+    install_requires=["networkx>=2.5",
+                      "numpy>=1.22",
                       "matplotlib>=2.0"],
 
     # Metadata
@@ -30,10 +30,8 @@ setup(
         'Topic :: Scientific/Engineering',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
     ],
 
     # Miscellaneous